@@ -1,35 +1,29 @@
 # database_setup/add_dates.py
-import os
-import mysql.connector
-
-# read simple creds file if present
-if os.path.isfile('../credentials.txt'):
-    with open("../credentials.txt", "r") as reader:
-        u, p = [line.strip() for line in reader.readlines()]
-else:
-    u = input("Enter database user: ")
-    p = input("Enter database password: ")
-
-cnx = mysql.connector.connect(
-    host="127.0.0.1",
-    port=3308,                 # <- match your config.py port
-    user=u,
-    password=p,
-    database="meals"           # <- match your config.py database
-)
-
-cur = cnx.cursor()
-
-# get meal names
-cur.execute("SELECT Name FROM MealsTable;")
-meals = [r[0] for r in cur.fetchall()]
-
-# set a date on each
-sql = "UPDATE MealsTable SET Last_Made = %s WHERE Name = %s"
-for name in meals:
-    cur.execute(sql, ("2021-04-23", name))
-
-cnx.commit()
-cur.close()
-cnx.close()
-print("✔ Last_Made backfilled.")
+# Backfill a Last_Made date on every meal, using your Flask/SQLAlchemy config.
+# Records the date in MealHistory and moves Last_Made forward to it, each with
+# one set-based statement (meals already made later keep their date).
+from meal_app import create_app, db
+from meal_app.utilities import compile_statement
+
+LAST_MADE = "2021-04-23"
+
+HISTORY_SQL = """
+INSERT IGNORE INTO MealHistory (Meal_ID, Made_On)
+SELECT Meal_ID, :dt FROM MealsTable
+"""
+
+UPDATE_SQL = "UPDATE MealsTable SET Last_Made = :dt WHERE Last_Made IS NULL OR Last_Made < :dt"
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(compile_statement(HISTORY_SQL, conn.dialect.name), {"dt": LAST_MADE})
+            conn.execute(compile_statement(UPDATE_SQL, conn.dialect.name), {"dt": LAST_MADE})
+
+    print("✔ Last_Made backfilled.")
+
+
+if __name__ == "__main__":
+    main()
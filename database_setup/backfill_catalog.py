@@ -1,62 +1,166 @@
 # database_setup/backfill_catalogs.py
-# Build/refresh the Ingredients and Tags *catalog* tables
-# from MealsTable’s JSON and boolean columns. No junction tables.
+# Build/refresh the Ingredients and Tags *catalog* tables from MealsTable’s
+# JSON and boolean columns. No junction tables.
+#
+# Incremental: only meals whose Updated_At is at or after the last run's
+# watermark (CatalogWatermarks) are read, through ix_meals_updated. The
+# watermark stays SAFETY_LAG behind the database clock, so a write whose
+# transaction commits late is still picked up by the next run. Their
+# ingredient names are deduped in memory and added with one multi-row
+# INSERT IGNORE; names no longer used by any meal (IngredientUsage, which
+# add/edit keep current) are deleted. Cheap enough to run from cron:
+#
+#     python -m database_setup.backfill_catalog           # changes since the last run
+#     python -m database_setup.backfill_catalog --full    # every meal, and recount IngredientUsage
 
+import argparse
 import json
+from datetime import datetime, timedelta
 from sqlalchemy import text
 from meal_app import create_app, db
-from meal_app.variables import (
-    fresh_ingredients as VAR_FRESH,
-    tinned_ingredients as VAR_TINNED,
-    dry_ingredients as VAR_DRY,
-    dairy_ingredients as VAR_DAIRY,
-)
+from meal_app.utilities import compile_statement
+from meal_app.statements import get_statement, INGREDIENT_COLUMNS
+from meal_app.ingredient_catalog import rebuild_ingredient_usage
+from meal_app.migrations import migrate
 
 TAGS = ['Spring/Summer', 'Autumn/Winter', 'Quick/Easy', 'Special']
 
+JOB = "catalog_backfill"
+
+# The watermark never passes "now" minus this, for writes whose transaction
+# commits after a later one has already been seen
+SAFETY_LAG = timedelta(seconds=30)
+
+_NOW_SQL = {"mysql": "SELECT CURRENT_TIMESTAMP(6)", "sqlite": "SELECT strftime('%Y-%m-%d %H:%M:%f', 'now')"}
+
+# Names per INSERT statement
+INSERT_CHUNK = 1000
+
+FETCH_SIZE = 500
+
+
+def _execute(conn, query_string, params=None):
+    return conn.execute(compile_statement(query_string, conn.dialect.name), params or {})
+
+
 def ensure_tags(conn):
-    for t in TAGS:
-        conn.execute(text("INSERT IGNORE INTO Tags (Tag_Name) VALUES (:t)"), {"t": t})
-
-def upsert_ingredient_name(conn, name: str):
-    if not name:
-        return
-    conn.execute(
-        text("INSERT IGNORE INTO Ingredients (Ingredient_Name) VALUES (:n)"),
-        {"n": name},
-    )
-
-def process_bucket(conn, bucket):
-    if not bucket:
-        return
+    values = ", ".join(f"(:t{i})" for i in range(len(TAGS)))
+    _execute(conn, f"INSERT IGNORE INTO Tags (Tag_Name) VALUES {values}",
+             {f"t{i}": tag for i, tag in enumerate(TAGS)})
+
+
+def bucket_names(bucket):
+    """Ingredient names in one JSON ingredient column (a dict or its JSON text)."""
     if isinstance(bucket, str):
         try:
-            data = json.loads(bucket)
-        except Exception:
-            data = {}
-    elif isinstance(bucket, dict):
-        data = bucket
-    else:
-        data = {}
-    for name in data.keys():
-        upsert_ingredient_name(conn, name)
+            bucket = json.loads(bucket)
+        except ValueError:
+            return ()
+    return bucket.keys() if isinstance(bucket, dict) else ()
+
+
+def _datetime(value):
+    # SQLite hands DATETIME back as text
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def database_now(conn):
+    return _datetime(conn.execute(text(_NOW_SQL[conn.dialect.name])).scalar())
+
+
+def read_watermark(conn):
+    row = _execute(conn, "SELECT Watermark FROM CatalogWatermarks WHERE Job = :job", {"job": JOB}).first()
+    return _datetime(row[0]) if row is not None else None
+
+
+def write_watermark(conn, watermark):
+    _execute(conn, """
+        INSERT INTO CatalogWatermarks (Job, Watermark) VALUES (:job, :watermark)
+        ON DUPLICATE KEY UPDATE Watermark = VALUES(Watermark)
+        """, {"job": JOB, "watermark": watermark})
+
+
+def changed_ingredient_names(conn, since):
+    """
+    Reads meals changed at or after since (all meals for None).
+
+    Returns
+    -------
+    (set of ingredient names, number of meals read, newest Updated_At seen)
+    """
+    names, meals, newest = set(), 0, None
+    result = conn.execution_options(stream_results=True).execute(
+        compile_statement(get_statement("meals_changed_since"), conn.dialect.name),
+        {"since": since or datetime(1970, 1, 1)})
+    keys = list(result.keys())
+    while True:
+        rows = result.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        for row in rows:
+            row = dict(zip(keys, row))
+            meals += 1
+            newest = row["Updated_At"]
+            for column in INGREDIENT_COLUMNS:
+                names.update(name for name in bucket_names(row[column]) if name)
+    return names, meals, _datetime(newest)
+
+
+def insert_ingredient_names(conn, names):
+    """Adds names to Ingredients (existing ones are ignored), INSERT_CHUNK per statement."""
+    names = sorted(names)
+    for start in range(0, len(names), INSERT_CHUNK):
+        chunk = names[start:start + INSERT_CHUNK]
+        values = ", ".join(f"(:n{i})" for i in range(len(chunk)))
+        _execute(conn, f"INSERT IGNORE INTO Ingredients (Ingredient_Name) VALUES {values}",
+                 {f"n{i}": name for i, name in enumerate(chunk)})
+
+
+def prune_ingredient_names(conn):
+    """Deletes Ingredients no meal uses any more; returns how many."""
+    return _execute(conn, """
+        DELETE FROM Ingredients
+        WHERE NOT EXISTS (
+          SELECT 1 FROM IngredientUsage u WHERE u.Ingredient_Name = Ingredients.Ingredient_Name
+        )
+        """).rowcount
+
+
+def backfill(conn, full=False):
+    """Runs one incremental (or full) refresh on conn; returns (meals read, names seen, names pruned)."""
+    watermark = None if full else read_watermark(conn)
+    horizon = database_now(conn) - SAFETY_LAG
+
+    ensure_tags(conn)
+    names, meals, newest = changed_ingredient_names(conn, watermark)
+    if full:
+        # also recount per-category usage (drives the /search dropdowns)
+        rebuild_ingredient_usage(conn)
+    insert_ingredient_names(conn, names)
+    pruned = prune_ingredient_names(conn) if meals or full else 0
+    if newest is not None:
+        newest = min(newest, horizon)
+        if watermark is None or newest > watermark:
+            write_watermark(conn, newest)
+    return meals, len(names), pruned
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Refresh the Ingredients and Tags catalogs.")
+    parser.add_argument("--full", action="store_true", help="read every meal and recount IngredientUsage")
+    args = parser.parse_args()
+
     app = create_app()
     with app.app_context():
+        migrate(db.engine)
         with db.engine.begin() as conn:
-            # 1) ensure the Tags catalog exists/seeded
-            ensure_tags(conn)
-
-            # 2) scan all meals and collect ingredient names into Ingredients catalog
-            rows = conn.execute(text("SELECT Fresh_Ingredients, Tinned_Ingredients, Dry_Ingredients, Dairy_Ingredients FROM MealsTable")).mappings().all()
-            for r in rows:
-                process_bucket(conn, r.get("Fresh_Ingredients"))
-                process_bucket(conn, r.get("Tinned_Ingredients"))
-                process_bucket(conn, r.get("Dry_Ingredients"))
-                process_bucket(conn, r.get("Dairy_Ingredients"))
-
-    print("✔ Catalogs refreshed: Ingredients, Tags.")
+            meals, names, pruned = backfill(conn, full=args.full)
+
+    print(f"✔ Catalogs refreshed from {meals} changed meals: "
+          f"{names} ingredient names, {pruned} unused removed.")
+
 
 if __name__ == "__main__":
     main()
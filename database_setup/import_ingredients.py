@@ -6,6 +6,7 @@ The application stores ingredients inside JSON columns on MealsTable
 
 Use:
   - database_setup/import_sample_data.py   -> creates MealsTable and loads sample_database_data.json
+  - database_setup/import_meals.py         -> bulk import of a JSON / JSONL / CSV recipe catalog
   - database_setup/add_dates.py            -> optional helper to backfill Last_Made
 
 This file is intentionally disabled to avoid creating an unused `Ingredients` table.
@@ -0,0 +1,417 @@
+# database_setup/import_meals.py
+"""
+Bulk import of a recipe catalog into MealsTable, for files far bigger than
+the sample data.
+
+    python -m database_setup.import_meals recipes.jsonl
+    python -m database_setup.import_meals recipes.csv --batch-size 1000 --workers 8
+    python -m database_setup.import_meals recipes.json --restart
+
+- Streams JSON arrays, JSONL (one meal per line) and CSV (ingredient columns
+  as JSON objects, tags as 0/1 columns or a "Tags" list), never holding the
+  whole file in memory
+- Validates rows in a pool of worker processes; bad rows are counted and,
+  with --rejects, written out as JSONL with the reason
+- Upserts by Name in multi-row INSERT ... ON DUPLICATE KEY UPDATE batches,
+  committing every --commit-every batches; Last_Made and the tags are only
+  overwritten by rows that carry them
+- After each commit the position is written to a checkpoint file (default
+  <file>.checkpoint.json); a failed or interrupted import started again with
+  the same file carries on from there, --restart ignores it
+- Prints progress and rows/s, then refreshes IngredientUsage and adds each
+  imported Last_Made to MealHistory
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+from meal_app import create_app, db
+from meal_app.migrations import migrate
+from meal_app.utilities import compile_statement
+from meal_app.ingredient_catalog import rebuild_ingredient_usage
+from meal_app.statements import INGREDIENT_COLUMNS
+from meal_app.variables import tag_list, tag_list_backend
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_COMMIT_EVERY = 20
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+PROGRESS_EVERY = 2.0
+
+# Bytes read per step by the JSON array reader
+READ_CHUNK = 1 << 16
+
+FORMATS = {".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+
+# Column -> maximum length, as in MealsTable
+TEXT_COLUMNS = {"Name": 255, "Staple": 100, "Book": 100, "Page": 10, "Website": 255}
+
+COLUMNS = list(TEXT_COLUMNS) + INGREDIENT_COLUMNS + ["Last_Made"] + tag_list_backend
+
+HISTORY_SQL = """
+INSERT IGNORE INTO MealHistory (Meal_ID, Made_On)
+SELECT Meal_ID, Last_Made FROM MealsTable WHERE Last_Made IS NOT NULL
+"""
+
+
+# --- readers: each yields one raw record per meal, in file order -------------
+
+def read_jsonl(path):
+    """Yields each non-blank line; the workers parse them."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f)
+
+
+def read_json_array(path):
+    """Yields the elements of a top-level JSON array, decoding one at a time."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buffer, position, eof = "", 0, False
+
+        def more():
+            nonlocal buffer, position, eof
+            chunk = f.read(READ_CHUNK)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+
+        def next_char(skip=" \t\r\n"):
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in skip:
+                    position += 1
+                if position < len(buffer) or eof:
+                    return buffer[position] if position < len(buffer) else ""
+                more()
+
+        if next_char() != "[":
+            raise ValueError(f"{path} is not a JSON array")
+        position += 1
+        while True:
+            if next_char(" \t\r\n,") == "]":
+                return
+            while True:
+                try:
+                    element, end = decoder.raw_decode(buffer, position)
+                    # a number at the end of the buffer may continue in the next chunk
+                    if end < len(buffer) or eof:
+                        break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                more()
+            position = end
+            yield element
+
+
+READERS = {"json": read_json_array, "jsonl": read_jsonl, "csv": read_csv}
+
+
+# --- validation (runs in the worker processes) -------------------------------
+
+def _ingredients(value, column):
+    if value in (None, ""):
+        return {}
+    if isinstance(value, str):
+        value = json.loads(value)
+    if not isinstance(value, dict):
+        raise ValueError(f"{column} must be an object of ingredient: quantity")
+    ingredients = {}
+    for ingredient, quantity in value.items():
+        if not str(ingredient).strip():
+            raise ValueError(f"{column} has an empty ingredient name")
+        if quantity is not None and not isinstance(quantity, (str, int, float)):
+            raise ValueError(f"{column}[{ingredient}] must be a quantity")
+        ingredients[str(ingredient).strip()] = "" if quantity is None else str(quantity)
+    return ingredients
+
+
+def _flag(value):
+    return 1 if str(value).strip().lower() in ("1", "true", "yes", "y") else 0
+
+
+def validate_record(raw, parse=False):
+    """
+    Turns one raw record (a dict, or a JSONL line with parse) into upsert
+    parameters. Raises ValueError if it isn't a usable meal.
+    """
+    record = json.loads(raw) if parse else raw
+    if not isinstance(record, dict):
+        raise ValueError("not an object")
+
+    params = {}
+    for column, limit in TEXT_COLUMNS.items():
+        value = record.get(column)
+        value = "" if value is None else str(value).strip()
+        if len(value) > limit:
+            raise ValueError(f"{column} is longer than {limit} characters")
+        params[column] = value
+    if not params["Name"]:
+        raise ValueError("Name is missing")
+
+    for column in INGREDIENT_COLUMNS:
+        params[column] = json.dumps(_ingredients(record.get(column), column))
+
+    last_made = record.get("Last_Made")
+    params["Last_Made"] = date.fromisoformat(str(last_made)[:10]).isoformat() if last_made else None
+
+    # Tags as 0/1 columns, or as a list of names; None leaves the stored tags alone
+    tags = record.get("Tags")
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",")] if tags.strip() else None
+    has_tags = tags is not None or any(record.get(column) not in (None, "") for column in tag_list_backend)
+    for column, name in zip(tag_list_backend, tag_list):
+        if not has_tags:
+            params[column] = None
+        elif tags is not None:
+            params[column] = int(column in tags or name in tags)
+        else:
+            params[column] = _flag(record.get(column, 0))
+    return params
+
+
+def validate_batch(batch, parse=False):
+    """Validates [(record number, raw record)]; returns (params list, [(record number, error)])."""
+    rows, rejected = [], []
+    for number, raw in batch:
+        try:
+            rows.append(validate_record(raw, parse))
+        except (ValueError, TypeError) as exc:
+            rejected.append((number, str(exc)))
+    return rows, rejected
+
+
+# --- upserts -----------------------------------------------------------------
+
+def upsert_sql(row_count, with_tags):
+    """A multi-row upsert of row_count meals (the SQLite backend translates it)."""
+    placeholders = ", ".join(
+        "(" + ", ".join(f":{column}_{i}" for column in COLUMNS) + ")" for i in range(row_count))
+    updates = [f"{column}=VALUES({column})" for column in list(TEXT_COLUMNS)[1:] + INGREDIENT_COLUMNS]
+    updates.append("Last_Made=COALESCE(VALUES(Last_Made), Last_Made)")
+    if with_tags:
+        updates += [f"{column}=VALUES({column})" for column in tag_list_backend]
+    return (f"INSERT INTO MealsTable ({', '.join(COLUMNS)}) VALUES {placeholders} "
+            f"ON DUPLICATE KEY UPDATE {', '.join(updates)}")
+
+
+def upsert_rows(conn, rows):
+    """Upserts validated rows: one statement for rows with tags, one for rows without."""
+    for with_tags in (True, False):
+        group = [row for row in rows if (row[tag_list_backend[0]] is not None) == with_tags]
+        if not group:
+            continue
+        params = {}
+        for i, row in enumerate(group):
+            for column in COLUMNS:
+                value = row[column]
+                # new meals without tags get the column default
+                params[f"{column}_{i}"] = 0 if value is None and column in tag_list_backend else value
+        conn.execute(compile_statement(upsert_sql(len(group), with_tags), conn.dialect.name), params)
+
+
+# --- checkpoints -------------------------------------------------------------
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return {"source": str(Path(path).resolve()), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def read_checkpoint(checkpoint_path, source):
+    """Returns the saved position for source, or None (raises if it belongs to another file)."""
+    try:
+        checkpoint = json.loads(Path(checkpoint_path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    if {key: checkpoint.get(key) for key in ("source", "size", "mtime")} != _fingerprint(source):
+        raise SystemExit(f"✘ {checkpoint_path} is for a different or changed file; use --restart")
+    return checkpoint
+
+
+def write_checkpoint(checkpoint_path, source, stats):
+    temporary = Path(f"{checkpoint_path}.tmp")
+    temporary.write_text(json.dumps({**_fingerprint(source), **stats}), encoding="utf-8")
+    os.replace(temporary, checkpoint_path)
+
+
+# --- the import --------------------------------------------------------------
+
+def _batches(records, batch_size, skip):
+    batch = []
+    for number, raw in enumerate(records):
+        if number < skip:
+            continue
+        batch.append((number, raw))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _validated(batches, workers, parse):
+    """Validates batches in order, with at most 2 * workers batches in flight."""
+    if workers <= 0:
+        yield from ((batch, validate_batch(batch, parse)) for batch in batches)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append((batch, pool.submit(validate_batch, batch, parse)))
+            if len(pending) >= 2 * workers:
+                batch, future = pending.popleft()
+                yield batch, future.result()
+        while pending:
+            batch, future = pending.popleft()
+            yield batch, future.result()
+
+
+def _write_rejects(rejects, rejected):
+    # written once their transaction commits, so a resumed import doesn't repeat them
+    if rejects:
+        for number, error in rejected:
+            rejects.write(json.dumps({"record": number, "error": error}) + "\n")
+        rejects.flush()
+    return []
+
+
+def import_meals(engine, source, fmt=None, batch_size=DEFAULT_BATCH_SIZE, commit_every=DEFAULT_COMMIT_EVERY,
+                 workers=DEFAULT_WORKERS, checkpoint_path=None, restart=False, rejects_path=None, progress=print):
+    """
+    Streams source into MealsTable.
+
+    Parameters
+    ----------
+    engine : sqlalchemy Engine
+    source : path of a .json, .jsonl or .csv file
+    fmt : "json", "jsonl", "csv" or None (from the file extension)
+    batch_size : int
+        rows per INSERT statement
+    commit_every : int
+        batches per transaction (and checkpoint)
+    workers : int
+        validation processes; 0 validates in this process
+    checkpoint_path : path or None
+        where progress is saved; None means no checkpoint
+    restart : bool
+        ignore an existing checkpoint
+    rejects_path : path or None
+        JSONL file of rejected records
+    progress : callable taking a message
+
+    Returns
+    -------
+    dict with records, upserted and rejected counts
+    """
+    fmt = fmt or FORMATS.get(Path(source).suffix.lower())
+    if fmt not in READERS:
+        raise SystemExit(f"✘ Can't tell the format of {source}; use --format json, jsonl or csv")
+
+    stats = {"records": 0, "upserted": 0, "rejected": 0}
+    if checkpoint_path and not restart:
+        checkpoint = read_checkpoint(checkpoint_path, source)
+        if checkpoint:
+            stats = {key: checkpoint[key] for key in stats}
+            progress(f"  resuming after record {stats['records']:,}")
+    resumed_at = stats["records"]
+
+    rejects = open(rejects_path, "a" if resumed_at else "w", encoding="utf-8") if rejects_path else None
+    started = last_report = time.monotonic()
+    conn = engine.connect()
+    try:
+        transaction, batches_in_transaction, pending_rejects = None, 0, []
+        for batch, (rows, rejected) in _validated(
+                _batches(READERS[fmt](source), batch_size, resumed_at), workers, fmt == "jsonl"):
+            if transaction is None:
+                transaction = conn.begin()
+            if rows:
+                upsert_rows(conn, rows)
+            pending_rejects.extend(rejected)
+            stats["records"] = batch[-1][0] + 1
+            stats["upserted"] += len(rows)
+            stats["rejected"] += len(rejected)
+            batches_in_transaction += 1
+            if batches_in_transaction >= commit_every:
+                transaction.commit()
+                transaction, batches_in_transaction = None, 0
+                pending_rejects = _write_rejects(rejects, pending_rejects)
+                if checkpoint_path:
+                    write_checkpoint(checkpoint_path, source, stats)
+
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_EVERY:
+                last_report = now
+                rate = (stats["records"] - resumed_at) / (now - started)
+                progress(f"  {stats['records']:,} records ({stats['upserted']:,} upserted, "
+                         f"{stats['rejected']:,} rejected), {rate:,.0f} rows/s")
+        if transaction is not None:
+            transaction.commit()
+        _write_rejects(rejects, pending_rejects)
+    finally:
+        # an uncommitted transaction rolls back; the checkpoint is at the last commit
+        conn.close()
+        if rejects:
+            rejects.close()
+
+    if checkpoint_path:
+        Path(checkpoint_path).unlink(missing_ok=True)
+
+    elapsed = time.monotonic() - started
+    rate = (stats["records"] - resumed_at) / elapsed if elapsed else 0
+    progress(f"  {stats['records']:,} records ({stats['upserted']:,} upserted, "
+             f"{stats['rejected']:,} rejected) in {elapsed:.1f}s, {rate:,.0f} rows/s")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import meals into MealsTable.")
+    parser.add_argument("source", help="a .json array, .jsonl or .csv file")
+    parser.add_argument("--format", choices=sorted(READERS), default=None, help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"rows per INSERT (default {DEFAULT_BATCH_SIZE}, at most 2000)")
+    parser.add_argument("--commit-every", type=int, default=DEFAULT_COMMIT_EVERY,
+                        help=f"batches per transaction and checkpoint (default {DEFAULT_COMMIT_EVERY})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"validation processes, 0 for none (default {DEFAULT_WORKERS})")
+    parser.add_argument("--checkpoint", default=None, help="checkpoint file (default <source>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the top")
+    parser.add_argument("--rejects", default=None, help="write rejected records to this JSONL file")
+    args = parser.parse_args()
+    if not 1 <= args.batch_size <= 2000 or args.commit_every < 1:
+        parser.error("--batch-size must be 1-2000 and --commit-every at least 1")
+    if not Path(args.source).is_file():
+        parser.error(f"no such file: {args.source}")
+
+    app = create_app()
+    with app.app_context():
+        migrate(db.engine)
+        stats = import_meals(
+            db.engine, args.source, fmt=args.format, batch_size=args.batch_size,
+            commit_every=args.commit_every, workers=args.workers,
+            checkpoint_path=args.checkpoint or f"{args.source}.checkpoint.json",
+            restart=args.restart, rejects_path=args.rejects,
+            progress=lambda message: print(message, file=sys.stderr, flush=True),
+        )
+
+        # Recount the /search catalog and record the imported dates as history
+        with db.engine.begin() as conn:
+            rebuild_ingredient_usage(conn)
+            conn.execute(compile_statement(HISTORY_SQL, conn.dialect.name))
+
+    print(f"✔ Imported {stats['upserted']:,} meals into MealsTable ({stats['rejected']:,} rejected).")
+
+
+if __name__ == "__main__":
+    main()
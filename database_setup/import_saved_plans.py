@@ -0,0 +1,80 @@
+# database_setup/import_saved_plans.py
+"""
+One-time import of plans saved as JSON files (saved_meal_plans/) by older
+versions of the app into the SavedPlans table.
+
+- Looks in <project>/saved_meal_plans, <project>/meal_app/saved_meal_plans
+  and ./saved_meal_plans, for *.json files and extension-less files
+- Uses the file name as the plan name and parses the save time from it
+  ("YYYY-MM-DD HH:MM"), falling back to the file's modification time
+- Skips plans already imported (same name and save time), so it is safe to
+  run again; the files are left in place
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+from meal_app import create_app, db
+from meal_app.migrations import migrate
+from meal_app.plan_repository import save_plan, plan_exists, PLAN_NAME_FORMAT
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SAVED_DIRS = [
+    PROJECT_ROOT / "saved_meal_plans",
+    PROJECT_ROOT / "meal_app" / "saved_meal_plans",
+    Path.cwd() / "saved_meal_plans",
+]
+
+
+def saved_plan_files():
+    """Yields each distinct plan file across the old save locations."""
+    seen = set()
+    for directory in SAVED_DIRS:
+        if not directory.is_dir():
+            continue
+        for path in sorted(directory.iterdir()):
+            if not path.is_file() or path.suffix not in (".json", "") or path.resolve() in seen:
+                continue
+            seen.add(path.resolve())
+            yield path
+
+
+def saved_at(path):
+    """The save time encoded in the file name, else the file's mtime."""
+    name = path.stem if path.suffix == ".json" else path.name
+    day, _, clock = name.partition(" ")
+    # Windows-safe names had the ":" replaced with "-" or "_"
+    clock = clock.replace("-", ":").replace("_", ":")
+    try:
+        return datetime.strptime(f"{day} {clock}", PLAN_NAME_FORMAT)
+    except ValueError:
+        return datetime.fromtimestamp(path.stat().st_mtime).replace(microsecond=0)
+
+
+def main():
+    app = create_app()
+    imported = skipped = unreadable = 0
+    with app.app_context():
+        migrate(db.engine)
+        for path in saved_plan_files():
+            try:
+                plan = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                unreadable += 1
+                continue
+            if not isinstance(plan, dict):
+                unreadable += 1
+                continue
+            name = path.stem if path.suffix == ".json" else path.name
+            created_at = saved_at(path)
+            if plan_exists(name, created_at):
+                skipped += 1
+                continue
+            save_plan(plan, name=name, created_at=created_at)
+            imported += 1
+
+    print(f"✔ Imported {imported} saved plans ({skipped} already imported, {unreadable} unreadable).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# database_setup/migrate.py
+"""
+Applies (or reverts) the versioned schema migrations in meal_app/migrations.py.
+
+    python -m database_setup.migrate            # migrate to the latest version
+    python -m database_setup.migrate --to 1     # step down to version 1
+    python -m database_setup.migrate --check    # EXPLAIN the hot queries
+"""
+
+import argparse
+from meal_app import create_app, db
+from meal_app.migrations import migrate, current_version, check_query_plans, LATEST_VERSION, MigrationError
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate the meals database schema.")
+    parser.add_argument("--to", type=int, default=None, help=f"target version (default: latest, {LATEST_VERSION})")
+    parser.add_argument("--check", action="store_true", help="EXPLAIN the hot queries after migrating")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        try:
+            steps = migrate(db.engine, args.to)
+        except MigrationError as exc:
+            raise SystemExit(f"✘ {exc}")
+        for version, direction in steps:
+            print(f"  {direction:>4} {version}")
+        with db.engine.begin() as conn:
+            print(f"✔ Schema at version {current_version(conn)}.")
+
+        if args.check:
+            missed = 0
+            for result in check_query_plans(db.engine):
+                mark = "✔" if result["used"] else "✘"
+                print(f"{mark} {result['name']}: {result['index']}")
+                if not result["used"]:
+                    missed += 1
+                    for row in result["plan"]:
+                        print(f"      {row}")
+            if missed:
+                raise SystemExit(f"{missed} hot queries don't use their index")
+
+
+if __name__ == "__main__":
+    main()
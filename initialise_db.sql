@@ -1,6 +1,8 @@
--- initialise_db.sql  (3-table version)
+-- initialise_db.sql  (4-table version)
 
--- MealsTable is created by database_setup/import_sample_data.py
+-- MealsTable is created by database_setup/import_sample_data.py.
+-- The versioned schema (indexes, Page_Num) lives in meal_app/migrations.py:
+-- run python -m database_setup.migrate after this file.
 
 -- 1) Ingredients catalogue
 CREATE TABLE IF NOT EXISTS Ingredients (
@@ -14,6 +16,15 @@ CREATE TABLE IF NOT EXISTS Tags (
   Tag_Name VARCHAR(100) NOT NULL UNIQUE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- 3) Distinct ingredients per category with the number of meals using each,
+--    maintained by the app on add/edit (rebuilt by database_setup/backfill_catalog.py)
+CREATE TABLE IF NOT EXISTS IngredientUsage (
+  Category        VARCHAR(32)  NOT NULL,
+  Ingredient_Name VARCHAR(150) NOT NULL,
+  Usage_Count     INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (Category, Ingredient_Name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 -- Seed the four flags as tags (idempotent)
 INSERT IGNORE INTO Tags (Tag_Name)
 VALUES ('Spring/Summer'), ('Autumn/Winter'), ('Quick/Easy'), ('Special');
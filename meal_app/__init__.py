@@ -9,10 +9,61 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object('config.Config')
 
+    # Embedded SQLite instead of MySQL (see meal_app/sqlite_backend.py)
+    if app.config.get('DATABASE_BACKEND') == 'sqlite':
+        from .sqlite_backend import configure_sqlite
+        configure_sqlite(app)
+
     # Initialize Plugins
     db.init_app(app)
 
+    # One pooled connection per request, writes committed once per request
+    from .utilities import commit_request_work, close_request_connection
+    app.after_request(commit_request_work)
+    app.teardown_request(close_request_connection)
+
+    # In-process meal catalog shared by the meal views
+    from .catalog import MealCatalog
+    from .ingredient_index import IngredientIndex
+    from .pantry_matrix import PantryMatrix
+    from .typeahead import MealNameIndex
+    from .recommender import MealRecommender
+    from .plan_generator import PlanGenerator
+    from .shopping_list import ShoppingListEngine
+    from .plan_cache import PlanCache, DEFAULT_BUDGET_BYTES
+    from .plan_store import create_plan_store
+    from .meal_form import MealForm
+    from .meal_history import MealHistoryCounts
+    catalog = app.extensions['meal_catalog'] = MealCatalog()
+
+    # Indexes derived from the catalog, kept current through its listeners
+    app.extensions['ingredient_index'] = IngredientIndex()
+    catalog.add_listener(app.extensions['ingredient_index'])
+    app.extensions['pantry_matrix'] = PantryMatrix()
+    catalog.add_listener(app.extensions['pantry_matrix'])
+    app.extensions['meal_name_index'] = MealNameIndex()
+    catalog.add_listener(app.extensions['meal_name_index'])
+    app.extensions['meal_recommender'] = MealRecommender()
+    catalog.add_listener(app.extensions['meal_recommender'])
+    app.extensions['plan_generator'] = PlanGenerator()
+    catalog.add_listener(app.extensions['plan_generator'])
+    app.extensions['shopping_list_engine'] = ShoppingListEngine()
+    catalog.add_listener(app.extensions['shopping_list_engine'])
+    app.extensions['meal_history_counts'] = MealHistoryCounts()
+    catalog.add_listener(app.extensions['meal_history_counts'])
+    app.extensions['plan_cache'] = PlanCache(app.config.get('PLAN_CACHE_BYTES', DEFAULT_BUDGET_BYTES))
+    app.extensions['plan_store'] = create_plan_store(app.config)
+    app.extensions['meal_form'] = MealForm()
+
+    # Per-request query count/timing, slow-query EXPLAINs and N+1 detection
+    from .query_stats import report_request_queries
+    app.after_request(report_request_queries)
+
     with app.app_context():
+        if app.config.get('DATABASE_BACKEND') == 'sqlite':
+            from .sqlite_backend import bootstrap_schema
+            bootstrap_schema(db.engine)
+
         # Include our Routes
         from .home.home import home
         from .meals.add import add
@@ -21,6 +72,9 @@ def create_app():
         from .meals.find import find
         from .meals.inspire import inspire
         from .meals.search import search
+        from .meals.pantry import pantry
+        from .meals.typeahead import typeahead
+        from .meals.export import export
         from .meal_plans.create import create
         from .meal_plans.display import display
         from .meal_plans.load import load
@@ -34,6 +88,9 @@ def create_app():
         app.register_blueprint(find)
         app.register_blueprint(inspire)
         app.register_blueprint(search)
+        app.register_blueprint(pantry)
+        app.register_blueprint(typeahead)
+        app.register_blueprint(export)
         app.register_blueprint(create)
         app.register_blueprint(display)
         app.register_blueprint(load)
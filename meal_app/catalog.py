@@ -0,0 +1,213 @@
+"""
+In-process catalog of meals.
+
+MealCatalog holds one MealRecord per meal, keyed by name, with the four JSON
+ingredient columns parsed once when the row is loaded. Views read records
+from it instead of running SELECT * and json.loads per request, so a warm
+lookup costs no database round trip and no JSON parsing.
+
+Writes made through the app call get_catalog().invalidate(name, ...) and the
+affected meals are re-read on next access. Derived indexes register with
+add_listener and are told about every (re)load, so they stay in step with the
+catalog without rescanning it. The catalog is per process; other
+writers (database_setup scripts, other app nodes) are picked up by
+invalidate() with no names, which drops everything.
+"""
+import json
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from secrets import token_hex
+from flask import current_app
+from .utilities import execute_mysql_query, call_after_commit
+from .statements import INGREDIENT_COLUMNS
+from .variables import tag_list, tag_list_backend
+
+
+def _loads(value):
+    """Parses a JSON ingredient column, treating NULL/empty as {}."""
+    if value in (None, "", "null"):
+        return {}
+    if isinstance(value, dict):
+        return value
+    return json.loads(value)
+
+
+@dataclass(frozen=True)
+class MealRecord:
+    """One row of MealsTable with its ingredient columns already parsed."""
+    meal_id: int
+    name: str
+    staple: str
+    book: str
+    page: str
+    website: str
+    last_made: object
+    ingredients: dict = field(repr=False)
+    tag_flags: tuple = ()
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            meal_id=row.get('Meal_ID'),
+            name=row['Name'],
+            staple=row.get('Staple'),
+            book=row.get('Book'),
+            page=row.get('Page'),
+            website=row.get('Website'),
+            last_made=row.get('Last_Made'),
+            ingredients={column: _loads(row.get(column)) for column in INGREDIENT_COLUMNS},
+            tag_flags=tuple(int(row.get(tag) or 0) for tag in tag_list_backend),
+        )
+
+    @property
+    def fresh_ingredients(self):
+        return self.ingredients['Fresh_Ingredients']
+
+    @property
+    def tinned_ingredients(self):
+        return self.ingredients['Tinned_Ingredients']
+
+    @property
+    def dry_ingredients(self):
+        return self.ingredients['Dry_Ingredients']
+
+    @property
+    def dairy_ingredients(self):
+        return self.ingredients['Dairy_Ingredients']
+
+    def ingredient_lists(self, column):
+        """Returns [names, quantities] for one ingredient column, as the templates expect."""
+        ingredients = self.ingredients[column]
+        return [list(ingredients.keys()), list(ingredients.values())]
+
+    def location_details(self):
+        """Book and page, or the website if the meal has one."""
+        if self.website is None or self.website == '':
+            return {'Book': self.book, 'Page': self.page}
+        return {'Website': self.website}
+
+    def tag_names(self):
+        """Display names of the tags set on this meal."""
+        return [tag for tag, flag in zip(tag_list, self.tag_flags) if flag == 1]
+
+
+class MealCatalog:
+    """Meal records keyed by name, loaded lazily and refreshed on invalidate."""
+
+    def __init__(self):
+        self._records = None
+        self._names = None
+        self._stale = set()
+        self._lock = threading.Lock()
+        self._listeners = []
+        # Version stamp: bumped by every invalidate, so ETags change with the data.
+        # The per-process token keeps stamps from repeating across restarts.
+        self._token = token_hex(4)
+        self.version = 0
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def _load_all(self):
+        records = {}
+        for row in execute_mysql_query("SELECT * FROM MealsTable ORDER BY Name;", fetch="iter"):
+            records[row['Name']] = MealRecord.from_row(row)
+        self._records = records
+        self._names = None
+        self._stale.clear()
+        for listener in self._listeners:
+            listener.rebuild(list(records.values()))
+
+    def _reload_stale(self):
+        stale = list(self._stale)
+        placeholders = ", ".join([f":n{i}" for i in range(len(stale))])
+        params = {f"n{i}": name for i, name in enumerate(stale)}
+        rows = execute_mysql_query(
+            f"SELECT * FROM MealsTable WHERE Name IN ({placeholders});", params, fetch="all") or []
+        records = dict(self._records)
+        removed = [records.pop(name) for name in stale if name in records]
+        added = [MealRecord.from_row(row) for row in rows]
+        for record in added:
+            records[record.name] = record
+        self._records = records
+        self._names = None
+        self._stale.clear()
+        # pair old and new versions of each meal by id (a rename changes the key)
+        old_by_id = {record.meal_id: record for record in removed}
+        for record in added:
+            old = old_by_id.pop(record.meal_id, None)
+            for listener in self._listeners:
+                listener.update(old, record)
+        for old in old_by_id.values():
+            for listener in self._listeners:
+                listener.update(old, None)
+
+    def _fresh_records(self):
+        records = self._records
+        if records is not None and not self._stale:
+            return records
+        with self._lock:
+            if self._records is None:
+                self._load_all()
+            elif self._stale:
+                self._reload_stale()
+            return self._records
+
+    def refresh(self):
+        """Loads the catalog, or re-reads invalidated meals, if needed."""
+        self._fresh_records()
+
+    def add_listener(self, listener):
+        """
+        Registers a derived index. listener.rebuild(records) is called after a
+        full load and listener.update(old, new) for each meal re-read after an
+        invalidate (old is None for a new meal, new is None for a removed one).
+        """
+        with self._lock:
+            self._listeners.append(listener)
+            if self._records is not None:
+                listener.rebuild(list(self._records.values()))
+
+    def get(self, name):
+        """Returns the MealRecord for name, or None if there is no such meal."""
+        return self._fresh_records().get(name)
+
+    def names(self):
+        """All meal names, sorted."""
+        records = self._fresh_records()
+        names = self._names
+        if names is None:
+            names = self._names = sorted(records)
+        return names
+
+    def records(self):
+        """All MealRecords, in name order."""
+        records = self._fresh_records()
+        return [records[name] for name in self.names()]
+
+    def invalidate(self, *names):
+        """
+        Marks meals as changed so they are re-read on next access, once the
+        current request's writes are committed. With no names the whole
+        catalog is dropped and reloaded.
+        """
+        call_after_commit(self._invalidate, names)
+
+    def etag(self):
+        """Entity tag for pages built from the catalog at its current version."""
+        return f"catalog-{self._token}-{self.version}"
+
+    def _invalidate(self, names):
+        with self._lock:
+            self.version += 1
+            self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+            if not names or self._records is None:
+                self._records = None
+                self._names = None
+                self._stale.clear()
+            else:
+                self._stale.update(names)
+
+
+def get_catalog():
+    """Returns the current app's MealCatalog (created in create_app)."""
+    return current_app.extensions['meal_catalog']
@@ -0,0 +1,37 @@
+"""
+Conditional GET support for pages built only from the meal catalog.
+
+catalog_conditional wraps a view so that GET/HEAD responses carry an ETag
+and Last-Modified derived from the MealCatalog version stamp, which every
+add/edit/Last_Made write bumps. A request whose If-None-Match matches the
+current stamp is answered 304 before the view runs, so no SQL is executed
+and no template is rendered.
+"""
+from functools import wraps
+from flask import current_app, make_response, request
+from .catalog import get_catalog
+
+
+def catalog_conditional(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return view(*args, **kwargs)
+
+        catalog = get_catalog()
+        etag = catalog.etag()
+        last_modified = catalog.last_modified
+
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        # caches must revalidate, which is exactly the cheap 304 above
+        response.cache_control.no_cache = True
+        return response
+    return wrapper
@@ -0,0 +1,102 @@
+"""
+Per-category catalog of distinct ingredients with usage counts.
+
+IngredientUsage holds one row per (Category, Ingredient_Name) with the
+number of meals using it. add/edit apply the difference between a meal's
+old and new ingredients in one multi-row upsert, inside the same request
+transaction as the meal write, and rows that drop to zero are removed. The
+/search dropdowns read this small table, so their cost depends on the number
+of distinct ingredients rather than the number of meals.
+"""
+import json
+from .utilities import execute_mysql_query, execute_named_query, compile_statement
+from .statements import INGREDIENT_COLUMNS
+
+
+def _ingredient_keys(ingredients):
+    """Returns the {(category, ingredient)} set for a meal's ingredient columns."""
+    keys = set()
+    for column in INGREDIENT_COLUMNS:
+        value = (ingredients or {}).get(column)
+        if isinstance(value, str):
+            value = json.loads(value) if value not in ("", "null") else {}
+        for ingredient in value or {}:
+            keys.add((column, ingredient))
+    return keys
+
+
+def _apply_deltas(deltas):
+    """Adds each delta to its IngredientUsage row in one statement, then prunes empty rows."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    values = []
+    params = {}
+    for i, ((category, ingredient), delta) in enumerate(sorted(deltas.items())):
+        values.append(f"(:c{i}, :n{i}, :d{i})")
+        params.update({f"c{i}": category, f"n{i}": ingredient, f"d{i}": delta})
+    query_string = f"""
+    INSERT INTO IngredientUsage (Category, Ingredient_Name, Usage_Count)
+    VALUES {", ".join(values)}
+    ON DUPLICATE KEY UPDATE Usage_Count = Usage_Count + VALUES(Usage_Count);
+    """
+    execute_mysql_query(query_string, params, fetch="none")
+    if any(delta < 0 for delta in deltas.values()):
+        execute_named_query("prune_ingredient_usage", fetch="none")
+
+
+def record_ingredient_changes(old_ingredients, new_ingredients):
+    """
+    Updates usage counts for one meal write.
+
+    Parameters
+    ----------
+    old_ingredients : dict or None
+        the meal's ingredient columns before the write (None for a new meal),
+        as parsed dicts or JSON strings
+    new_ingredients : dict or None
+        the ingredient columns written (None for a deleted meal)
+
+    Returns
+    -------
+    None
+    """
+    old_keys = _ingredient_keys(old_ingredients)
+    new_keys = _ingredient_keys(new_ingredients)
+    deltas = {key: 1 for key in new_keys - old_keys}
+    deltas.update({key: -1 for key in old_keys - new_keys})
+    _apply_deltas(deltas)
+
+
+def ingredient_dropdowns():
+    """Returns {column: sorted distinct ingredient names} for every ingredient column."""
+    dropdowns = {column: [] for column in INGREDIENT_COLUMNS}
+    for row in execute_named_query("ingredient_usage", fetch="all") or []:
+        if row['Category'] in dropdowns:
+            dropdowns[row['Category']].append(row['Ingredient_Name'])
+    return dropdowns
+
+
+def rebuild_ingredient_usage(conn):
+    """
+    Recomputes IngredientUsage from MealsTable (for database_setup scripts).
+    Streams the meals and rewrites the table on conn in one transaction.
+    """
+    counts = {}
+    rows = execute_mysql_query(
+        "SELECT Fresh_Ingredients, Tinned_Ingredients, Dry_Ingredients, Dairy_Ingredients FROM MealsTable",
+        fetch="iter",
+    )
+    for row in rows:
+        for key in _ingredient_keys(row):
+            counts[key] = counts.get(key, 0) + 1
+
+    conn.execute(compile_statement("DELETE FROM IngredientUsage", conn.dialect.name))
+    if counts:
+        conn.execute(
+            compile_statement(
+                "INSERT INTO IngredientUsage (Category, Ingredient_Name, Usage_Count) VALUES (:c, :n, :u)",
+                conn.dialect.name),
+            [{"c": category, "n": ingredient, "u": count} for (category, ingredient), count in sorted(counts.items())],
+        )
+    return len(counts)
@@ -0,0 +1,119 @@
+"""
+Inverted ingredient index for /search.
+
+IngredientIndex maps every ingredient to the set of meals that use it, held
+as a bitset (a Python int with bit n set for Meal_ID n). Postings are kept
+per ingredient column and across all columns, so AND/OR/NOT queries over
+several ingredients and categories are a handful of integer operations
+instead of a JSON_EXTRACT scan of MealsTable.
+
+The index listens to the MealCatalog: it is built when the catalog loads and
+patched meal by meal when add/edit invalidate it.
+"""
+import threading
+from flask import current_app
+from .catalog import get_catalog
+from .statements import INGREDIENT_COLUMNS
+
+# Key used for postings that ignore the ingredient column
+ANY_COLUMN = None
+
+
+def _bits(bitset):
+    """Yields the positions of the set bits of bitset, lowest first."""
+    while bitset:
+        lowest = bitset & -bitset
+        yield lowest.bit_length() - 1
+        bitset ^= lowest
+
+
+class IngredientIndex:
+    """Ingredient → meal-id bitset postings, maintained from the catalog."""
+
+    def __init__(self):
+        self._postings = {}
+        self._names = {}
+        self._universe = 0
+        self._lock = threading.Lock()
+
+    def _keys(self, record):
+        for column in INGREDIENT_COLUMNS:
+            for ingredient in record.ingredients[column]:
+                yield (column, ingredient)
+                yield (ANY_COLUMN, ingredient)
+
+    def _add(self, record):
+        bit = 1 << record.meal_id
+        for key in self._keys(record):
+            self._postings[key] = self._postings.get(key, 0) | bit
+        self._names[record.meal_id] = record.name
+        self._universe |= bit
+
+    def _remove(self, record):
+        mask = ~(1 << record.meal_id)
+        for key in self._keys(record):
+            remaining = self._postings.get(key, 0) & mask
+            if remaining:
+                self._postings[key] = remaining
+            else:
+                self._postings.pop(key, None)
+        self._names.pop(record.meal_id, None)
+        self._universe &= mask
+
+    def rebuild(self, records):
+        """Catalog listener: index every record from scratch."""
+        fresh = IngredientIndex()
+        for record in records:
+            fresh._add(record)
+        with self._lock:
+            # swap in whole so concurrent searches never see a half-built index
+            self._postings, self._names, self._universe = fresh._postings, fresh._names, fresh._universe
+
+    def update(self, old, new):
+        """Catalog listener: swap one meal's old postings for its new ones."""
+        with self._lock:
+            if old is not None:
+                self._remove(old)
+            if new is not None:
+                self._add(new)
+
+    def posting(self, ingredient, column=ANY_COLUMN):
+        """Bitset of meals using ingredient (in column, or in any column)."""
+        return self._postings.get((column, ingredient), 0)
+
+    def search(self, all_of=(), any_of=(), none_of=()):
+        """
+        Finds meals by ingredient.
+
+        Parameters
+        ----------
+        all_of : iterable of (column, ingredient)
+            meals must contain every one of these
+        any_of : iterable of (column, ingredient)
+            meals must contain at least one of these (ignored if empty)
+        none_of : iterable of (column, ingredient)
+            meals must contain none of these
+        column may be ANY_COLUMN to match the ingredient in any category.
+
+        Returns
+        -------
+        list of meal names, sorted
+        """
+        result = self._universe
+        for column, ingredient in all_of:
+            result &= self.posting(ingredient, column)
+        if any_of:
+            matches = 0
+            for column, ingredient in any_of:
+                matches |= self.posting(ingredient, column)
+            result &= matches
+        for column, ingredient in none_of:
+            result &= ~self.posting(ingredient, column)
+        names = self._names
+        return sorted(names[meal_id] for meal_id in _bits(result))
+
+
+def get_ingredient_index():
+    """Returns the app's IngredientIndex, brought up to date with the catalog."""
+    get_catalog().refresh()
+    return current_app.extensions['ingredient_index']
@@ -0,0 +1,129 @@
+"""
+The add/edit meal form, built once and filled in per request.
+
+Everything on the form except the meal's own values comes from variables.py
+and never changes while the app runs: the staple and book choices, ~90
+ingredient rows with their units, the tags. MealForm splits those lists into
+MealFormOptions once at start-up, renders meal_form.html from them once per
+heading with a marker where each per-meal value goes (a name or quantity, a
+selected option, a checked tag) and keeps the static HTML between the markers.
+A request then only escapes the meal's values and joins them with the
+fragments; the empty add form is a single cached string.
+"""
+import threading
+from collections import namedtuple
+from flask import current_app, render_template, request
+from markupsafe import Markup, escape
+from .statements import INGREDIENT_COLUMNS
+from .variables import (staples_list, book_list, fresh_ingredients, tinned_ingredients, dry_ingredients,
+                        dairy_ingredients, tag_list)
+
+# Form fields for one ingredient column: "Fresh Asparagus" etc. with units
+IngredientGroup = namedtuple("IngredientGroup", "column prefix heading names units")
+
+MealFormOptions = namedtuple("MealFormOptions", "staples books ingredient_groups tags")
+
+# Rendered where a per-meal value goes; never produced by the options themselves
+SLOT = Markup("\x00")
+
+
+def build_form_options():
+    """Splits the variables.py lists into the structures the form template loops over."""
+    groups = []
+    for column, ingredients in zip(INGREDIENT_COLUMNS,
+                                   (fresh_ingredients, tinned_ingredients, dry_ingredients, dairy_ingredients)):
+        prefix = column.split("_")[0]
+        groups.append(IngredientGroup(column, prefix, f"{prefix} Ingredients",
+                                      tuple(ingredient[0] for ingredient in ingredients),
+                                      tuple(ingredient[1] for ingredient in ingredients)))
+    return MealFormOptions(tuple(staples_list), tuple(book_list), tuple(groups), tuple(tag_list))
+
+
+def _value(value):
+    return f' value="{escape(value)}"' if value not in (None, "") else ""
+
+
+class MealForm:
+    """Cached static fragments of the meal form and the per-meal values between them."""
+
+    def __init__(self):
+        self.options = build_form_options()
+        # Slot number of each per-meal value, in template order
+        options = self.options
+        slots = ["Name"]
+        slots += [("Staple", staple) for staple in options.staples]
+        slots += [("Book", book) for book in options.books]
+        slots += ["Page", "Website"]
+        for group in options.ingredient_groups:
+            slots += [(group.column, name) for name in group.names]
+        slots += [("Tag", i) for i in range(len(options.tags))]
+        self._slots = {slot: number for number, slot in enumerate(slots)}
+        self._slot_count = len(slots)
+        self._fragments = {}
+        self._empty = {}
+        self._lock = threading.Lock()
+
+    def _slot_values(self, record):
+        """The per-meal HTML for each slot, in template order; most stay empty."""
+        slots = self._slots
+        values = [""] * self._slot_count
+        values[slots["Name"]] = _value(record.name)
+        values[slots["Page"]] = _value(record.page)
+        values[slots["Website"]] = _value(record.website)
+        for column in ("Staple", "Book"):
+            number = slots.get((column, getattr(record, column.lower())))
+            if number is not None:
+                values[number] = " selected"
+        for group in self.options.ingredient_groups:
+            for name, quantity in (record.ingredients.get(group.column) or {}).items():
+                number = slots.get((group.column, name))
+                if number is not None:
+                    values[number] = _value(quantity)
+        for i, flag in enumerate(record.tag_flags):
+            number = slots.get(("Tag", i))
+            if number is not None and flag == 1:
+                values[number] = " checked"
+        return values
+
+    def _static_parts(self, heading):
+        # url_for in the page depends on where the app is mounted
+        key = (heading, request.script_root)
+        fragments = self._fragments.get(key)
+        if fragments is None:
+            html = render_template('meal_form.html', heading=heading, options=self.options, slot=SLOT)
+            fragments = str(html).split(str(SLOT))
+            if len(fragments) != self._slot_count + 1:
+                raise RuntimeError("meal_form.html slots don't match MealForm._slots")
+            with self._lock:
+                self._fragments[key] = fragments
+        return fragments
+
+    def render(self, heading, record=None):
+        """
+        The full form page.
+
+        Parameters
+        ----------
+        heading : str
+            "Add Meal" or "Edit Meal"
+        record : catalog.MealRecord or None
+            the meal whose values fill the form (None for an empty form)
+        """
+        if record is None:
+            key = (heading, request.script_root)
+            page = self._empty.get(key)
+            if page is None:
+                page = self._empty[key] = Markup("".join(self._static_parts(heading)))
+            return page
+        fragments = self._static_parts(heading)
+        parts = [fragments[0]]
+        for value, fragment in zip(self._slot_values(record), fragments[1:]):
+            parts.append(value)
+            parts.append(fragment)
+        # fragments come from the autoescaped template and values are escaped above
+        return Markup("".join(parts))
+
+
+def get_meal_form():
+    """Returns the app's MealForm."""
+    return current_app.extensions['meal_form']
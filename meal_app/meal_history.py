@@ -0,0 +1,105 @@
+"""
+When each meal was made, kept in the MealHistory table (migration 5).
+
+"Update Dates" used to overwrite MealsTable.Last_Made one meal at a time, so
+all but the latest date was lost. Now every make is a MealHistory row
+(Meal_ID, Made_On), unique on ix_meal_history_meal_made, and a plan is
+recorded with two set-based statements whatever its size:
+
+- one INSERT ... SELECT adds a row per meal (a second click on the same day
+  adds nothing)
+- one UPDATE keeps Last_Made as the denormalised latest Made_On, so lists and
+  the recommender still read it straight from MealsTable
+
+Counts such as "times made in the last 90 days" are range reads of the
+(Meal_ID, Made_On) index. /find shows that count through MealHistoryCounts,
+which keeps each meal's count for the rest of the day once it has been read
+and listens to the MealCatalog: recording a make invalidates the meal in the
+catalog, which drops its count, so a warm /find runs no SQL.
+"""
+import threading
+from datetime import date, timedelta
+from flask import current_app
+from .catalog import get_catalog
+from .utilities import execute_mysql_query, execute_named_query
+
+# Window for times_made()
+HISTORY_DAYS = 90
+
+
+def record_meals_made(names, made_on=None):
+    """
+    Records that the named meals were made on made_on (default today) and
+    moves their Last_Made forward to it. Unknown names are ignored.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return
+    made_on = (made_on or date.today()).isoformat()
+    placeholders = ", ".join(f":n{i}" for i in range(len(names)))
+    params = {f"n{i}": name for i, name in enumerate(names)}
+    params["made_on"] = made_on
+    execute_mysql_query(f"""
+        INSERT IGNORE INTO MealHistory (Meal_ID, Made_On)
+        SELECT Meal_ID, :made_on FROM MealsTable WHERE Name IN ({placeholders})
+        """, params, fetch="none")
+    execute_mysql_query(f"""
+        UPDATE MealsTable SET Last_Made = :made_on
+        WHERE Name IN ({placeholders}) AND (Last_Made IS NULL OR Last_Made < :made_on)
+        """, params, fetch="none")
+    get_catalog().invalidate(*names)
+
+
+def times_made(meal_id, days=HISTORY_DAYS, today=None):
+    """How many times a meal was made in the last `days` days."""
+    since = (today or date.today()) - timedelta(days=days)
+    row = execute_named_query("meal_times_made", {"meal_id": meal_id, "since": since.isoformat()}, fetch="one")
+    return row['Times'] if row else 0
+
+
+class MealHistoryCounts:
+    """times_made() per meal for today, cached until the catalog re-reads the meal."""
+
+    def __init__(self, days=HISTORY_DAYS):
+        self.days = days
+        self._lock = threading.Lock()
+        self._day = None
+        self._counts = {}
+        # bumped by every drop, so a count read before a write isn't cached after it
+        self._generation = 0
+
+    def rebuild(self, records):
+        """Catalog listener: everything was reloaded (possibly by another writer)."""
+        with self._lock:
+            self._counts = {}
+            self._generation += 1
+
+    def update(self, old, new):
+        """Catalog listener: one meal was re-read."""
+        with self._lock:
+            for record in (old, new):
+                if record is not None:
+                    self._counts.pop(record.meal_id, None)
+            self._generation += 1
+
+    def times_made(self, meal_id, today=None):
+        """How many times a meal was made in the last `days` days."""
+        today = today or date.today()
+        with self._lock:
+            if self._day != today:
+                self._day, self._counts = today, {}
+            count = self._counts.get(meal_id)
+            generation = self._generation
+        if count is not None:
+            return count
+        count = times_made(meal_id, self.days, today)
+        with self._lock:
+            if self._day == today and self._generation == generation:
+                self._counts[meal_id] = count
+        return count
+
+
+def get_meal_history_counts():
+    """Returns the app's MealHistoryCounts, brought up to date with the catalog."""
+    get_catalog().refresh()
+    return current_app.extensions['meal_history_counts']
@@ -1,131 +1,72 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session
-import json
-from ..utilities import execute_mysql_query
-from ..variables import extras
+from flask import Blueprint, render_template, request, redirect, url_for
+import re
+from ..utilities import execute_named_query
+from ..conditional import catalog_conditional
+from ..plan_generator import get_plan_generator
+from ..shopping_list import get_shopping_list_engine
+from ..plan_cache import get_plan_cache, plan_key
+from ..plan_store import stash, PLAN_ID
+from ..variables import extras, tag_list, tag_list_backend
 
 create = Blueprint('create', __name__, template_folder='templates', static_folder='../static')
 
+# Meals in an auto-generated plan unless the form asks for another number
+DEFAULT_PLAN_SIZE = 7
+MAX_PLAN_SIZE = 50
 
-def get_meal_info(meal_list, quantity_list) -> list[dict]:
-    """
-    Fetch JSON ingredients for each meal and attach its requested quantity.
-    Returns a list of dicts like:
-    {
-      'Fresh_Ingredients': {...} | {},
-      'Tinned_Ingredients': {...} | {},
-      'Dry_Ingredients': {...} | {},
-      'Dairy_Ingredients': {...} | {},
-      'quantity': N
-    }
+
+def store_meal_plan(meal_list, quantity_list, extras_selected):
     """
-    results = []
-    q = """
-      SELECT Fresh_Ingredients, Tinned_Ingredients, Dry_Ingredients, Dairy_Ingredients
-      FROM MealsTable
-      WHERE Name = :name
+    Collates the plan's ingredients into the plan store for /display. The
+    vectorised engine gives the same totals as the old query-per-meal
+    collation without a query per meal, and the result is memoised on the
+    plan in the order submitted.
     """
-    for idx, meal in enumerate(meal_list):
-        row = execute_mysql_query(q, {"name": meal}, fetch="one")
-        if not row:
-            # Skip unknown meal names gracefully
-            continue
-
-        # Safely parse JSON (handle NULLs)
-        def _loads(v):
-            if v in (None, "", "null"):
-                return {}
-            return json.loads(v)
-
-        parsed = {
-            "Fresh_Ingredients": _loads(row.get("Fresh_Ingredients")),
-            "Tinned_Ingredients": _loads(row.get("Tinned_Ingredients")),
-            "Dry_Ingredients": _loads(row.get("Dry_Ingredients")),
-            "Dairy_Ingredients": _loads(row.get("Dairy_Ingredients")),
-            "quantity": quantity_list[idx],
-        }
-        results.append(parsed)
-    return results
-
-
-def quantity_adjustment(meal_list_dict) -> list[dict]:
-    """Multiply each ingredient quantity by the meal's selected quantity."""
-    def _scale(dct, factor):
-        if not isinstance(dct, dict):
-            return {}
-        for k, v in list(dct.items()):
-            try:
-                dct[k] = float(v) * float(factor)
-            except (TypeError, ValueError):
-                # If a value is non-numeric, drop it to avoid crashes
-                dct.pop(k, None)
-        return dct
-
-    for meal in meal_list_dict:
-        qty = meal.get("quantity", 1) or 1
-        meal["Fresh_Ingredients"] = _scale(meal.get("Fresh_Ingredients", {}), qty)
-        meal["Tinned_Ingredients"] = _scale(meal.get("Tinned_Ingredients", {}), qty)
-        meal["Dry_Ingredients"] = _scale(meal.get("Dry_Ingredients", {}), qty)
-        meal["Dairy_Ingredients"] = _scale(meal.get("Dairy_Ingredients", {}), qty)
-        meal.pop("quantity", None)
-    return meal_list_dict
-
-
-def build_ingredient_dictionary(meal_ingredient_dict, complete_ingredient_dict, ingredient_type) -> dict:
+    plan = plan_key(meal_list, quantity_list)
+    collated = get_plan_cache().get_or_compute(
+        "ingredients", plan,
+        lambda: get_shopping_list_engine().collate([meal for meal, _ in plan], [quantity for _, quantity in plan]))
+    # the cached dicts are shared; the stored plan gets its own copy
+    complete_ingredient_dict = {column: dict(totals) for column, totals in collated.items()}
+
+    complete_ingredient_dict['Extra_Ingredients'] = extras_selected
+    complete_ingredient_dict['Meal_List'] = meal_list
+
+    stash(PLAN_ID, complete_ingredient_dict)
+
+
+def _form_int(details, key):
+    """An optional positive int from the form, or None."""
+    try:
+        value = int(details.get(key) or 0)
+    except ValueError:
+        return None
+    return value if value > 0 else None
+
+
+def auto_generate(details):
     """
-    Add quantities for a single ingredient type (e.g., 'Fresh_Ingredients')
-    into the combined totals dict.
+    Builds a plan from the auto-generate form: Count (at most MAX_PLAN_SIZE),
+    Require / Exclude (tag display names), Per Staple and Not Made Days.
+    Returns the meal names.
     """
-    for ingredient, val in meal_ingredient_dict.items():
-        try:
-            val = float(val)
-        except (TypeError, ValueError):
-            continue
-
-        bucket = complete_ingredient_dict[ingredient_type]
-        bucket[ingredient] = bucket.get(ingredient, 0) + val
-
-        # Normalize numbers (e.g., 2.0 -> 2)
-        bucket[ingredient] = round(bucket[ingredient], 2)
-        if float(bucket[ingredient]).is_integer():
-            bucket[ingredient] = int(bucket[ingredient])
-    return complete_ingredient_dict
-
-
-def collate_ingredients(meal_info_list) -> dict:
-    """Combine all meals' ingredients into one deduped dictionary."""
-    if not meal_info_list:
-        return {
-            "Fresh_Ingredients": {},
-            "Tinned_Ingredients": {},
-            "Dry_Ingredients": {},
-            "Dairy_Ingredients": {},
-        }
-
-    # Ensure all expected keys exist
-    complete_ingredient_dict = {
-        "Fresh_Ingredients": {},
-        "Tinned_Ingredients": {},
-        "Dry_Ingredients": {},
-        "Dairy_Ingredients": {},
-    }
-
-    for meal in meal_info_list:
-        for ingredient_type in complete_ingredient_dict.keys():
-            dct = meal.get(ingredient_type) or {}
-            if dct:
-                build_ingredient_dictionary(dct, complete_ingredient_dict, ingredient_type)
-
-    return complete_ingredient_dict
-
-@create.route('/create', methods=['GET', 'POST'])
-def create_meal_plan():
+    to_column = lambda tag: tag.replace('/', '_')
+    required = [to_column(tag) for tag in details.getlist('Require') if to_column(tag) in tag_list_backend]
+    excluded = [to_column(tag) for tag in details.getlist('Exclude') if to_column(tag) in tag_list_backend]
+    meal_list, _ = get_plan_generator().generate(
+        count=min(_form_int(details, 'Count') or DEFAULT_PLAN_SIZE, MAX_PLAN_SIZE),
+        required_tags=required,
+        excluded_tags=excluded,
+        max_per_staple=_form_int(details, 'Per Staple'),
+        not_made_days=_form_int(details, 'Not Made Days'),
+    )
+    return meal_list
+
+
+def render_create_page(message=None):
+    """The plan form, with a dropdown of meals per staple."""
     # Pull meals grouped by staple (no schema prefix; use current DB)
-    query_string = """
-      SELECT GROUP_CONCAT(Name ORDER BY Name ASC) AS Meals, Staple
-      FROM MealsTable
-      GROUP BY Staple;
-    """
-    results = execute_mysql_query(query_string, fetch="all") or []
+    results = execute_named_query("meals_grouped_by_staple", fetch="all") or []
 
     # Build dict: {staple: [meal names...]}
     staples_dict = {}
@@ -134,12 +75,25 @@ def create_meal_plan():
         meals_csv = item.get('Meals') or ''
         meals_list = [m for m in meals_csv.split(',') if m] if meals_csv else []
         staples_dict[staple] = meals_list
+    return render_template('create.html', staples_dict=staples_dict, extras=extras, tags=tag_list, message=message,
+                           default_count=DEFAULT_PLAN_SIZE, max_count=MAX_PLAN_SIZE)
+
+
+@create.route('/create', methods=['GET', 'POST'])
+@catalog_conditional
+def create_meal_plan():
+
+    if request.method == "POST" and request.form.get('submit') == 'Auto-generate':
+        meal_list = auto_generate(request.form)
+        if not meal_list:
+            return render_create_page(message="No meals match those constraints.")
+        store_meal_plan(meal_list, [1] * len(meal_list), [])
+        return redirect(url_for('display.display_meal_plan'))
 
     if request.method == "POST":
         details = request.form.to_dict()
 
         # Helper: extract a sortable index from a key (e.g., "Meal 2", "Meal_10", "Quantity3")
-        import re
         def key_index(k: str) -> tuple:
             # find first number in key; if none, return a big index so it sorts last
             m = re.search(r'(\d+)', k)
@@ -167,12 +121,7 @@ def create_meal_plan():
 
         # If nothing selected, just re-render the page (no redirect loop)
         if not meal_list:
-            return render_template('create.html', staples_dict=staples_dict, extras=extras)
-
-        # Build the final ingredient set
-        meal_info = get_meal_info(meal_list, quantity_list)
-        adjusted  = quantity_adjustment(meal_info)
-        complete_ingredient_dict = collate_ingredients(adjusted)
+            return render_create_page()
 
         # Extras selected by user (checkboxes like Extra 1 / Extra_1, etc.)
         extras_selected = []
@@ -180,10 +129,8 @@ def create_meal_plan():
             if 'extra' in k.lower() and v and v.strip().lower() != 'null':
                 extras_selected.append(v.strip())
 
-        complete_ingredient_dict['Extra_Ingredients'] = extras_selected
-        complete_ingredient_dict['Meal_List'] = meal_list
-
-        session['complete_ingredient_dict'] = complete_ingredient_dict
+        # Build the final ingredient set
+        store_meal_plan(meal_list, quantity_list, extras_selected)
         return redirect(url_for('display.display_meal_plan'))
 
-    return render_template('create.html', staples_dict=staples_dict, extras=extras)
+    return render_create_page()
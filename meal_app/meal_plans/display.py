@@ -1,22 +1,19 @@
-from flask import Blueprint, redirect, url_for, render_template, request, session
-import os
-import json
+from flask import Blueprint, redirect, url_for, render_template, request
 from datetime import datetime
-from ..utilities import execute_mysql_query
+from ..catalog import get_catalog
+from ..meal_history import record_meals_made
+from ..plan_cache import get_plan_cache
+from ..plan_store import unstash, PLAN_ID
+from ..plan_repository import save_plan, PLAN_NAME_FORMAT
 
 display = Blueprint('display', __name__, template_folder='templates', static_folder='../static')
 
 
 def save_meal_plan(complete_ingredient_dict):
-    """Saves created meal plan to the local saved_meal_plans directory."""
-    if not os.path.exists('saved_meal_plans'):
-        os.makedirs('saved_meal_plans')
-    dt_string = datetime.now().strftime("%Y-%m-%d %H:%M")
-    json_file = json.dumps(complete_ingredient_dict, indent=4)
-    with open(f"saved_meal_plans/{dt_string}.json", "w", encoding="utf-8") as f:
-        f.write(json_file)
-    file_path = str(os.getcwd()) + f"/saved_meal_plans/{dt_string}.json"
-    return file_path
+    """Saves created meal plan to the SavedPlans table; returns (plan id, name)."""
+    saved_at = datetime.now()
+    plan_id = save_plan(complete_ingredient_dict, created_at=saved_at)
+    return plan_id, saved_at.strftime(PLAN_NAME_FORMAT)
 
 
 def create_meal_info_table(rows):
@@ -33,6 +30,17 @@ def create_meal_info_table(rows):
     return meal_info_list
 
 
+def plan_meal_info(meal_names):
+    """Book/Page/Website rows for the plan's meals, from the catalog (unknown names are skipped)."""
+    catalog = get_catalog()
+    rows = []
+    for name in meal_names:
+        record = catalog.get(name)
+        if record is not None:
+            rows.append({'Name': record.name, 'Book': record.book, 'Page': record.page, 'Website': record.website})
+    return create_meal_info_table(rows)
+
+
 def append_ingredient_units(fresh_ingredients, tinned_ingredients, dry_ingredients, dairy_ingredients):
     """Appends unit suffixes to ingredient quantities where appropriate."""
     from ..variables import gram_list
@@ -75,28 +83,19 @@ def append_ingredient_units(fresh_ingredients, tinned_ingredients, dry_ingredien
 @display.route('/display', methods=['GET', 'POST'])
 def display_meal_plan():
     if request.method == "GET":
-        # Pull data from session
-        complete_ingredient_dict = session.pop('complete_ingredient_dict', None)
+        # Pull the plan whose id the session holds
+        complete_ingredient_dict = unstash(PLAN_ID)
         if not complete_ingredient_dict:
             return redirect(url_for('create.create_meal_plan'))
-        session['complete_ingredient_dict'] = complete_ingredient_dict
 
         meal_list = complete_ingredient_dict.get('Meal_List', []) or []
         if not meal_list:
             # No meals selected -> go back to Create page
             return redirect(url_for('create.create_meal_plan'))
 
-        # Build a safe parameterized IN clause ( :n0, :n1, ... )
-        placeholders = ", ".join([f":n{i}" for i in range(len(meal_list))])
-        params = {f"n{i}": name for i, name in enumerate(meal_list)}
-
-        query_string = f"""
-            SELECT Name, Book, Page, Website
-            FROM MealsTable
-            WHERE Name IN ({placeholders});
-        """
-        results = execute_mysql_query(query_string, params, fetch="all") or []
-        info_meal_list = create_meal_info_table(results)
+        # Where to find each recipe, memoised per set of meals
+        names = tuple(sorted(set(meal_list)))
+        info_meal_list = get_plan_cache().get_or_compute("meal_info", names, lambda: plan_meal_info(names))
 
         # Prepare ingredient lists for rendering
         fresh_ingredients = [
@@ -140,27 +139,18 @@ def display_meal_plan():
         )
 
     # POST
-    complete_ingredient_dict = session.pop('complete_ingredient_dict', None)
+    complete_ingredient_dict = unstash(PLAN_ID)
     if not complete_ingredient_dict:
         return redirect(url_for('create.create_meal_plan'))
-    session['complete_ingredient_dict'] = complete_ingredient_dict
 
     submit_val = request.form.get('submit', '')
     if submit_val == 'Save':
-        file_path = save_meal_plan(complete_ingredient_dict)
-        return render_template('save_complete.html', file_path=file_path)
+        plan_id, plan_name = save_meal_plan(complete_ingredient_dict)
+        return render_template('save_complete.html', plan_id=plan_id, plan_name=plan_name)
 
     if submit_val == 'Update Dates':
-        # Windows-safe date format (no %-m)
-        date_now = datetime.now().strftime("%Y-%m-%d")
-        meals = complete_ingredient_dict.get('Meal_List', [])
-        if meals:
-            for name in meals:
-                execute_mysql_query(
-                    "UPDATE MealsTable SET Last_Made = :dt WHERE Name = :name",
-                    {"dt": date_now, "name": name},
-                    fetch="none",
-                )
+        # One history row per meal and one Last_Made update for the whole plan
+        record_meals_made(complete_ingredient_dict.get('Meal_List', []))
         return redirect(url_for('display.display_meal_plan'))
 
     # Fallback: go back if unknown submit action
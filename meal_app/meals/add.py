@@ -1,7 +1,8 @@
 from flask import Blueprint, render_template, request, redirect, url_for
-import json
-from ..utilities import execute_mysql_query, parse_ingredients, get_tag_keys, get_tags
-from ..variables import staples_list, book_list, fresh_ingredients, tinned_ingredients, dry_ingredients, dairy_ingredients, tag_list
+from ..utilities import execute_mysql_query, parse_ingredients, get_tags
+from ..catalog import get_catalog
+from ..ingredient_catalog import record_ingredient_changes
+from ..meal_form import get_meal_form
 
 add = Blueprint('add', __name__, template_folder='templates', static_folder='../static')
 
@@ -51,64 +52,42 @@ def index():
 
         # run query (no fetch because it's an INSERT)
         execute_mysql_query(query, params, fetch="none")
+        record_ingredient_changes(None, {
+            "Fresh_Ingredients": params["fresh_ing"],
+            "Tinned_Ingredients": params["tinned_ing"],
+            "Dry_Ingredients": params["dry_ing"],
+            "Dairy_Ingredients": params["dairy_ing"],
+        })
+        get_catalog().invalidate(details["Name"])
 
         return redirect(url_for('add.confirmation', meal=details['Name']))
 
-    return render_template(
-        'add.html',
-        len_staples=len(staples_list), staples=staples_list,
-        len_books=len(book_list), books=book_list,
-        len_fresh_ingredients=len(fresh_ingredients), fresh_ingredients=[ingredient[0] for ingredient in fresh_ingredients],
-        fresh_ingredients_units=[ingredient[1] for ingredient in fresh_ingredients],
-        len_tinned_ingredients=len(tinned_ingredients), tinned_ingredients=[ingredient[0] for ingredient in tinned_ingredients],
-        tinned_ingredients_units=[ingredient[1] for ingredient in tinned_ingredients],
-        len_dry_ingredients=len(dry_ingredients), dry_ingredients=[ingredient[0] for ingredient in dry_ingredients],
-        dry_ingredients_units=[ingredient[1] for ingredient in dry_ingredients],
-        len_dairy_ingredients=len(dairy_ingredients), dairy_ingredients=[ingredient[0] for ingredient in dairy_ingredients],
-        dairy_ingredients_units=[ingredient[1] for ingredient in dairy_ingredients],
-        len_tags=len(tag_list), tags=tag_list
-    )
+    # static form, rendered once (see meal_form.py)
+    return get_meal_form().render('Add Meal')
 
 
 @add.route('/add_confirmation/<meal>', methods=['GET', 'POST'])
 def confirmation(meal):
     if request.method == "GET":
-        query_string = "SELECT * FROM MealsTable WHERE Name = :meal"
-        result = execute_mysql_query(query_string, {"meal": meal}, fetch="all")
+        record = get_catalog().get(meal)
 
-        if not result:
+        if record is None:
             return f"No meal found with name {meal}", 404
 
-        row = result[0]
-        location_details = {}
-        if row['Website'] is None or row['Website'] == '':
-            location_details['Book'] = row['Book']
-            location_details['Page'] = row['Page']
-        else:
-            location_details['Website'] = row['Website']
-
-        fresh_ingredients = [list(json.loads(row['Fresh_Ingredients']).keys()),
-                             list(json.loads(row['Fresh_Ingredients']).values())]
-        tinned_ingredients = [list(json.loads(row['Tinned_Ingredients']).keys()),
-                              list(json.loads(row['Tinned_Ingredients']).values())]
-        dry_ingredients = [list(json.loads(row['Dry_Ingredients']).keys()),
-                           list(json.loads(row['Dry_Ingredients']).values())]
-        dairy_ingredients = [list(json.loads(row['Dairy_Ingredients']).keys()),
-                             list(json.loads(row['Dairy_Ingredients']).values())]
-
-        tags = [
-            {"Spring/Summer": row['Spring_Summer']},
-            {"Autumn/Winter": row['Autumn_Winter']},
-            {"Quick/Easy": row['Quick_Easy']},
-            {"Special": row['Special']}
-        ]
-        tags = get_tag_keys(tags)
+        location_details = record.location_details()
+
+        fresh_ingredients = record.ingredient_lists('Fresh_Ingredients')
+        tinned_ingredients = record.ingredient_lists('Tinned_Ingredients')
+        dry_ingredients = record.ingredient_lists('Dry_Ingredients')
+        dairy_ingredients = record.ingredient_lists('Dairy_Ingredients')
+
+        tags = record.tag_names()
 
         return render_template(
             'add_confirmation.html',
             meal_name=meal,
             location_details=location_details, location_keys=location_details.keys(),
-            staple=row['Staple'],
+            staple=record.staple,
             len_fresh_ingredients=len(fresh_ingredients[0]), fresh_ingredients_keys=fresh_ingredients[0], fresh_ingredients_values=fresh_ingredients[1],
             len_tinned_ingredients=len(tinned_ingredients[0]), tinned_ingredients_keys=tinned_ingredients[0], tinned_ingredients_values=tinned_ingredients[1],
             len_dry_ingredients=len(dry_ingredients[0]), dry_ingredients_keys=dry_ingredients[0], dry_ingredients_values=dry_ingredients[1],
@@ -0,0 +1,152 @@
+from flask import Blueprint, Response, request, stream_with_context
+import csv
+import io
+import json
+from datetime import date, datetime
+from ..utilities import execute_mysql_query
+from ..statements import INGREDIENT_COLUMNS
+from ..variables import tag_list_backend
+
+export = Blueprint('export', __name__, template_folder='templates', static_folder='../static')
+
+# Columns that can be exported, in output order
+EXPORT_COLUMNS = (["Meal_ID", "Name", "Staple", "Book", "Page", "Website"] + INGREDIENT_COLUMNS
+                  + ["Last_Made"] + tag_list_backend + ["Updated_At"])
+
+# Rows serialised per chunk written to the response
+CHUNK_ROWS = 500
+
+
+class ExportError(ValueError):
+    """A bad columns/since argument."""
+
+
+def export_arguments(args):
+    """
+    Reads ?columns=Name,Staple and ?since=YYYY-MM-DD.
+
+    Returns
+    -------
+    (list of columns, since date or None); raises ExportError
+    """
+    columns = [column.strip() for column in args.get('columns', '').split(',') if column.strip()]
+    unknown = [column for column in columns if column not in EXPORT_COLUMNS]
+    if unknown:
+        raise ExportError(f"Unknown column(s): {', '.join(unknown)}. Choose from: {', '.join(EXPORT_COLUMNS)}")
+    # keep the order asked for, without repeats
+    columns = list(dict.fromkeys(columns)) or EXPORT_COLUMNS
+
+    since = args.get('since')
+    if since:
+        try:
+            since = date.fromisoformat(since)
+        except ValueError:
+            raise ExportError("since must be a date, YYYY-MM-DD") from None
+    return columns, since or None
+
+
+def export_rows(columns, since=None):
+    """
+    Streams the meals from a server-side cursor, in index order so the
+    database never sorts: by Meal_ID, or by Last_Made, Meal_ID with since
+    (meals last made on or after that date).
+    """
+    if since is None:
+        query_string = f"SELECT {', '.join(columns)} FROM MealsTable ORDER BY Meal_ID"
+        params = {}
+    else:
+        query_string = (f"SELECT {', '.join(columns)} FROM MealsTable "
+                        "WHERE Last_Made >= :since ORDER BY Last_Made, Meal_ID")
+        params = {"since": since.isoformat()}
+    return execute_mysql_query(query_string, params, fetch="iter", batch_size=CHUNK_ROWS)
+
+
+def _plain(value, column):
+    """A column value as JSON-ready data: parsed ingredients, ISO dates."""
+    if column in INGREDIENT_COLUMNS and isinstance(value, str):
+        try:
+            return json.loads(value) if value else {}
+        except ValueError:
+            return value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _batched(lines):
+    """
+    Joins serialised rows into response chunks: the first row on its own, so
+    the first byte leaves as soon as the query answers, then CHUNK_ROWS at a time.
+    """
+    lines = iter(lines)
+    for line in lines:
+        yield line
+        break
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == CHUNK_ROWS:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def jsonl_chunks(rows, columns):
+    yield from _batched(
+        json.dumps({column: _plain(row[column], column) for column in columns}, ensure_ascii=False, default=str) + "\n"
+        for row in rows)
+
+
+def _csv_value(value, column):
+    if value is None:
+        return ""
+    if column in INGREDIENT_COLUMNS and not isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def csv_chunks(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    # the header goes out before the query runs
+    yield line(columns)
+    yield from _batched(line([_csv_value(row[column], column) for column in columns]) for row in rows)
+
+
+def _stream(chunks, mimetype, filename):
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    # let proxies pass chunks on as they arrive
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _export(serialise, mimetype, filename):
+    try:
+        columns, since = export_arguments(request.args)
+    except ExportError as exc:
+        return str(exc), 400
+    return _stream(serialise(export_rows(columns, since), columns), mimetype, filename)
+
+
+@export.route('/export/meals.jsonl', methods=['GET'])
+def meals_jsonl():
+    """All meals, one JSON object per line. ?columns=Name,Staple&since=2024-01-01"""
+    return _export(jsonl_chunks, 'application/x-ndjson', 'meals.jsonl')
+
+
+@export.route('/export/meals.csv', methods=['GET'])
+def meals_csv():
+    """All meals as CSV, ingredient columns as JSON. ?columns=Name,Staple&since=2024-01-01"""
+    return _export(csv_chunks, 'text/csv', 'meals.csv')
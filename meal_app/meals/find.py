@@ -1,72 +1,50 @@
 from flask import Blueprint, render_template, request, redirect, url_for
-import json
-from ..utilities import execute_mysql_query
+from ..catalog import get_catalog
+from ..typeahead import get_meal_name_index
+from ..conditional import catalog_conditional
+from ..meal_history import get_meal_history_counts, HISTORY_DAYS
 
 find = Blueprint('find', __name__, template_folder='templates', static_folder='../static')
 
 
 @find.route('/find', methods=['GET', 'POST'])
+@catalog_conditional
 def index():
-    # Get all meal names
-    query_string = "SELECT Name FROM MealsTable;"
-    results = execute_mysql_query(query_string)
-    meals = [result['Name'] for result in results]
-
     if request.method == "POST":
         details = request.form
-        query_string = "SELECT * FROM MealsTable WHERE Name = :meal"
-        results = execute_mysql_query(query_string, {"meal": details['Meal']}, fetch="all")
-        return redirect(url_for('find.some_meal_page', meal=results[0]['Name']))
+        # exact name from the typeahead, else the closest match to what was typed
+        record = get_catalog().get(details['Meal'])
+        meal = record.name if record is not None else get_meal_name_index().best_match(details['Meal'])
+        if meal is None:
+            return redirect(url_for('find.index'))
+        return redirect(url_for('find.some_meal_page', meal=meal))
 
-    return render_template(
-        'find.html',
-        len_meals=len(meals),
-        meals=meals
-    )
+    return render_template('find.html')
 
 
 @find.route('/find/<meal>', methods=['GET', 'POST'])
 def some_meal_page(meal):
     if request.method == "GET":
-        query = "SELECT * FROM MealsTable WHERE Name = :meal"
-        result = execute_mysql_query(query, {"meal": meal}, fetch="all")
+        record = get_catalog().get(meal)
 
-        if not result:
+        if record is None:
             return f"No meal found with name {meal}", 404
 
-        row = result[0]
-
         # build location details
-        location_details = {}
-        if row.get('Website') is None or row.get('Website') == '':
-            location_details['Book'] = row.get('Book')
-            location_details['Page'] = row.get('Page')
-        else:
-            location_details['Website'] = row.get('Website')
+        location_details = record.location_details()
 
-        # parse ingredients
-        fresh_ingredients = [
-            list(json.loads(row['Fresh_Ingredients']).keys()),
-            list(json.loads(row['Fresh_Ingredients']).values())
-        ]
-        tinned_ingredients = [
-            list(json.loads(row['Tinned_Ingredients']).keys()),
-            list(json.loads(row['Tinned_Ingredients']).values())
-        ]
-        dry_ingredients = [
-            list(json.loads(row['Dry_Ingredients']).keys()),
-            list(json.loads(row['Dry_Ingredients']).values())
-        ]
-        dairy_ingredients = [
-            list(json.loads(row['Dairy_Ingredients']).keys()),
-            list(json.loads(row['Dairy_Ingredients']).values())
-        ]
+        # ingredients were parsed once when the catalog loaded the meal
+        fresh_ingredients = record.ingredient_lists('Fresh_Ingredients')
+        tinned_ingredients = record.ingredient_lists('Tinned_Ingredients')
+        dry_ingredients = record.ingredient_lists('Dry_Ingredients')
+        dairy_ingredients = record.ingredient_lists('Dairy_Ingredients')
 
         return render_template(
             'find_results.html',
             meal_name=meal,
             location_details=location_details, location_keys=location_details.keys(),
-            staple=row.get('Staple'),
+            staple=record.staple,
+            times_made=get_meal_history_counts().times_made(record.meal_id), history_days=HISTORY_DAYS,
             len_fresh_ingredients=len(fresh_ingredients[0]),
             fresh_ingredients_keys=fresh_ingredients[0],
             fresh_ingredients_values=fresh_ingredients[1],
@@ -1,48 +1,55 @@
-from flask import Blueprint, render_template, request
-import json
+from flask import Blueprint, render_template, request, redirect, url_for
 from datetime import datetime
-from ..utilities import execute_mysql_query
-from ..variables import tag_list
+from ..recommender import get_recommender
+from ..variables import tag_list, tag_list_backend
 
 inspire = Blueprint('inspire', __name__, template_folder='templates', static_folder='../static')
 
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 50
+
 
 @inspire.route('/inspire', methods=['GET', 'POST'])
 def index():
+    if request.method == "POST" and request.form.get('submit'):
+        # A meal picked from the suggestions
+        return redirect(url_for('find.some_meal_page', meal=request.form['submit']))
+
     if request.method == "POST":
         details = request.form
-        # Replace "/" with "_" to match DB column name
-        tag = details['Tag'].replace('/', '_')
-
-        # Build query: safe because `tag` comes only from predefined tag_list
-        query_string = f"""
-        SELECT Name, Staple, Last_Made
-        FROM MealsTable
-        WHERE {tag} = 1
-        ORDER BY Name;
-        """
-
-        results = execute_mysql_query(query_string, fetch="all")
-
-        meal_names = [meal['Name'] for meal in results]
-        staples = [meal['Staple'] for meal in results]
+        # Replace "/" with "_" to match DB column name; anything else means any tag
+        tag = details.get('Tag', '').replace('/', '_')
+        tag = tag if tag in tag_list_backend else None
+        try:
+            limit = min(max(int(details.get('Count', DEFAULT_SUGGESTIONS)), 1), MAX_SUGGESTIONS)
+        except ValueError:
+            limit = DEFAULT_SUGGESTIONS
+
+        # Ranked by time since last made, season and staple variety (see recommender.py)
+        suggestions = get_recommender().recommend(tag=tag, limit=limit, jitter=bool(details.get('Surprise')))
+
+        meal_names = [meal.name for meal, _ in suggestions]
+        staples = [meal.staple for meal, _ in suggestions]
         last_date = [
-            datetime.strftime(meal['Last_Made'], "%d-%m-%Y")
-            if meal['Last_Made'] else ""
-            for meal in results
+            datetime.strftime(meal.last_made, "%d-%m-%Y")
+            if meal.last_made else ""
+            for meal, _ in suggestions
         ]
 
         return render_template(
             'inspire_results.html',
-            tag=details['Tag'],
+            tag=details['Tag'] if tag else 'Suggested',
             len_meals=len(meal_names),
             meal_names=meal_names,
             staples=staples,
-            last_date=last_date
+            last_date=last_date,
+            scores=[score for _, score in suggestions]
         )
 
     return render_template(
         'inspire.html',
         len_tags=len(tag_list),
-        tags=tag_list
+        tags=tag_list,
+        default_count=DEFAULT_SUGGESTIONS,
+        max_count=MAX_SUGGESTIONS
     )
@@ -1,42 +1,127 @@
 from flask import Blueprint, render_template, request, redirect, url_for
+import base64
 import json
 from datetime import datetime
-from ..utilities import execute_mysql_query
+from ..utilities import execute_named_query
+from ..conditional import catalog_conditional
+from ..statements import LIST_SORTS
 
 list_meals = Blueprint('list_meals', __name__, template_folder='templates', static_folder='../static')
 
+DEFAULT_SORT = "book"
+DEFAULT_PAGE_SIZE = 50
+PAGE_SIZES = [25, 50, 100, 200]
+SORT_LABELS = {"book": "Book & page", "name": "Meal", "staple": "Staple", "last_made": "Last made"}
+
+
+def encode_cursor(row, key_count):
+    """Packs a row's sort-key values (k0, k1, ...) into an opaque URL-safe token."""
+    keys = [row[f"k{i}"] for i in range(key_count)]
+    raw = json.dumps(keys, default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token, key_count):
+    """Unpacks a cursor token into {k0: ..., k1: ...}, or None if it's malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        keys = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(keys, list) or len(keys) != key_count:
+        return None
+    return {f"k{i}": value for i, value in enumerate(keys)}
+
+
+def _page_size(value):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return min(max(size, 1), PAGE_SIZES[-1])
+
+
+def fetch_page(sort, size, after=None, before=None):
+    """
+    Fetches one page of meals by keyset (seek) pagination.
+
+    Parameters
+    ----------
+    sort : str
+        a key of statements.LIST_SORTS
+    size : int
+        rows per page
+    after, before : str or None
+        cursor tokens from a previous page (at most one is used)
+
+    Returns
+    -------
+    rows, next cursor (or None), previous cursor (or None)
+    """
+    key_count = len(LIST_SORTS[sort])
+    seek, params = None, {}
+    for direction, token in (("after", after), ("before", before)):
+        cursor = decode_cursor(token, key_count) if token else None
+        if cursor is not None:
+            seek, params = direction, cursor
+            break
+
+    name = f"list_meals_{sort}_{seek}" if seek else f"list_meals_{sort}"
+    params["limit"] = size + 1  # one extra row says whether there's another page
+    rows = execute_named_query(name, params, fetch="all") or []
+    more = len(rows) > size
+    rows = rows[:size]
+    if seek == "before":
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+    has_next = more if seek != "before" else True
+    has_prev = seek == "after" or (seek == "before" and more)
+    next_cursor = encode_cursor(rows[-1], key_count) if has_next else None
+    prev_cursor = encode_cursor(rows[0], key_count) if has_prev else None
+    return rows, next_cursor, prev_cursor
+
 
 @list_meals.route('/list_meals', methods=['GET', 'POST'])
+@catalog_conditional
 def index():
     if request.method == "GET":
-        # Order by Book then Page (numeric)
-        query_string = """
-        SELECT *, CAST(Page AS SIGNED) AS Page
-        FROM MealsTable
-        ORDER BY Book, Page;
-        """
-        results = execute_mysql_query(query_string, fetch="all")
-
-        meal_names = [meal['Name'] for meal in results]
-        staples = [meal['Staple'] for meal in results]
-        books = [meal['Book'] for meal in results]
-        pages = [meal['Page'] for meal in results]
-        websites = [meal['Website'] for meal in results]
-        last_dates = [
-            datetime.strftime(meal['Last_Made'], "%d-%m-%Y")
-            if meal['Last_Made'] else ""
-            for meal in results
-        ]
+        sort = request.args.get('sort', DEFAULT_SORT)
+        if sort not in LIST_SORTS:
+            sort = DEFAULT_SORT
+        size = _page_size(request.args.get('size'))
+        rows, next_cursor, prev_cursor = fetch_page(
+            sort, size, after=request.args.get('after'), before=request.args.get('before'))
+
+        meal_names, staples, books, pages, websites, last_dates = [], [], [], [], [], []
+        for meal in rows:
+            meal_names.append(meal['Name'])
+            staples.append(meal['Staple'])
+            books.append(meal['Book'])
+            pages.append(meal['Page'])
+            websites.append(meal['Website'])
+            last_dates.append(
+                datetime.strftime(meal['Last_Made'], "%d-%m-%Y")
+                if meal['Last_Made'] else ""
+            )
 
         return render_template(
             'list_meals.html',
+            total_meals=execute_named_query("meal_count", fetch="one")['Meal_Count'],
             len_meals=len(meal_names),
             meal_names=meal_names,
             staples=staples,
             books=books,
             page=pages,
             website=websites,
-            last_date=last_dates
+            last_date=last_dates,
+            sort=sort,
+            size=size,
+            sort_labels=SORT_LABELS,
+            page_sizes=PAGE_SIZES,
+            next_url=url_for('list_meals.index', sort=sort, size=size, after=next_cursor) if next_cursor else None,
+            prev_url=url_for('list_meals.index', sort=sort, size=size, before=prev_cursor) if prev_cursor else None,
         )
 
     elif request.method == "POST" and request.form.get('submit'):
@@ -0,0 +1,113 @@
+import math
+from flask import Blueprint, render_template, request, jsonify
+from ..pantry_matrix import get_pantry_matrix, ingredient_units, PLENTY
+from ..variables import fresh_ingredients, tinned_ingredients, dry_ingredients, dairy_ingredients
+
+pantry = Blueprint('pantry', __name__, template_folder='templates', static_folder='../static')
+
+# Number of ranked meals returned unless the request asks for more
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+
+LIMIT_MESSAGE = f"Meals to show must be a whole number (1 to {MAX_LIMIT})."
+PANTRY_MESSAGE = 'Send {"ingredients": {name: quantity or null}}; quantities must be finite numbers.'
+
+
+def parse_pantry(items):
+    """
+    Builds {ingredient: quantity} from submitted values.
+    A number is the quantity on hand, any other non-blank value ("y") means
+    plenty, and blank means the ingredient isn't in the pantry.
+    """
+    parsed = {}
+    for name, value in items:
+        if value is None:
+            parsed[name] = PLENTY
+            continue
+        value = str(value).strip()
+        if not value:
+            continue
+        try:
+            quantity = float(value)
+        except ValueError:
+            quantity = PLENTY
+        # "nan" parses as a float but isn't a quantity
+        parsed[name] = PLENTY if math.isnan(quantity) else quantity
+    return parsed
+
+
+def parse_json_pantry(payload):
+    """
+    The pantry from a JSON request body; raises ValueError unless the body is
+    an object whose "ingredients" object maps names to finite numbers or null.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError(payload)
+    ingredients = payload.get('ingredients') or {}
+    if not isinstance(ingredients, dict):
+        raise ValueError(ingredients)
+    for value in ingredients.values():
+        if value is None:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError(value)
+    return parse_pantry(ingredients.items())
+
+
+def parse_limit(value):
+    """The number of meals to show, clamped to 1..MAX_LIMIT; raises ValueError if it isn't a number."""
+    if value is None or str(value).strip() == '':
+        return DEFAULT_LIMIT
+    if isinstance(value, bool):
+        raise ValueError(value)
+    return min(max(int(str(value).strip()), 1), MAX_LIMIT)
+
+
+def render_pantry_page(message=None):
+    """The pantry form, one text box per ingredient."""
+    return render_template(
+        'pantry.html',
+        categories=[
+            ("Fresh", fresh_ingredients),
+            ("Tinned", tinned_ingredients),
+            ("Dry", dry_ingredients),
+            ("Dairy", dairy_ingredients),
+        ],
+        default_limit=DEFAULT_LIMIT,
+        max_limit=MAX_LIMIT,
+        message=message
+    )
+
+
+@pantry.route('/pantry', methods=['GET', 'POST'])
+def index():
+    if request.method == "POST" and request.is_json:
+        # JSON API: {"ingredients": {"Garlic": 4, "Leek": null}, "limit": 10}
+        payload = request.get_json(silent=True)
+        try:
+            pantry_items = parse_json_pantry(payload)
+        except ValueError:
+            return jsonify(error=PANTRY_MESSAGE), 400
+        try:
+            limit = parse_limit(payload.get('limit'))
+        except ValueError:
+            return jsonify(error=LIMIT_MESSAGE), 400
+        return jsonify(meals=get_pantry_matrix().rank(pantry_items, limit=limit))
+
+    if request.method == "POST":
+        details_dict = request.form.to_dict()
+        pantry_items = parse_pantry(
+            (key.removeprefix('Have '), value) for key, value in details_dict.items() if key.startswith('Have ')
+        )
+        try:
+            limit = parse_limit(details_dict.get('Limit'))
+        except ValueError:
+            return render_pantry_page(message=LIMIT_MESSAGE), 400
+        results = get_pantry_matrix().rank(pantry_items, limit=limit)
+        units = ingredient_units()
+        for meal in results:
+            meal['short'] = [f"{quantity} {units.get(name, '')} {name}".replace('  ', ' ')
+                             for name, quantity in meal['short']]
+        return render_template('pantry_results.html', len_meals=len(results), meals=results)
+
+    return render_pantry_page()
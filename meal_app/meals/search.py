@@ -1,27 +1,58 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session
-import json
-from ..utilities import execute_mysql_query
+from flask import Blueprint, render_template, request, redirect, url_for
+from ..ingredient_catalog import ingredient_dropdowns
+from ..ingredient_index import get_ingredient_index, ANY_COLUMN
+from ..statements import INGREDIENT_COLUMNS
+from ..plan_store import stash, take, SEARCH_RESULTS_ID
+from ..conditional import catalog_conditional
 
 search = Blueprint('search', __name__, template_folder='templates', static_folder='../static')
 
 
+def _parse_term(value):
+    """Splits a "<column>|<ingredient>" option value into (column, ingredient)."""
+    column, _, ingredient = value.partition('|')
+    if column not in INGREDIENT_COLUMNS:
+        column = ANY_COLUMN
+    return column, ingredient
+
+
+def _describe(included, excluded, match_all):
+    """Human readable summary of a combined search for the results heading."""
+    joiner = " and " if match_all else " or "
+    description = joiner.join(ingredient for _, ingredient in included) or "any ingredient"
+    if excluded:
+        description += " but not " + " or ".join(ingredient for _, ingredient in excluded)
+    return description
+
+
 @search.route('/search', methods=['GET', 'POST'])
+@catalog_conditional
 def index():
-    # Get all ingredient JSONs to build dropdown lists
-    query_string = """
-    SELECT Fresh_Ingredients, Tinned_Ingredients, Dry_Ingredients, Dairy_Ingredients
-    FROM MealsTable
-    WHERE JSON_LENGTH(Fresh_Ingredients) > 0;
-    """
-    results = execute_mysql_query(query_string, fetch="all")
-
-    # collect unique keys for each ingredient category
-    fresh_ingredients = sorted({key for r in results for key in json.loads(r['Fresh_Ingredients']).keys()})
-    tinned_ingredients = sorted({key for r in results for key in json.loads(r['Tinned_Ingredients']).keys()})
-    dry_ingredients = sorted({key for r in results for key in json.loads(r['Dry_Ingredients']).keys()})
-    dairy_ingredients = sorted({key for r in results for key in json.loads(r['Dairy_Ingredients']).keys()})
-
-    if request.method == "POST":
+    # Distinct ingredients per category, from the maintained IngredientUsage catalog
+    dropdowns = ingredient_dropdowns()
+    fresh_ingredients = dropdowns['Fresh_Ingredients']
+    tinned_ingredients = dropdowns['Tinned_Ingredients']
+    dry_ingredients = dropdowns['Dry_Ingredients']
+    dairy_ingredients = dropdowns['Dairy_Ingredients']
+
+    if request.method == "POST" and request.form.get('submit') == 'Combined search':
+        # Several ingredients across categories: "Match" all (AND) or any (OR) of
+        # the included ones, and none (NOT) of the excluded ones
+        included = [_parse_term(value) for value in request.form.getlist('Include')]
+        excluded = [_parse_term(value) for value in request.form.getlist('Exclude')]
+        match_all = request.form.get('Match', 'all') != 'any'
+
+        if included or excluded:
+            meals = get_ingredient_index().search(
+                all_of=included if match_all else (),
+                any_of=() if match_all else included,
+                none_of=excluded,
+            )
+            stash(SEARCH_RESULTS_ID, meals)
+            return redirect(url_for('search.search_results',
+                                    ingredient=_describe(included, excluded, match_all)))
+
+    elif request.method == "POST":
         details_dict = request.form.to_dict()
 
         ingredient = None
@@ -41,15 +72,9 @@ def index():
             ingredient = details_dict[json_key]
 
         if ingredient and json_key:
-            # Note: ingredient name is inserted into JSON path string
-            # It's safe because it comes from dropdown lists we control
-            query = f"""
-            SELECT *
-            FROM MealsTable
-            WHERE JSON_EXTRACT({json_key}, '$."{ingredient}"') IS NOT NULL;
-            """
-            results = execute_mysql_query(query, fetch="all")
-            session['meal_list'] = [row['Name'] for row in results]
+            # Answered from the inverted ingredient index, no table scan
+            meals = get_ingredient_index().search(all_of=[(json_key, ingredient)])
+            stash(SEARCH_RESULTS_ID, meals)
 
             return redirect(url_for('search.search_results', ingredient=ingredient))
 
@@ -65,7 +90,7 @@ def index():
 @search.route('/search/<ingredient>', methods=['GET', 'POST'])
 def search_results(ingredient):
     if request.method == "GET":
-        meals = session.pop('meal_list', [])
+        meals = take(SEARCH_RESULTS_ID) or []
         return render_template(
             'search_results.html',
             ingredient=ingredient,
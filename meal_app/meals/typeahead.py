@@ -0,0 +1,18 @@
+from flask import Blueprint, request, jsonify
+from ..typeahead import get_meal_name_index
+
+typeahead = Blueprint('typeahead', __name__, template_folder='templates', static_folder='../static')
+
+# Most names returned per lookup
+MAX_MATCHES = 25
+
+
+@typeahead.route('/typeahead/meals', methods=['GET'])
+def meal_names():
+    """JSON typeahead: ?q=<typed text>&k=<max matches> -> {"matches": [...]}"""
+    query = request.args.get('q', '')
+    try:
+        k = min(int(request.args.get('k', 10)), MAX_MATCHES)
+    except ValueError:
+        k = 10
+    return jsonify(matches=get_meal_name_index().lookup(query, k=k))
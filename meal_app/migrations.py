@@ -0,0 +1,421 @@
+"""
+Versioned schema migrations.
+
+Each Migration has a version, a description and up/down steps. A step is a
+SQL string run on every backend, a {dialect: SQL} dict where MySQL and
+SQLite need different syntax, or a callable taking the connection (for data
+backfills). Applied versions are recorded in the
+SchemaVersion table, so migrate() only runs what a database is missing and
+can step back down to an earlier version.
+
+MySQL commits each DDL statement implicitly, so a migration that fails part
+way leaves its earlier steps applied and its version unrecorded. Its steps
+are written to be run again: tables use IF [NOT] EXISTS, and column and index
+steps carry an "unless_exists" or "if_exists" (kind, table, name) guard that
+is checked against information_schema first. SQLite DDL is transactional and
+needs no guards.
+
+Run from the command line with database_setup/migrate.py; the SQLite backend
+migrates itself on start-up (sqlite_backend.bootstrap_schema).
+
+check_query_plans() EXPLAINs the app's hot statements and reports whether
+each one uses the index added for it.
+"""
+import json
+from collections import namedtuple
+from datetime import datetime
+from sqlalchemy import text
+from .sqlite_backend import SCHEMA_SQL
+from .statements import get_statement
+from .utilities import compile_statement
+from .variables import tag_list_backend
+
+Migration = namedtuple("Migration", "version description up down")
+
+
+class MigrationError(Exception):
+    """Raised when a migration can't be applied or reverted."""
+
+
+VERSION_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS SchemaVersion (
+  Version     INT NOT NULL PRIMARY KEY,
+  Description VARCHAR(255) NOT NULL,
+  Applied_At  DATETIME NOT NULL
+)
+"""
+
+# MySQL schema as it stood before versioning (MealsTable + initialise_db.sql)
+_MYSQL_BASELINE = [
+    """
+    CREATE TABLE IF NOT EXISTS MealsTable (
+      Meal_ID INT AUTO_INCREMENT PRIMARY KEY,
+      Name VARCHAR(255) NOT NULL,
+      Staple VARCHAR(100),
+      Book VARCHAR(100),
+      Page VARCHAR(10),
+      Website VARCHAR(255),
+      Fresh_Ingredients JSON NULL,
+      Tinned_Ingredients JSON NULL,
+      Dry_Ingredients JSON NULL,
+      Dairy_Ingredients JSON NULL,
+      Last_Made DATE NULL,
+      Spring_Summer TINYINT(1) NOT NULL DEFAULT 0,
+      Autumn_Winter TINYINT(1) NOT NULL DEFAULT 0,
+      Quick_Easy   TINYINT(1) NOT NULL DEFAULT 0,
+      Special      TINYINT(1) NOT NULL DEFAULT 0,
+      UNIQUE KEY uk_meal_name (Name)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Ingredients (
+      Ingredient_ID   INT AUTO_INCREMENT PRIMARY KEY,
+      Ingredient_Name VARCHAR(150) NOT NULL UNIQUE
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Tags (
+      Tag_ID   INT AUTO_INCREMENT PRIMARY KEY,
+      Tag_Name VARCHAR(100) NOT NULL UNIQUE
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS IngredientUsage (
+      Category        VARCHAR(32)  NOT NULL,
+      Ingredient_Name VARCHAR(150) NOT NULL,
+      Usage_Count     INT NOT NULL DEFAULT 0,
+      PRIMARY KEY (Category, Ingredient_Name)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    INSERT IGNORE INTO Tags (Tag_Name)
+    VALUES ('Spring/Summer'), ('Autumn/Winter'), ('Quick/Easy'), ('Special')
+    """,
+]
+
+# Indexes for the hot queries: /list_meals orders, GROUP BY Staple (/create)
+# and the last-made order
+HOT_INDEXES = {
+    "ix_meals_book_page": "Book, Page_Num",
+    "ix_meals_staple_name": "Staple, Name",
+    "ix_meals_last_made": "Last_Made",
+}
+
+# Per-tag indexes migration 2 added for the SQL /inspire tag filters. /inspire
+# ranks the in-memory catalog (recommender.py) instead, so migration 7 drops them
+TAG_INDEXES = {f"ix_meals_{tag.lower()}_last_made": f"{tag}, Last_Made" for tag in tag_list_backend}
+
+
+def _create_index(name, table, columns):
+    statement = f"CREATE INDEX {name} ON {table} ({columns})"
+    return {"mysql": statement, "sqlite": statement, "unless_exists": ("index", table, name)}
+
+
+def _drop_index(name, table):
+    return {"mysql": f"DROP INDEX {name} ON {table}", "sqlite": f"DROP INDEX IF EXISTS {name}",
+            "if_exists": ("index", table, name)}
+
+
+def _create_indexes(indexes):
+    return [_create_index(name, "MealsTable", columns) for name, columns in indexes.items()]
+
+
+def _drop_indexes(indexes):
+    return [_drop_index(name, "MealsTable") for name in indexes]
+
+
+# Current time as SQLite stores Updated_At (sorts as text like the MySQL DATETIME(6))
+_SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+def _index_saved_plans(conn):
+    """Migration 4 backfill: adds the plans saved so far to SavedPlanSearch."""
+    from .plan_repository import index_plans
+    rows = conn.execute(text("SELECT Plan_ID, Payload FROM SavedPlans")).fetchall()
+    index_plans(conn, [(plan_id, json.loads(payload)) for plan_id, payload in rows])
+
+
+MIGRATIONS = [
+    Migration(
+        1, "baseline schema",
+        up=[{"mysql": statement} for statement in _MYSQL_BASELINE]
+           + [{"sqlite": statement} for statement in SCHEMA_SQL],
+        down=None,
+    ),
+    Migration(
+        2, "numeric Page_Num column and hot-query indexes",
+        up=[
+            # Page is free text; Page_Num is its value when it's all digits, else NULL.
+            # Page holds up to 10 digits, more than INT UNSIGNED can take
+            {"mysql": """
+                ALTER TABLE MealsTable ADD COLUMN Page_Num BIGINT UNSIGNED
+                GENERATED ALWAYS AS (CASE WHEN Page REGEXP '^[0-9]+$' THEN CAST(Page AS UNSIGNED) END) STORED
+                """,
+             "sqlite": """
+                ALTER TABLE MealsTable ADD COLUMN Page_Num INTEGER
+                GENERATED ALWAYS AS (CASE WHEN Page <> '' AND Page NOT GLOB '*[^0-9]*' THEN CAST(Page AS INTEGER) END) VIRTUAL
+                """,
+             "unless_exists": ("column", "MealsTable", "Page_Num")},
+        ] + _create_indexes({**HOT_INDEXES, **TAG_INDEXES}),
+        down=_drop_indexes({**HOT_INDEXES, **TAG_INDEXES}) + [{"mysql": "ALTER TABLE MealsTable DROP COLUMN Page_Num",
+                                 "sqlite": "ALTER TABLE MealsTable DROP COLUMN Page_Num",
+                                 "if_exists": ("column", "MealsTable", "Page_Num")}],
+    ),
+    Migration(
+        3, "saved meal plans table",
+        up=[
+            {"mysql": """
+                CREATE TABLE IF NOT EXISTS SavedPlans (
+                  Plan_ID    INT AUTO_INCREMENT PRIMARY KEY,
+                  Name       VARCHAR(100) NOT NULL,
+                  Created_At DATETIME NOT NULL,
+                  Meal_Count INT NOT NULL DEFAULT 0,
+                  Payload    MEDIUMTEXT NOT NULL,
+                  KEY ix_saved_plans_created (Created_At, Plan_ID)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+                """,
+             "sqlite": """
+                CREATE TABLE SavedPlans (
+                  Plan_ID    INTEGER PRIMARY KEY AUTOINCREMENT,
+                  Name       VARCHAR(100) NOT NULL,
+                  Created_At DATETIME NOT NULL,
+                  Meal_Count INT NOT NULL DEFAULT 0,
+                  Payload    TEXT NOT NULL
+                )
+                """},
+            {"sqlite": "CREATE INDEX ix_saved_plans_created ON SavedPlans (Created_At, Plan_ID)"},
+        ],
+        down=["DROP TABLE IF EXISTS SavedPlans"],
+    ),
+    Migration(
+        4, "full-text index of saved plans",
+        up=[
+            {"mysql": """
+                CREATE TABLE IF NOT EXISTS SavedPlanSearch (
+                  Plan_ID     INT NOT NULL PRIMARY KEY,
+                  Meals       TEXT NOT NULL,
+                  Ingredients TEXT NOT NULL,
+                  FULLTEXT KEY ft_saved_plan_search (Meals, Ingredients)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+                """,
+             # rowid is the plan id
+             "sqlite": "CREATE VIRTUAL TABLE SavedPlanSearch USING fts5(Meals, Ingredients, tokenize='unicode61')"},
+            _index_saved_plans,
+        ],
+        down=["DROP TABLE IF EXISTS SavedPlanSearch"],
+    ),
+    Migration(
+        5, "meal history",
+        up=[
+            {"mysql": """
+                CREATE TABLE IF NOT EXISTS MealHistory (
+                  History_ID INT AUTO_INCREMENT PRIMARY KEY,
+                  Meal_ID    INT NOT NULL,
+                  Made_On    DATE NOT NULL,
+                  UNIQUE KEY ix_meal_history_meal_made (Meal_ID, Made_On)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+                """,
+             "sqlite": """
+                CREATE TABLE MealHistory (
+                  History_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+                  Meal_ID    INT NOT NULL,
+                  Made_On    DATE NOT NULL
+                )
+                """},
+            {"sqlite": "CREATE UNIQUE INDEX ix_meal_history_meal_made ON MealHistory (Meal_ID, Made_On)"},
+            # the only date known so far is each meal's Last_Made
+            "INSERT INTO MealHistory (Meal_ID, Made_On) SELECT Meal_ID, Last_Made FROM MealsTable WHERE Last_Made IS NOT NULL",
+        ],
+        down=["DROP TABLE IF EXISTS MealHistory"],
+    ),
+    Migration(
+        6, "Updated_At change watermark",
+        up=[
+            # set on every insert and update, so incremental jobs can read just what changed
+            {"mysql": """
+                ALTER TABLE MealsTable
+                  ADD COLUMN Updated_At DATETIME(6) NOT NULL
+                    DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+                  ADD KEY ix_meals_updated (Updated_At, Meal_ID)
+                """,
+             "sqlite": "ALTER TABLE MealsTable ADD COLUMN Updated_At DATETIME",
+             "unless_exists": ("column", "MealsTable", "Updated_At")},
+            {"sqlite": f"UPDATE MealsTable SET Updated_At = {_SQLITE_NOW}"},
+            {"sqlite": "CREATE INDEX ix_meals_updated ON MealsTable (Updated_At, Meal_ID)"},
+            # SQLite can't default a new column to the current time; triggers stamp it
+            {"sqlite": f"""
+                CREATE TRIGGER tr_meals_inserted AFTER INSERT ON MealsTable
+                FOR EACH ROW WHEN NEW.Updated_At IS NULL
+                BEGIN UPDATE MealsTable SET Updated_At = {_SQLITE_NOW} WHERE Meal_ID = NEW.Meal_ID; END
+                """},
+            {"sqlite": f"""
+                CREATE TRIGGER tr_meals_updated AFTER UPDATE ON MealsTable
+                FOR EACH ROW WHEN NEW.Updated_At IS OLD.Updated_At
+                BEGIN UPDATE MealsTable SET Updated_At = {_SQLITE_NOW} WHERE Meal_ID = NEW.Meal_ID; END
+                """},
+            # "is this ingredient used anywhere" for pruning the Ingredients catalog
+            _create_index("ix_ingredient_usage_name", "IngredientUsage", "Ingredient_Name"),
+            """
+            CREATE TABLE IF NOT EXISTS CatalogWatermarks (
+              Job       VARCHAR(64) NOT NULL PRIMARY KEY,
+              Watermark DATETIME(6) NULL
+            )
+            """,
+        ],
+        down=[
+            "DROP TABLE IF EXISTS CatalogWatermarks",
+            _drop_index("ix_ingredient_usage_name", "IngredientUsage"),
+            {"sqlite": "DROP TRIGGER tr_meals_updated"},
+            {"sqlite": "DROP TRIGGER tr_meals_inserted"},
+            {"mysql": "ALTER TABLE MealsTable DROP KEY ix_meals_updated, DROP COLUMN Updated_At",
+             "sqlite": "DROP INDEX ix_meals_updated",
+             "if_exists": ("column", "MealsTable", "Updated_At")},
+            {"sqlite": "ALTER TABLE MealsTable DROP COLUMN Updated_At"},
+        ],
+    ),
+    Migration(
+        7, "drop the unused per-tag indexes",
+        up=_drop_indexes(TAG_INDEXES),
+        down=_create_indexes(TAG_INDEXES),
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# information_schema lookups for the MySQL step guards, by kind
+_MYSQL_EXISTS_SQL = {
+    "column": """
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = :table AND column_name = :name
+        """,
+    "index": """
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :name
+        """,
+}
+
+
+def _mysql_has(conn, kind, table, name):
+    """True if the MySQL schema already has the named column or index on table."""
+    return bool(conn.execute(text(_MYSQL_EXISTS_SQL[kind]), {"table": table, "name": name}).scalar())
+
+
+def _skip_step(conn, step):
+    """True for a guarded MySQL step whose change is already (or no longer) there."""
+    if conn.dialect.name != "mysql" or not isinstance(step, dict):
+        return False
+    if "unless_exists" in step and _mysql_has(conn, *step["unless_exists"]):
+        return True
+    return "if_exists" in step and not _mysql_has(conn, *step["if_exists"])
+
+
+def _run_steps(conn, steps):
+    dialect = conn.dialect.name
+    for step in steps:
+        if callable(step):
+            step(conn)
+            continue
+        if _skip_step(conn, step):
+            continue
+        statement = step.get(dialect) if isinstance(step, dict) else step
+        if statement:
+            conn.execute(text(statement))
+
+
+def current_version(conn):
+    """Returns the highest applied migration version (0 for an unversioned database)."""
+    conn.execute(text(VERSION_TABLE_SQL))
+    return conn.execute(text("SELECT COALESCE(MAX(Version), 0) FROM SchemaVersion")).scalar()
+
+
+def migrate(engine, target=None):
+    """
+    Brings the schema to the target version, one migration per transaction.
+
+    Parameters
+    ----------
+    engine : sqlalchemy Engine
+    target : int or None
+        version to migrate to; None means the latest
+
+    Returns
+    -------
+    list of (version, "up" or "down") steps that were run
+    """
+    target = LATEST_VERSION if target is None else target
+    if not 0 <= target <= LATEST_VERSION:
+        raise MigrationError(f"Unknown schema version {target} (latest is {LATEST_VERSION})")
+
+    with engine.begin() as conn:
+        version = current_version(conn)
+
+    for migration in MIGRATIONS:
+        if target < migration.version <= version and migration.down is None:
+            raise MigrationError(f"Migration {migration.version} ({migration.description}) can't be reverted")
+
+    applied = []
+    for migration in MIGRATIONS:
+        if version < migration.version <= target:
+            with engine.begin() as conn:
+                _run_steps(conn, migration.up)
+                conn.execute(
+                    text("INSERT INTO SchemaVersion (Version, Description, Applied_At) VALUES (:v, :d, :t)"),
+                    {"v": migration.version, "d": migration.description, "t": datetime.now()},
+                )
+            applied.append((migration.version, "up"))
+
+    for migration in reversed(MIGRATIONS):
+        if target < migration.version <= version:
+            with engine.begin() as conn:
+                _run_steps(conn, migration.down)
+                conn.execute(text("DELETE FROM SchemaVersion WHERE Version = :v"), {"v": migration.version})
+            applied.append((migration.version, "down"))
+    return applied
+
+
+# Hot statements, the parameters to EXPLAIN them with and the index each should use
+HOT_QUERIES = [
+    ("list_meals_book", {"limit": 51}, "ix_meals_book_page"),
+    ("list_meals_book_after", {"k0": "", "k1": 0, "k2": 0, "limit": 51}, "ix_meals_book_page"),
+    ("list_meals_staple", {"limit": 51}, "ix_meals_staple_name"),
+    ("list_meals_last_made", {"limit": 51}, "ix_meals_last_made"),
+    ("meals_grouped_by_staple", {}, "ix_meals_staple_name"),
+    ("saved_plans_list", {}, "ix_saved_plans_created"),
+    ("meal_times_made", {"meal_id": 1, "since": "2000-01-01"}, "ix_meal_history_meal_made"),
+    ("meals_changed_since", {"since": "2999-01-01"}, "ix_meals_updated"),
+]
+
+
+def _index_names():
+    return set(HOT_INDEXES) | {index for _, _, index in HOT_QUERIES}
+
+
+def _plan_indexes(conn, query_string, params):
+    """EXPLAINs a SELECT and returns (plan rows, set of index names the plan mentions)."""
+    dialect = conn.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    result = conn.execute(compile_statement(prefix + query_string, dialect), params)
+    keys = list(result.keys())
+    rows = [dict(zip(keys, row)) for row in result]
+    if dialect == "sqlite":
+        used = {name for row in rows for name in _index_names() if name in row.get("detail", "")}
+    else:
+        used = {row.get("key") for row in rows if row.get("key")}
+    return rows, used
+
+
+def check_query_plans(engine):
+    """
+    EXPLAINs every statement in HOT_QUERIES.
+
+    Returns
+    -------
+    list of dicts with name, index (expected), used (bool) and plan (EXPLAIN rows)
+    """
+    report = []
+    with engine.connect() as conn:
+        for name, params, index in HOT_QUERIES:
+            plan, used = _plan_indexes(conn, get_statement(name), params)
+            report.append({"name": name, "index": index, "used": index in used, "plan": plan})
+    return report
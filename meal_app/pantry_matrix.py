@@ -0,0 +1,203 @@
+"""
+"What can I cook now?" ranking engine.
+
+PantryMatrix holds a meals × ingredients matrix of required quantities built
+from the four JSON ingredient columns (via the MealCatalog). Given the
+ingredients a user has on hand, every meal is scored in a few vectorised
+NumPy operations over just the pantry's columns:
+
+- coverage  : fraction of the meal's ingredients the pantry fully satisfies
+- missing   : number of the meal's ingredients the pantry lacks entirely
+- shortfall : summed relative shortfall (a missing ingredient counts 1, one
+              held at half the needed quantity counts 0.5)
+
+Meals are ranked by coverage, then fewest missing, then smallest shortfall.
+The matrix listens to the catalog, so an add/edit only rewrites that meal's
+row (and appends columns for new ingredients) instead of rebuilding.
+"""
+import threading
+import numpy as np
+from flask import current_app
+from .catalog import get_catalog
+from .statements import INGREDIENT_COLUMNS
+from .variables import fresh_ingredients, tinned_ingredients, dry_ingredients, dairy_ingredients, gram_list
+
+# Quantity used for "I have plenty of this"
+PLENTY = np.inf
+
+# Column-major storage: scoring gathers a few ingredient columns over all meals
+_INITIAL_ROWS = 256
+_INITIAL_COLUMNS = 64
+
+
+def ingredient_units():
+    """Returns {ingredient: unit} from the ingredient lists in variables.py."""
+    units = {}
+    for name, unit in fresh_ingredients + tinned_ingredients + dry_ingredients + dairy_ingredients:
+        units.setdefault(name, unit)
+    for name in gram_list:
+        units[name] = 'g'
+    return units
+
+
+def _quantity(value):
+    """Parses a stored quantity; anything unparseable counts as 1."""
+    try:
+        quantity = float(value)
+    except (TypeError, ValueError):
+        return 1.0
+    return quantity if quantity > 0 else 1.0
+
+
+class PantryMatrix:
+    """Meals × ingredients requirement matrix, maintained from the catalog."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._required = np.zeros((_INITIAL_ROWS, _INITIAL_COLUMNS), dtype=np.float64, order='F')
+        self._counts = np.zeros(_INITIAL_ROWS, dtype=np.int32)
+        self._active = np.zeros(_INITIAL_ROWS, dtype=bool)
+        self._columns = {}
+        self._column_names = []
+        self._rows = {}
+        self._row_names = [None] * _INITIAL_ROWS
+        self._free_rows = []
+        self._next_row = 0
+
+    def _column(self, ingredient):
+        column = self._columns.get(ingredient)
+        if column is None:
+            column = len(self._column_names)
+            if column >= self._required.shape[1]:
+                grown = np.zeros((self._required.shape[0], self._required.shape[1] * 2), dtype=np.float64, order='F')
+                grown[:, :self._required.shape[1]] = self._required
+                self._required = grown
+            self._columns[ingredient] = column
+            self._column_names.append(ingredient)
+        return column
+
+    def _allocate_row(self):
+        if self._free_rows:
+            return self._free_rows.pop()
+        row = self._next_row
+        if row >= self._required.shape[0]:
+            size = self._required.shape[0] * 2
+            required = np.zeros((size, self._required.shape[1]), dtype=np.float64, order='F')
+            required[:row] = self._required
+            self._required = required
+            self._counts = np.concatenate([self._counts, np.zeros(size - row, dtype=np.int32)])
+            self._active = np.concatenate([self._active, np.zeros(size - row, dtype=bool)])
+            self._row_names.extend([None] * (size - row))
+        self._next_row += 1
+        return row
+
+    def _add(self, record):
+        needs = {}
+        for column in INGREDIENT_COLUMNS:
+            for ingredient, value in record.ingredients[column].items():
+                needs[ingredient] = needs.get(ingredient, 0.0) + _quantity(value)
+        if not needs:
+            return
+        row = self._allocate_row()
+        for ingredient, quantity in needs.items():
+            column = self._column(ingredient)  # may grow the matrix, so look it up first
+            self._required[row, column] = quantity
+        self._counts[row] = len(needs)
+        self._active[row] = True
+        self._rows[record.meal_id] = row
+        self._row_names[row] = record.name
+
+    def _remove(self, record):
+        row = self._rows.pop(record.meal_id, None)
+        if row is None:
+            return
+        self._required[row, :] = 0
+        self._counts[row] = 0
+        self._active[row] = False
+        self._row_names[row] = None
+        self._free_rows.append(row)
+
+    def rebuild(self, records):
+        """Catalog listener: build the whole matrix."""
+        with self._lock:
+            self._reset()
+            for record in records:
+                self._add(record)
+
+    def update(self, old, new):
+        """Catalog listener: rewrite one meal's row."""
+        with self._lock:
+            if old is not None:
+                self._remove(old)
+            if new is not None:
+                self._add(new)
+
+    def rank(self, pantry, limit=20):
+        """
+        Ranks meals by how well the pantry covers them.
+
+        Parameters
+        ----------
+        pantry : dict
+            {ingredient: quantity on hand}; use PLENTY (or None) for "enough"
+        limit : int
+            number of meals to return (none for limit <= 0)
+
+        Returns
+        -------
+        list of dicts with name, coverage, missing, shortfall and short
+        (a list of (ingredient, quantity still needed) for that meal)
+        """
+        with self._lock:
+            rows = self._next_row
+            held = [(self._columns[name], PLENTY if quantity is None else float(quantity))
+                    for name, quantity in pantry.items() if name in self._columns]
+            active = self._active[:rows]
+            counts = self._counts[:rows]
+            if held:
+                columns = np.array([column for column, _ in held])
+                available = np.array([quantity for _, quantity in held])
+                required = self._required[:rows, columns]
+                needed = required > 0
+                satisfied = (needed & (required <= available)).sum(axis=1)
+                have = needed.sum(axis=1)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    partial = np.where(needed, np.clip(1 - available / required, 0, 1), 0).sum(axis=1)
+            else:
+                satisfied = have = np.zeros(rows, dtype=np.int32)
+                partial = np.zeros(rows)
+            missing = counts - have
+            coverage = np.where(counts > 0, satisfied / np.maximum(counts, 1), 0)
+            shortfall = missing + partial
+
+            candidates = np.flatnonzero(active)
+            order = np.lexsort((shortfall[candidates], missing[candidates], -coverage[candidates]))
+            top = candidates[order[:max(int(limit), 0)]]
+
+            pantry_quantities = {name: (PLENTY if quantity is None else float(quantity))
+                                 for name, quantity in pantry.items()}
+            results = []
+            for row in top:
+                short = []
+                for column in np.flatnonzero(self._required[row, :len(self._column_names)]):
+                    name = self._column_names[column]
+                    gap = self._required[row, column] - pantry_quantities.get(name, 0.0)
+                    if gap > 0:
+                        short.append((name, round(float(gap), 2)))
+                results.append({
+                    "name": self._row_names[row],
+                    "coverage": round(float(coverage[row]), 3),
+                    "missing": int(missing[row]),
+                    "shortfall": round(float(shortfall[row]), 3),
+                    "short": short,
+                })
+            return results
+
+
+def get_pantry_matrix():
+    """Returns the app's PantryMatrix, brought up to date with the catalog."""
+    get_catalog().refresh()
+    return current_app.extensions['pantry_matrix']
@@ -0,0 +1,94 @@
+"""
+Memoised meal-plan results.
+
+PlanCache is an LRU of computed plan pieces with a size budget in (estimated)
+bytes, PLAN_CACHE_BYTES in config.Config. Entries are keyed on the catalog
+version, so any add/edit/Last_Made write makes older entries unreachable and
+they age out:
+
+- collated ingredients : keyed on the plan's (meal, quantity) pairs in the
+                         order submitted; the totals' key order and their
+                         stepwise rounding follow that order, so the same
+                         week picked in another order is its own entry
+- meal info table      : keyed on the sorted meal names; the Book/Page/
+                         Website rows /display shows, built from the catalog
+
+A repeat plan costs one dict lookup for each. Cached values are shared, so
+callers copy before changing them.
+"""
+import json
+import threading
+from collections import OrderedDict
+from flask import current_app
+from .catalog import get_catalog
+
+DEFAULT_BUDGET_BYTES = 4 * 1024 * 1024
+
+
+def plan_key(meal_list, quantity_list):
+    """A plan as it is collated: (meal, quantity) pairs in the order submitted."""
+    return tuple(zip(meal_list, (int(quantity or 1) for quantity in quantity_list)))
+
+
+class PlanCache:
+    """Byte-budgeted LRU of plan results."""
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, key, value):
+        size = len(json.dumps(value, default=str))
+        if size > self.budget_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.budget_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+    def get_or_compute(self, kind, key, compute):
+        """
+        Returns the cached value for (kind, catalog version, key), computing
+        and storing it with compute() on a miss.
+        """
+        key = (kind, get_catalog().etag(), key)
+        value = self._get(key)
+        if value is None:
+            value = compute()
+            self._put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def info(self):
+        """Hit/miss counters and current size, for diagnostics."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries),
+                    "bytes": self._size, "budget_bytes": self.budget_bytes}
+
+
+def get_plan_cache():
+    """Returns the app's PlanCache."""
+    return current_app.extensions['plan_cache']
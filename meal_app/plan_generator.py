@@ -0,0 +1,197 @@
+"""
+Automatic meal-plan generator for /create.
+
+PlanGenerator picks `count` meals that satisfy the user's constraints
+(required / excluded tags, a maximum number of meals per staple, not made in
+the last N days) while maximising ingredient overlap, so the collated
+shopping list stays short.
+
+Overlap is the number of ingredient uses beyond the first, i.e. the sum over
+ingredients of (meals using it - 1). Adding a meal raises it by the number of
+its ingredients already in the plan (its "gain"), which makes scoring
+incremental:
+
+- greedy   : seed with the meal sharing most ingredients with the other
+             candidates, then repeatedly add the meal with the largest gain;
+             gains live in a NumPy array patched through ingredient postings
+- local    : swap a planned meal for an outside one while that raises the
+  search     overlap, until no swap helps or the time budget runs out
+
+The per-meal ingredient ids are kept up to date from the MealCatalog.
+"""
+import threading
+import time
+from datetime import date
+import numpy as np
+from flask import current_app
+from .catalog import get_catalog
+from .statements import INGREDIENT_COLUMNS
+from .variables import tag_list_backend
+
+DEFAULT_TIME_BUDGET_MS = 150
+
+# Random tie-break noise; below 1 so it never outweighs a shared ingredient
+_TIE_BREAK = 0.5
+
+
+class PlanGenerator:
+    """Constraint-aware, overlap-maximising plan builder over the catalog."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meals = {}
+        self._ingredient_ids = {}
+
+    def _ingredients(self, record):
+        ids = set()
+        for column in INGREDIENT_COLUMNS:
+            for ingredient in record.ingredients[column]:
+                ids.add(self._ingredient_ids.setdefault(ingredient, len(self._ingredient_ids)))
+        return np.array(sorted(ids), dtype=np.int32)
+
+    def rebuild(self, records):
+        """Catalog listener: index every meal's ingredients."""
+        with self._lock:
+            self._meals = {}
+            for record in records:
+                self._meals[record.meal_id] = (record, self._ingredients(record))
+
+    def update(self, old, new):
+        """Catalog listener: re-index one meal."""
+        with self._lock:
+            if old is not None:
+                self._meals.pop(old.meal_id, None)
+            if new is not None:
+                self._meals[new.meal_id] = (new, self._ingredients(new))
+
+    def _candidates(self, required_tags, excluded_tags, not_made_days, today):
+        required = [tag_list_backend.index(tag) for tag in required_tags]
+        excluded = [tag_list_backend.index(tag) for tag in excluded_tags]
+        cutoff = today.toordinal() - not_made_days if not_made_days else None
+        candidates = []
+        for record, ingredients in self._meals.values():
+            flags = record.tag_flags
+            if any(flags[i] != 1 for i in required) or any(flags[i] == 1 for i in excluded):
+                continue
+            if cutoff is not None and record.last_made and record.last_made.toordinal() > cutoff:
+                continue
+            candidates.append((record, ingredients))
+        return candidates
+
+    def generate(self, count, required_tags=(), excluded_tags=(), max_per_staple=None,
+                 not_made_days=None, time_budget_ms=DEFAULT_TIME_BUDGET_MS, today=None, rng=None):
+        """
+        Builds a meal plan.
+
+        Parameters
+        ----------
+        count : int
+            number of meals in the plan
+        required_tags, excluded_tags : iterable of str
+            tag columns (e.g. "Quick_Easy") every meal must have / must not have
+        max_per_staple : int or None
+            most meals allowed with the same staple
+        not_made_days : int or None
+            skip meals made within this many days
+        time_budget_ms : float
+            time allowed for the local search
+        today : datetime.date or None
+        rng : numpy.random.Generator or None
+            tie-break source, so equal plans vary between requests
+
+        Returns
+        -------
+        (list of meal names, overlap score)
+        """
+        started = time.perf_counter()
+        today = today or date.today()
+        rng = rng or np.random.default_rng()
+        with self._lock:
+            candidates = self._candidates(required_tags, excluded_tags, not_made_days, today)
+            ingredient_total = len(self._ingredient_ids)
+        if not candidates or count <= 0:
+            return [], 0
+
+        # CSR incidence (candidate -> ingredient ids) and its transpose (postings)
+        lengths = np.array([len(ingredients) for _, ingredients in candidates], dtype=np.int64)
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        indices = np.concatenate([ingredients for _, ingredients in candidates]) if indptr[-1] else np.zeros(0, np.int32)
+        owners = np.repeat(np.arange(len(candidates)), lengths)
+        order = np.argsort(indices, kind="stable")
+        posting_ptr = np.searchsorted(indices[order], np.arange(ingredient_total + 1))
+        posting_rows = owners[order]
+
+        def posting(ingredient):
+            return posting_rows[posting_ptr[ingredient]:posting_ptr[ingredient + 1]]
+
+        staple_codes = {}
+        staples = np.array([staple_codes.setdefault(record.staple or "", len(staple_codes))
+                            for record, _ in candidates])
+        cap = max_per_staple if max_per_staple else len(candidates)
+        staple_counts = np.zeros(len(staple_codes), dtype=np.int64)
+
+        uses = np.zeros(ingredient_total, dtype=np.int64)
+        gains = np.zeros(len(candidates), dtype=np.float64)
+        chosen = np.zeros(len(candidates), dtype=bool)
+        noise = rng.random(len(candidates)) * _TIE_BREAK
+
+        def add(row):
+            chosen[row] = True
+            staple_counts[staples[row]] += 1
+            for ingredient in indices[indptr[row]:indptr[row + 1]]:
+                if uses[ingredient] == 0:
+                    gains[posting(ingredient)] += 1
+                uses[ingredient] += 1
+
+        def remove(row):
+            chosen[row] = False
+            staple_counts[staples[row]] -= 1
+            for ingredient in indices[indptr[row]:indptr[row + 1]]:
+                uses[ingredient] -= 1
+                if uses[ingredient] == 0:
+                    gains[posting(ingredient)] -= 1
+
+        # Greedy: seed by how widely the meal's ingredients are shared, then max gain
+        frequency = np.bincount(indices, minlength=ingredient_total)
+        shared = np.zeros(len(candidates))
+        np.add.at(shared, owners, frequency[indices] - 1)
+        add(int(np.argmax(shared + noise)))
+        while chosen.sum() < count:
+            allowed = ~chosen & (staple_counts[staples] < cap)
+            if not allowed.any():
+                break
+            add(int(np.argmax(np.where(allowed, gains + noise, -np.inf))))
+
+        # Local search: best swap for each planned meal in turn
+        deadline = started + time_budget_ms / 1000
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for row in np.flatnonzero(chosen):
+                if time.perf_counter() >= deadline:
+                    break
+                own = indices[indptr[row]:indptr[row + 1]]
+                loss = int((uses[own] >= 2).sum())
+                # gains as if row were gone: its sole ingredients stop counting
+                trial = gains.copy()
+                for ingredient in own[uses[own] == 1]:
+                    trial[posting(ingredient)] -= 1
+                room = staple_counts[staples] - (staples == staples[row]) < cap
+                allowed = ~chosen & room
+                if not allowed.any():
+                    continue
+                best = int(np.argmax(np.where(allowed, trial, -np.inf)))
+                if trial[best] > loss:
+                    remove(row)
+                    add(best)
+                    improved = True
+
+        overlap = int((uses[uses > 0] - 1).sum())
+        names = [candidates[row][0].name for row in np.flatnonzero(chosen)]
+        return sorted(names), overlap
+
+
+def get_plan_generator():
+    """Returns the app's PlanGenerator, brought up to date with the catalog."""
+    get_catalog().refresh()
+    return current_app.extensions['plan_generator']
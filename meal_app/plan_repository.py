@@ -0,0 +1,150 @@
+"""
+Saved meal plans, stored in the SavedPlans table (migration 3).
+
+Each plan is one row: an auto-increment id, a display name, when it was
+saved, how many meals it has and the plan itself as compact JSON. Saving is
+a single INSERT in the request's transaction, so two saves in the same
+minute are two plans rather than one file overwriting another. Listing reads
+only the small columns through ix_saved_plans_created; loading and deleting
+go by primary key. Plans live in the app database, so every app node sees
+the same ones.
+
+database_setup/import_saved_plans.py moves plans saved by older versions
+(JSON files in saved_meal_plans/) into the table.
+
+SavedPlanSearch (migration 4) is a full-text side index of each plan's meal
+names and ingredient names, written and deleted together with the plan:
+an FTS5 table on SQLite, a FULLTEXT index on MySQL. search_plans() answers
+"plans with Mushroom Risotto" from it without reading any payloads.
+"""
+import json
+from datetime import datetime
+from .statements import INGREDIENT_COLUMNS
+from .utilities import execute_mysql_query, execute_named_query, compile_statement
+
+# Default name for a saved plan, as the old saved_meal_plans file names were
+PLAN_NAME_FORMAT = "%Y-%m-%d %H:%M"
+
+SEARCH_LIMIT = 50
+
+# The SavedPlanSearch column holding the plan id (FTS5 tables key on rowid)
+_SEARCH_KEY = {"sqlite": "rowid", "mysql": "Plan_ID"}
+
+
+def _dialect():
+    from . import db
+    return db.engine.dialect.name
+
+
+def plan_search_text(complete_ingredient_dict):
+    """Returns (meal names, ingredient names) of a plan as text for the full-text index."""
+    meals = "\n".join(str(meal) for meal in complete_ingredient_dict.get('Meal_List') or [])
+    ingredients = []
+    for column in INGREDIENT_COLUMNS:
+        ingredients.extend(complete_ingredient_dict.get(column) or {})
+    ingredients.extend(complete_ingredient_dict.get('Extra_Ingredients') or [])
+    return meals, "\n".join(str(ingredient) for ingredient in ingredients)
+
+
+def _search_insert(dialect):
+    return (f"INSERT INTO SavedPlanSearch ({_SEARCH_KEY[dialect]}, Meals, Ingredients) "
+            "VALUES (:plan_id, :meals, :ingredients)")
+
+
+def _search_params(plan_id, complete_ingredient_dict):
+    meals, ingredients = plan_search_text(complete_ingredient_dict)
+    return {"plan_id": plan_id, "meals": meals, "ingredients": ingredients}
+
+
+def index_plans(conn, plans):
+    """Adds [(plan id, plan dict)] to SavedPlanSearch on conn (migration backfill)."""
+    if plans:
+        conn.execute(compile_statement(_search_insert(conn.dialect.name), conn.dialect.name),
+                     [_search_params(plan_id, plan) for plan_id, plan in plans])
+
+
+def search_query(text, dialect):
+    """
+    Turns the search box text into a full-text query: every comma-separated
+    term must match, each as a phrase, the last one as a prefix on SQLite.
+    """
+    terms = [" ".join(term.split()) for term in text.split(",")]
+    terms = [term.replace('"', '') for term in terms if term.strip()]
+    if not terms:
+        return None
+    if dialect == "sqlite":
+        phrases = [f'"{term}"' for term in terms]
+        phrases[-1] += "*"
+        return " AND ".join(phrases)
+    return " ".join(f'+"{term}"' for term in terms)
+
+
+def save_plan(complete_ingredient_dict, name=None, created_at=None):
+    """
+    Saves a plan and returns its id.
+
+    Parameters
+    ----------
+    complete_ingredient_dict : dict
+        the plan as /display shows it (ingredient columns, Extra_Ingredients, Meal_List)
+    name : str or None
+        display name; defaults to the save time
+    created_at : datetime or None
+        defaults to now
+
+    Returns
+    -------
+    int
+    """
+    created_at = (created_at or datetime.now()).replace(microsecond=0)
+    plan_id = execute_named_query("saved_plan_insert", {
+        "name": (name or created_at.strftime(PLAN_NAME_FORMAT))[:100],
+        "created_at": created_at,
+        "meal_count": len(complete_ingredient_dict.get('Meal_List') or []),
+        "payload": json.dumps(complete_ingredient_dict, separators=(",", ":")),
+    }, fetch="lastrowid")
+    execute_mysql_query(_search_insert(_dialect()), _search_params(plan_id, complete_ingredient_dict), fetch="none")
+    return plan_id
+
+
+def list_plans():
+    """Returns [{Plan_ID, Name, Created_At, Meal_Count}], newest first."""
+    return execute_named_query("saved_plans_list", fetch="all") or []
+
+
+def search_plans(text, limit=SEARCH_LIMIT):
+    """
+    Returns saved plans whose meals or ingredients match text, best match
+    first, as [{Plan_ID, Name, Created_At, Meal_Count}].
+    """
+    dialect = _dialect()
+    query = search_query(text, dialect)
+    if query is None:
+        return []
+    return execute_named_query(f"saved_plans_search_{dialect}", {"query": query, "limit": limit}, fetch="all") or []
+
+
+def load_plan(plan_id):
+    """Returns (name, plan dict) for a saved plan, or (None, None) if there's no such plan."""
+    row = execute_named_query("saved_plan_by_id", {"plan_id": plan_id}, fetch="one")
+    if not row:
+        return None, None
+    return row['Name'], json.loads(row['Payload'])
+
+
+def delete_plans(plan_ids):
+    """Deletes the saved plans with these ids."""
+    plan_ids = [int(plan_id) for plan_id in plan_ids]
+    if not plan_ids:
+        return
+    placeholders = ", ".join(f":p{i}" for i in range(len(plan_ids)))
+    params = {f"p{i}": plan_id for i, plan_id in enumerate(plan_ids)}
+    execute_mysql_query(f"DELETE FROM SavedPlans WHERE Plan_ID IN ({placeholders})", params, fetch="none")
+    execute_mysql_query(
+        f"DELETE FROM SavedPlanSearch WHERE {_SEARCH_KEY[_dialect()]} IN ({placeholders})", params, fetch="none")
+
+
+def plan_exists(name, created_at):
+    """True if a plan with this name and save time is already stored (used by the importer)."""
+    row = execute_named_query("saved_plan_exists", {"name": name, "created_at": created_at}, fetch="one")
+    return row is not None
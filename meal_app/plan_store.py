@@ -0,0 +1,252 @@
+"""
+Server-side store for per-user plan payloads.
+
+The signed cookie session used to carry the whole shopping list
+(complete_ingredient_dict) and the /search results list, so big plans
+inflated every request and were serialised, signed and verified each time.
+Payloads now live in a PlanStore keyed by a short random id; the session
+only holds that id.
+
+Two backends, chosen with PLAN_STORE in config.Config:
+
+- "sqlite" : one table in a local SQLite file (PLAN_STORE_PATH), WAL mode
+- "file"   : one JSON file per payload in the PLAN_STORE_PATH directory
+
+Entries expire PLAN_STORE_TTL seconds after they were last read or written.
+Every COMPACT_EVERY writes the store drops expired entries (and the SQLite
+backend, whose file is kept in auto_vacuum = INCREMENTAL mode, returns the
+freed pages to the filesystem).
+
+Views use stash(name, payload) / unstash(name) / take(name) rather than the
+store itself; PLAN_ID and SEARCH_RESULTS_ID are the session keys they use.
+stash overwrites the payload under the id the session already holds, so
+re-planning doesn't leave the previous plan behind until it expires.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from secrets import token_urlsafe
+from flask import current_app, session
+
+DEFAULT_TTL = 7 * 24 * 60 * 60
+COMPACT_EVERY = 100
+
+# Session keys holding store ids
+PLAN_ID = 'plan_id'
+SEARCH_RESULTS_ID = 'search_results_id'
+
+# PRAGMA auto_vacuum value for INCREMENTAL
+_INCREMENTAL_VACUUM = 2
+
+
+def new_plan_id():
+    """A short URL-safe id (12 characters, 72 random bits)."""
+    return token_urlsafe(9)
+
+
+class PlanStore(ABC):
+    """Base class: TTL bookkeeping and periodic compaction."""
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+        self._writes = 0
+        self._write_lock = threading.Lock()
+
+    def put(self, payload, plan_id=None):
+        """Stores payload (JSON-serialisable) and returns its id."""
+        plan_id = plan_id or new_plan_id()
+        self._write(plan_id, json.dumps(payload), time.time() + self.ttl)
+        with self._write_lock:
+            self._writes += 1
+            compact = self._writes % COMPACT_EVERY == 0
+        if compact:
+            self.compact()
+        return plan_id
+
+    def get(self, plan_id):
+        """Returns the payload stored under plan_id (extending its expiry), or None."""
+        if not plan_id or not isinstance(plan_id, str):
+            return None
+        raw = self._read(plan_id, time.time(), time.time() + self.ttl)
+        return json.loads(raw) if raw is not None else None
+
+    @abstractmethod
+    def _write(self, plan_id, raw, expires_at):
+        """Stores raw JSON under plan_id (replacing any payload there) until expires_at."""
+
+    @abstractmethod
+    def _read(self, plan_id, now, expires_at):
+        """Returns the raw JSON under plan_id unless it expired by now, moving its expiry to expires_at."""
+
+    @abstractmethod
+    def delete(self, plan_id):
+        """Removes the payload under plan_id, if any."""
+
+    @abstractmethod
+    def compact(self):
+        """Removes expired entries; returns how many were removed."""
+
+
+class SQLitePlanStore(PlanStore):
+    """Payloads in a table of a local SQLite file."""
+
+    def __init__(self, path, ttl=DEFAULT_TTL):
+        super().__init__(ttl)
+        self.path = str(path)
+        self._local = threading.local()
+        conn = self._connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != _INCREMENTAL_VACUUM:
+            # on a file that already has tables the mode only changes when VACUUM rebuilds it
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS PlanStore (
+                  Plan_ID    TEXT PRIMARY KEY,
+                  Payload    TEXT NOT NULL,
+                  Expires_At REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_plan_store_expires ON PlanStore (Expires_At)")
+
+    def _connection(self):
+        # sqlite3 connections are per thread; each commits on leaving a with block
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, plan_id, raw, expires_at):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO PlanStore (Plan_ID, Payload, Expires_At) VALUES (?, ?, ?)",
+                (plan_id, raw, expires_at))
+
+    def _read(self, plan_id, now, expires_at):
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT Payload FROM PlanStore WHERE Plan_ID = ? AND Expires_At > ?", (plan_id, now)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE PlanStore SET Expires_At = ? WHERE Plan_ID = ?", (expires_at, plan_id))
+        return row[0] if row else None
+
+    def delete(self, plan_id):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM PlanStore WHERE Plan_ID = ?", (plan_id,))
+
+    def compact(self):
+        with self._connection() as conn:
+            removed = conn.execute("DELETE FROM PlanStore WHERE Expires_At <= ?", (time.time(),)).rowcount
+        # execute() stops the pragma after its first step (one page); executescript runs it to the end
+        self._connection().executescript("PRAGMA incremental_vacuum;")
+        return removed
+
+
+class FilePlanStore(PlanStore):
+    """Payloads as <id>.json files in a directory; a file's mtime is its last use."""
+
+    def __init__(self, directory, ttl=DEFAULT_TTL):
+        super().__init__(ttl)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, plan_id):
+        # ids are token_urlsafe, so anything else can't name a stored plan
+        if not plan_id.replace("-", "").replace("_", "").isalnum():
+            return None
+        return self.directory / f"{plan_id}.json"
+
+    def _write(self, plan_id, raw, expires_at):
+        path = self._path(plan_id)
+        if path is None:
+            raise ValueError(f"Not a plan id: {plan_id!r}")
+        # a temporary file of its own, so concurrent writes of one id don't share it
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.directory, prefix=f"{plan_id}.",
+                                         suffix=".tmp", delete=False) as temporary:
+            temporary.write(raw)
+        try:
+            os.replace(temporary.name, path)
+        except OSError:
+            os.unlink(temporary.name)
+            raise
+        last_used = expires_at - self.ttl
+        os.utime(path, (last_used, last_used))
+
+    def _read(self, plan_id, now, expires_at):
+        path = self._path(plan_id)
+        try:
+            if path is None or path.stat().st_mtime + self.ttl <= now:
+                return None
+            raw = path.read_text(encoding="utf-8")
+            os.utime(path, (now, now))
+        except FileNotFoundError:
+            return None
+        return raw
+
+    def delete(self, plan_id):
+        path = self._path(plan_id)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def compact(self):
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for path in self.directory.glob("*.json"):
+            try:
+                if path.stat().st_mtime <= cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+
+PLAN_STORES = {"sqlite": SQLitePlanStore, "file": FilePlanStore}
+
+
+def create_plan_store(config):
+    """Builds the store named by config PLAN_STORE ("sqlite" or "file")."""
+    kind = config.get('PLAN_STORE', 'sqlite')
+    try:
+        store_class = PLAN_STORES[kind]
+    except KeyError:
+        raise ValueError(f"Unknown PLAN_STORE '{kind}' (expected one of {', '.join(PLAN_STORES)})") from None
+    default_path = "plan_store.db" if kind == "sqlite" else "plan_store"
+    return store_class(config.get('PLAN_STORE_PATH') or default_path, config.get('PLAN_STORE_TTL', DEFAULT_TTL))
+
+
+def get_plan_store():
+    """Returns the app's PlanStore."""
+    return current_app.extensions['plan_store']
+
+
+def stash(name, payload):
+    """
+    Stores payload server-side and keeps only its id in the session under
+    name, reusing the id already there so the previous payload is replaced.
+    """
+    plan_id = session.get(name)
+    session[name] = get_plan_store().put(payload, plan_id if isinstance(plan_id, str) else None)
+    return session[name]
+
+
+def unstash(name):
+    """Returns the payload whose id the session holds under name, or None."""
+    return get_plan_store().get(session.get(name))
+
+
+def take(name):
+    """Like unstash, but forgets the payload (for one-shot results)."""
+    plan_id = session.pop(name, None)
+    payload = get_plan_store().get(plan_id)
+    if plan_id:
+        get_plan_store().delete(plan_id)
+    return payload
@@ -0,0 +1,127 @@
+"""
+Per-request query instrumentation.
+
+execute_mysql_query reports every statement it runs to record_query. At the
+end of each request report_request_queries logs the count and total time,
+adds a Server-Timing header, logs slow statements together with their
+EXPLAIN plan, and flags N+1 patterns: the same statement run repeatedly with
+only its parameters changing (e.g. one SELECT per meal in a plan).
+
+Config keys (see config.Config):
+  SLOW_QUERY_MS          - statements slower than this are logged with EXPLAIN
+  N_PLUS_ONE_THRESHOLD   - repeats of one statement before it is flagged
+  N_PLUS_ONE_WARNINGS    - in debug mode, also raise NPlusOneWarning
+"""
+import re
+import time
+import warnings
+from flask import g, current_app, has_request_context, request
+from sqlalchemy import text
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class NPlusOneWarning(UserWarning):
+    """Raised in debug mode when a request repeats one statement N times."""
+
+
+def normalise_statement(query_string):
+    """
+    Collapses whitespace and replaces literals with ? so that statements
+    differing only in their values group together.
+    """
+    statement = _STRING_LITERAL.sub("?", query_string)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    return _WHITESPACE.sub(" ", statement).strip().rstrip(";")
+
+
+def record_query(query_string, params, started):
+    """Adds one executed statement to the current request's query log."""
+    if not has_request_context():
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    log = g.get('_query_log')
+    if log is None:
+        log = g._query_log = []
+    log.append((query_string, dict(params or {}), elapsed_ms))
+
+
+def request_query_stats():
+    """
+    Returns the current request's query statistics.
+
+    Returns
+    -------
+    dict with count, total_ms and statements (list of (sql, params, ms))
+    """
+    log = g.get('_query_log') or []
+    return {
+        "count": len(log),
+        "total_ms": sum(ms for _, _, ms in log),
+        "statements": list(log),
+    }
+
+
+def explain_statement(query_string, params):
+    """
+    Returns the EXPLAIN plan rows for a SELECT, or None if it can't be explained.
+    The EXPLAIN runs directly on the request's connection, so it neither takes
+    a slot in the statement cache nor shows up in the query log.
+    """
+    from .utilities import _request_connection
+    if not query_string.lstrip().upper().startswith("SELECT"):
+        return None
+    conn = _request_connection()
+    if conn.dialect.name == "sqlite":
+        from .sqlite_backend import translate_mysql
+        statement = "EXPLAIN QUERY PLAN " + translate_mysql(query_string)
+    else:
+        statement = "EXPLAIN " + query_string
+    try:
+        result = conn.execute(text(statement), params)
+        keys = list(result.keys())
+        return [dict(zip(keys, row)) for row in result]
+    except Exception as exc:
+        return [{"error": str(exc)}]
+
+
+def find_repeated_statements(log, threshold):
+    """Groups the log by normalised statement and returns those run at least threshold times."""
+    counts = {}
+    for query_string, _, _ in log:
+        key = normalise_statement(query_string)
+        counts[key] = counts.get(key, 0) + 1
+    return {statement: count for statement, count in counts.items() if count >= threshold}
+
+
+def report_request_queries(response):
+    """after_request hook: logs the request's query summary, slow queries and N+1 patterns."""
+    log = g.pop('_query_log', None)
+    if not log:
+        return response
+
+    config = current_app.config
+    logger = current_app.logger
+    total_ms = sum(ms for _, _, ms in log)
+    response.headers.add('Server-Timing', f'db;dur={total_ms:.1f};desc="{len(log)} queries"')
+    logger.debug("%s %s: %d queries in %.1f ms", request.method, request.path, len(log), total_ms)
+
+    slow_ms = config.get('SLOW_QUERY_MS', 100)
+    for query_string, params, ms in log:
+        if ms >= slow_ms:
+            logger.warning("Slow query (%.1f ms): %s params=%s explain=%s",
+                           ms, normalise_statement(query_string), params,
+                           explain_statement(query_string, params))
+
+    threshold = config.get('N_PLUS_ONE_THRESHOLD', 3)
+    for statement, count in find_repeated_statements(log, threshold).items():
+        message = f"Possible N+1: statement ran {count} times in one request: {statement}"
+        logger.warning(message)
+        if current_app.debug and config.get('N_PLUS_ONE_WARNINGS', False):
+            warnings.warn(message, NPlusOneWarning)
+
+    # the EXPLAINs above were logged too; drop them so they aren't reported twice
+    g.pop('_query_log', None)
+    return response
@@ -0,0 +1,180 @@
+"""
+Recency-weighted meal suggestions for /inspire.
+
+MealRecommender keeps one row of features per meal in NumPy arrays: the
+Last_Made day (as a date ordinal), the four tag flags and a staple code. The
+arrays listen to the MealCatalog, so "Update Dates" and edits only rewrite
+the affected rows. A request scores every meal in a few vectorised operations
+and picks the top N with argpartition:
+
+- recency   : days since the meal was last made, capped at RECENCY_CAP_DAYS
+              (never-made meals count as the cap)
+- season    : 1 if tagged for the current season, 0.5 if it has no season
+              tag, 0 if it is only tagged for the other season
+- diversity : 1 minus the share of meals made in the last RECENT_DAYS that
+              had the same staple
+- jitter    : optional uniform noise so repeated requests vary
+
+The score is the WEIGHTS-weighted sum of these, each in [0, 1].
+"""
+import threading
+from datetime import date
+import numpy as np
+from flask import current_app
+from .catalog import get_catalog
+from .variables import tag_list_backend
+
+WEIGHTS = {"recency": 0.5, "season": 0.3, "diversity": 0.2, "jitter": 0.15}
+RECENCY_CAP_DAYS = 90
+RECENT_DAYS = 14
+
+# Months counted as Spring/Summer; the rest are Autumn/Winter
+SPRING_SUMMER_MONTHS = range(3, 9)
+
+_NEVER = -1
+_INITIAL_ROWS = 256
+_SEASON_TAGS = ["Spring_Summer", "Autumn_Winter"]
+
+
+def current_season(day=None):
+    """Returns the season tag column ("Spring_Summer" / "Autumn_Winter") for a date."""
+    day = day or date.today()
+    return "Spring_Summer" if day.month in SPRING_SUMMER_MONTHS else "Autumn_Winter"
+
+
+class MealRecommender:
+    """Per-meal feature arrays for /inspire, maintained from the catalog."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._last_made = np.full(_INITIAL_ROWS, _NEVER, dtype=np.int64)
+        self._tags = np.zeros((_INITIAL_ROWS, len(tag_list_backend)), dtype=bool)
+        self._staples = np.zeros(_INITIAL_ROWS, dtype=np.int32)
+        self._active = np.zeros(_INITIAL_ROWS, dtype=bool)
+        self._staple_codes = {}
+        self._rows = {}
+        self._records = [None] * _INITIAL_ROWS
+        self._free_rows = []
+        self._next_row = 0
+
+    def _staple_code(self, staple):
+        return self._staple_codes.setdefault(staple or "", len(self._staple_codes))
+
+    def _allocate_row(self):
+        if self._free_rows:
+            return self._free_rows.pop()
+        row = self._next_row
+        if row >= len(self._active):
+            extra = len(self._active)
+            self._last_made = np.concatenate([self._last_made, np.full(extra, _NEVER, dtype=np.int64)])
+            self._tags = np.concatenate([self._tags, np.zeros((extra, self._tags.shape[1]), dtype=bool)])
+            self._staples = np.concatenate([self._staples, np.zeros(extra, dtype=np.int32)])
+            self._active = np.concatenate([self._active, np.zeros(extra, dtype=bool)])
+            self._records.extend([None] * extra)
+        self._next_row += 1
+        return row
+
+    def _add(self, record):
+        row = self._allocate_row()
+        self._last_made[row] = record.last_made.toordinal() if record.last_made else _NEVER
+        self._tags[row] = [flag == 1 for flag in record.tag_flags]
+        self._staples[row] = self._staple_code(record.staple)
+        self._active[row] = True
+        self._rows[record.meal_id] = row
+        self._records[row] = record
+
+    def _remove(self, record):
+        row = self._rows.pop(record.meal_id, None)
+        if row is None:
+            return
+        self._active[row] = False
+        self._records[row] = None
+        self._free_rows.append(row)
+
+    def rebuild(self, records):
+        """Catalog listener: build every meal's features."""
+        with self._lock:
+            self._reset()
+            for record in records:
+                self._add(record)
+
+    def update(self, old, new):
+        """Catalog listener: rewrite one meal's features."""
+        with self._lock:
+            if old is not None:
+                self._remove(old)
+            if new is not None:
+                self._add(new)
+
+    def recommend(self, tag=None, limit=10, jitter=False, today=None, rng=None):
+        """
+        Ranks meals for "inspire me".
+
+        Parameters
+        ----------
+        tag : str or None
+            tag column (e.g. "Quick_Easy") the meals must have; None for any meal
+        limit : int
+            number of suggestions
+        jitter : bool
+            add random noise to the score
+        today : datetime.date or None
+            date to score against (defaults to today)
+        rng : numpy.random.Generator or None
+            source of the jitter
+
+        Returns
+        -------
+        list of (MealRecord, score) pairs, best first
+        """
+        today = today or date.today()
+        with self._lock:
+            rows = self._next_row
+            candidates = self._active[:rows].copy()
+            if tag is not None:
+                candidates &= self._tags[:rows, tag_list_backend.index(tag)]
+            candidates = np.flatnonzero(candidates)
+            if not len(candidates) or limit <= 0:
+                return []
+
+            last_made = self._last_made[candidates]
+            never = last_made == _NEVER
+            days = np.where(never, RECENCY_CAP_DAYS, today.toordinal() - last_made)
+            recency = np.clip(days, 0, RECENCY_CAP_DAYS) / RECENCY_CAP_DAYS
+
+            season = current_season(today)
+            other = _SEASON_TAGS[1 - _SEASON_TAGS.index(season)]
+            tags = self._tags[candidates]
+            in_season = tags[:, tag_list_backend.index(season)]
+            off_season = tags[:, tag_list_backend.index(other)]
+            season_score = np.where(in_season, 1.0, np.where(off_season, 0.0, 0.5))
+
+            # Staples of meals made recently (across all meals, not just the tag)
+            active = self._active[:rows]
+            made = self._last_made[:rows]
+            recent = active & (made != _NEVER) & (today.toordinal() - made <= RECENT_DAYS)
+            staple_counts = np.bincount(self._staples[:rows][recent], minlength=len(self._staple_codes))
+            diversity = 1 - staple_counts[self._staples[candidates]] / max(int(recent.sum()), 1)
+
+            score = (WEIGHTS["recency"] * recency
+                     + WEIGHTS["season"] * season_score
+                     + WEIGHTS["diversity"] * diversity)
+            if jitter:
+                rng = rng or np.random.default_rng()
+                score = score + WEIGHTS["jitter"] * rng.random(len(candidates))
+
+            if limit < len(candidates):
+                top = np.argpartition(-score, limit - 1)[:limit]
+            else:
+                top = np.arange(len(candidates))
+            top = top[np.argsort(-score[top], kind="stable")]
+            return [(self._records[candidates[i]], round(float(score[i]), 3)) for i in top]
+
+
+def get_recommender():
+    """Returns the app's MealRecommender, brought up to date with the catalog."""
+    get_catalog().refresh()
+    return current_app.extensions['meal_recommender']
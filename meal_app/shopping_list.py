@@ -0,0 +1,138 @@
+"""
+Vectorised shopping-list aggregation.
+
+ShoppingListEngine interns every (ingredient column, ingredient) pair to an
+integer id and keeps each meal's quantities as a sparse vector (ids, values),
+parsed once from the MealCatalog. collate() totals a whole plan with one
+np.bincount over the concatenated, quantity-scaled vectors and rounds once at
+the end.
+
+The result is identical to the per-meal pipeline it replaces (one query per
+meal, each quantity scaled, then totals rounded to 2 dp after every
+addition): when every scaled quantity is a whole number of hundredths the two
+agree exactly, and any ingredient with a finer contribution is re-added one
+step at a time in plan order, as the original does. Keys keep the order in
+which the original pipeline first meets them.
+"""
+import threading
+import numpy as np
+from flask import current_app
+from .catalog import get_catalog
+from .statements import INGREDIENT_COLUMNS
+
+# Scaled quantities within this many hundredths of a whole number count as
+# exact. Absolute, not relative to the quantity: it only has to absorb float
+# error in value * 100 (a few ulps), while a real fraction of a hundredth in
+# a quantity typed with up to 6 dp is far larger. Where the error itself
+# exceeds it (quantities beyond ~1e7) the ingredient is simply replayed.
+_HUNDREDTHS_TOLERANCE = 1e-6
+
+
+def _normalise(total):
+    """Rounds a running total as the per-meal pipeline did (2 dp, 2.0 -> 2)."""
+    total = round(float(total), 2)
+    return int(total) if total.is_integer() else total
+
+
+class ShoppingListEngine:
+    """Interned sparse ingredient vectors per meal, maintained from the catalog."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._keys = []
+        self._vectors = {}
+
+    def _intern(self, column, ingredient):
+        key = (column, ingredient)
+        ingredient_id = self._ids.get(key)
+        if ingredient_id is None:
+            ingredient_id = self._ids[key] = len(self._keys)
+            self._keys.append(key)
+        return ingredient_id
+
+    def _vector(self, record):
+        ids, values = [], []
+        for column in INGREDIENT_COLUMNS:
+            ingredients = record.ingredients[column]
+            if not isinstance(ingredients, dict):
+                continue
+            for ingredient, value in ingredients.items():
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    # the per-meal pipeline dropped non-numeric quantities
+                    continue
+                ids.append(self._intern(column, ingredient))
+                values.append(value)
+        return np.array(ids, dtype=np.int64), np.array(values, dtype=np.float64)
+
+    def rebuild(self, records):
+        """Catalog listener: vectorise every meal."""
+        with self._lock:
+            self._vectors = {record.name: self._vector(record) for record in records}
+
+    def update(self, old, new):
+        """Catalog listener: re-vectorise one meal (handles renames)."""
+        with self._lock:
+            if old is not None:
+                self._vectors.pop(old.name, None)
+            if new is not None:
+                self._vectors[new.name] = self._vector(new)
+
+    def collate(self, meal_list, quantity_list):
+        """
+        Totals the ingredients of a plan.
+
+        Parameters
+        ----------
+        meal_list : list of str
+            meal names (unknown names are skipped)
+        quantity_list : list
+            how many times each meal is made
+
+        Returns
+        -------
+        {ingredient column: {ingredient: total}}
+        """
+        complete_ingredient_dict = {column: {} for column in INGREDIENT_COLUMNS}
+        with self._lock:
+            vectors = []
+            for meal, quantity in zip(meal_list, quantity_list):
+                vector = self._vectors.get(meal)
+                if vector is not None:
+                    vectors.append((vector, float(quantity or 1)))
+            if not vectors:
+                return complete_ingredient_dict
+            keys = self._keys
+            ids = np.concatenate([vector_ids for (vector_ids, _), _ in vectors])
+            values = np.concatenate([vector_values * factor for (_, vector_values), factor in vectors])
+
+        if not len(ids):
+            return complete_ingredient_dict
+
+        totals = np.bincount(ids, weights=values, minlength=len(keys))
+
+        # Ingredients with a contribution finer than 0.01 need the step-by-step rounding
+        cents = values * 100
+        inexact = np.abs(cents - np.round(cents)) > _HUNDREDTHS_TOLERANCE
+        stepwise = {}
+        if inexact.any():
+            replay = np.isin(ids, ids[inexact])
+            for ingredient_id, value in zip(ids[replay].tolist(), values[replay].tolist()):
+                stepwise[ingredient_id] = _normalise(stepwise.get(ingredient_id, 0) + value)
+
+        # Output in order of first appearance, grouped by ingredient column
+        unique_ids, first = np.unique(ids, return_index=True)
+        for ingredient_id in unique_ids[np.argsort(first, kind="stable")]:
+            column, ingredient = keys[ingredient_id]
+            total = stepwise.get(ingredient_id)
+            complete_ingredient_dict[column][ingredient] = (
+                total if total is not None else _normalise(totals[ingredient_id]))
+        return complete_ingredient_dict
+
+
+def get_shopping_list_engine():
+    """Returns the app's ShoppingListEngine, brought up to date with the catalog."""
+    get_catalog().refresh()
+    return current_app.extensions['shopping_list_engine']
@@ -0,0 +1,166 @@
+"""
+Embedded SQLite backend.
+
+Selected with DATABASE_BACKEND = "sqlite" in config.Config (or the
+MEALS_DB_BACKEND environment variable). The app keeps its MySQL-flavoured
+SQL; this module makes SQLite understand it:
+
+- JSON_EXTRACT comes from SQLite's JSON1 extension; JSON_LENGTH and an
+  ordered GROUP_CONCAT are registered as custom functions on each connection
+- translate_mysql rewrites the few MySQL-only constructs the app uses
+  (GROUP_CONCAT(... ORDER BY ...), INSERT IGNORE, ON DUPLICATE KEY UPDATE,
+  the NULL-safe <=> comparison)
+- DATE columns are returned as datetime.date, as PyMySQL does
+- bootstrap_schema runs the versioned migrations (meal_app/migrations.py),
+  whose baseline is SCHEMA_SQL below: the MySQL tables in SQLite syntax
+"""
+import json
+import re
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SCHEMA_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS MealsTable (
+      Meal_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+      Name VARCHAR(255) NOT NULL,
+      Staple VARCHAR(100),
+      Book VARCHAR(100),
+      Page VARCHAR(10),
+      Website VARCHAR(255),
+      Fresh_Ingredients JSON NULL,
+      Tinned_Ingredients JSON NULL,
+      Dry_Ingredients JSON NULL,
+      Dairy_Ingredients JSON NULL,
+      Last_Made DATE NULL,
+      Spring_Summer TINYINT(1) NOT NULL DEFAULT 0,
+      Autumn_Winter TINYINT(1) NOT NULL DEFAULT 0,
+      Quick_Easy   TINYINT(1) NOT NULL DEFAULT 0,
+      Special      TINYINT(1) NOT NULL DEFAULT 0,
+      CONSTRAINT uk_meal_name UNIQUE (Name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Ingredients (
+      Ingredient_ID   INTEGER PRIMARY KEY AUTOINCREMENT,
+      Ingredient_Name VARCHAR(150) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Tags (
+      Tag_ID   INTEGER PRIMARY KEY AUTOINCREMENT,
+      Tag_Name VARCHAR(100) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS IngredientUsage (
+      Category        VARCHAR(32)  NOT NULL,
+      Ingredient_Name VARCHAR(150) NOT NULL,
+      Usage_Count     INT NOT NULL DEFAULT 0,
+      PRIMARY KEY (Category, Ingredient_Name)
+    )
+    """,
+    """
+    INSERT OR IGNORE INTO Tags (Tag_Name)
+    VALUES ('Spring/Summer'), ('Autumn/Winter'), ('Quick/Easy'), ('Special')
+    """,
+]
+
+_GROUP_CONCAT_ORDERED = re.compile(
+    r"GROUP_CONCAT\(\s*(\w+)\s+ORDER\s+BY\s+\1(?:\s+(ASC|DESC))?\s*\)", re.IGNORECASE)
+_INSERT_IGNORE = re.compile(r"\bINSERT\s+IGNORE\b", re.IGNORECASE)
+_ON_DUPLICATE_KEY = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+_VALUES_FUNCTION = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+_NULL_SAFE_EQUAL = re.compile(r"<=>")
+
+
+def _json_length(value):
+    """MySQL JSON_LENGTH: number of members of an object/array, 1 for a scalar."""
+    if value is None:
+        return None
+    parsed = json.loads(value)
+    if isinstance(parsed, (dict, list)):
+        return len(parsed)
+    return 1
+
+
+class _GroupConcatSorted:
+    """Aggregate used for GROUP_CONCAT(x ORDER BY x), which SQLite < 3.44 lacks."""
+
+    def __init__(self):
+        self.values = []
+
+    def step(self, value):
+        if value is not None:
+            self.values.append(str(value))
+
+    def finalize(self):
+        return ",".join(sorted(self.values)) if self.values else None
+
+
+class _GroupConcatSortedDesc(_GroupConcatSorted):
+    def finalize(self):
+        return ",".join(sorted(self.values, reverse=True)) if self.values else None
+
+
+@lru_cache(maxsize=256)
+def translate_mysql(query_string):
+    """Rewrites the MySQL-only syntax the app uses into SQLite equivalents."""
+    def _group_concat(match):
+        function = "GROUP_CONCAT_SORTED_DESC" if (match.group(2) or "").upper() == "DESC" else "GROUP_CONCAT_SORTED"
+        return f"{function}({match.group(1)})"
+
+    query_string = _GROUP_CONCAT_ORDERED.sub(_group_concat, query_string)
+    query_string = _INSERT_IGNORE.sub("INSERT OR IGNORE", query_string)
+    query_string = _NULL_SAFE_EQUAL.sub("IS", query_string)
+
+    duplicate = _ON_DUPLICATE_KEY.search(query_string)
+    if duplicate:
+        # VALUES(col) only means "the proposed value" inside the UPDATE list
+        head = query_string[:duplicate.start()]
+        tail = _VALUES_FUNCTION.sub(r"excluded.\1", query_string[duplicate.end():])
+        query_string = head + "ON CONFLICT DO UPDATE SET" + tail
+    return query_string
+
+
+def _register_functions(dbapi_connection, connection_record):
+    """Engine connect hook: adds the MySQL functions to each new SQLite connection."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    dbapi_connection.create_function("JSON_LENGTH", 1, _json_length, deterministic=True)
+    dbapi_connection.create_aggregate("GROUP_CONCAT_SORTED", 1, _GroupConcatSorted)
+    dbapi_connection.create_aggregate("GROUP_CONCAT_SORTED_DESC", 1, _GroupConcatSortedDesc)
+
+
+def _convert_date(value):
+    return date.fromisoformat(value.decode()[:10])
+
+
+def configure_sqlite(app):
+    """
+    Points Flask-SQLAlchemy at the SQLite file in SQLITE_PATH and installs
+    the connection hooks. Called from create_app before db.init_app.
+    """
+    path = app.config.get('SQLITE_PATH', 'meals.db')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path}"
+    engine_options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    engine_options['connect_args'] = {
+        "detect_types": sqlite3.PARSE_DECLTYPES,
+        "check_same_thread": False,
+    }
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
+    sqlite3.register_converter("DATE", _convert_date)
+    sqlite3.register_adapter(date, date.isoformat)
+    sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+    if not event.contains(Engine, "connect", _register_functions):
+        event.listen(Engine, "connect", _register_functions)
+
+
+def bootstrap_schema(engine):
+    """Migrates the SQLite database to the latest schema version (idempotent)."""
+    from .migrations import migrate
+    migrate(engine)
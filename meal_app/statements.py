@@ -0,0 +1,178 @@
+"""
+Named SQL statements used by the blueprints.
+
+Hot statements are registered once here under a short key so views can run
+them with execute_named_query(name, params) instead of carrying literal SQL.
+Every statement is kept as a plain string; execute_mysql_query compiles it
+through its bounded statement cache.
+"""
+
+STATEMENTS = {}
+
+# JSON ingredient columns on MealsTable
+INGREDIENT_COLUMNS = ['Fresh_Ingredients', 'Tinned_Ingredients', 'Dry_Ingredients', 'Dairy_Ingredients']
+
+
+def register_statement(name, query_string):
+    """
+    Registers a SQL statement under a key.
+
+    Parameters
+    ----------
+    name : str
+    query_string : str
+        SQL with optional :named params
+
+    Returns
+    -------
+    None
+    """
+    STATEMENTS[name] = query_string
+
+
+def get_statement(name):
+    """Returns the SQL registered under name, raising KeyError if unknown."""
+    try:
+        return STATEMENTS[name]
+    except KeyError:
+        raise KeyError(f"No SQL statement registered as '{name}'") from None
+
+
+register_statement("meal_by_name", "SELECT * FROM MealsTable WHERE Name = :meal")
+
+register_statement("meal_names", "SELECT Name FROM MealsTable;")
+
+register_statement("meal_count", "SELECT COUNT(*) AS Meal_Count FROM MealsTable")
+
+register_statement("meal_ingredients_by_name", """
+  SELECT Fresh_Ingredients, Tinned_Ingredients, Dry_Ingredients, Dairy_Ingredients
+  FROM MealsTable
+  WHERE Name = :name
+""")
+
+register_statement("meals_grouped_by_staple", """
+  SELECT GROUP_CONCAT(Name ORDER BY Name ASC) AS Meals, Staple
+  FROM MealsTable
+  GROUP BY Staple;
+""")
+
+# /list_meals sort orders as (column, direction, nullable); every order ends on
+# Meal_ID so the keyset is unique, and each one matches an index from
+# migrations.HOT_INDEXES (InnoDB and SQLite both append the primary key)
+LIST_SORTS = {
+    "book": [("Book", "ASC", True), ("Page_Num", "ASC", True), ("Meal_ID", "ASC", False)],
+    "name": [("Name", "ASC", False), ("Meal_ID", "ASC", False)],
+    "staple": [("Staple", "ASC", True), ("Name", "ASC", False), ("Meal_ID", "ASC", False)],
+    "last_made": [("Last_Made", "DESC", True), ("Meal_ID", "DESC", False)],
+}
+
+# Only the columns /list_meals displays (no JSON ingredient columns)
+LIST_COLUMNS = "Meal_ID, Name, Staple, Book, CAST(Page AS SIGNED) AS Page, Website, Last_Made"
+
+
+def _seek(keys, backwards, position=0):
+    """
+    Builds the keyset condition "row sorts after (or, backwards, before)
+    :k0, :k1, ..." as nested OR/AND terms, which both MySQL and SQLite plan on.
+    NULLs sort first ascending and last descending on both backends.
+    """
+    column, direction, nullable = keys[position]
+    key = f":k{position}"
+    ascending = (direction == "ASC") != backwards
+    if ascending:
+        condition = f"{column} > {key}"
+        if nullable:
+            condition = f"({condition} OR ({key} IS NULL AND {column} IS NOT NULL))"
+    else:
+        condition = f"{column} < {key}"
+        if nullable:
+            condition = f"({condition} OR ({key} IS NOT NULL AND {column} IS NULL))"
+    if position + 1 == len(keys):
+        return condition
+    equal = f"{column} <=> {key}" if nullable else f"{column} = {key}"
+    return f"({condition} OR ({equal} AND {_seek(keys, backwards, position + 1)}))"
+
+
+def _list_meals_statement(keys, seek=None):
+    """One page of /list_meals in a sort order, optionally seeking "after"/"before" a cursor."""
+    backwards = seek == "before"
+    flipped = {"ASC": "DESC", "DESC": "ASC"}
+    order = ", ".join(f"{column} {flipped[direction] if backwards else direction}"
+                      for column, direction, _ in keys)
+    selected = ", ".join(f"{column} AS k{i}" for i, (column, _, _) in enumerate(keys))
+    where = f"WHERE {_seek(keys, backwards)}" if seek else ""
+    return f"""
+    SELECT {LIST_COLUMNS}, {selected}
+    FROM MealsTable
+    {where}
+    ORDER BY {order}
+    LIMIT :limit;
+    """
+
+
+# list_meals_<sort> (first page), list_meals_<sort>_after / _before (seek from a cursor)
+for _sort, _keys in LIST_SORTS.items():
+    register_statement(f"list_meals_{_sort}", _list_meals_statement(_keys))
+    register_statement(f"list_meals_{_sort}_after", _list_meals_statement(_keys, "after"))
+    register_statement(f"list_meals_{_sort}_before", _list_meals_statement(_keys, "before"))
+
+register_statement("ingredient_usage", """
+SELECT Category, Ingredient_Name
+FROM IngredientUsage
+WHERE Usage_Count > 0
+ORDER BY Category, Ingredient_Name;
+""")
+
+register_statement("prune_ingredient_usage", "DELETE FROM IngredientUsage WHERE Usage_Count <= 0")
+
+# Meal history (meal_history.py)
+register_statement("meal_times_made", """
+SELECT COUNT(*) AS Times
+FROM MealHistory
+WHERE Meal_ID = :meal_id AND Made_On >= :since;
+""")
+
+# Meals written since a watermark (database_setup/backfill_catalog.py)
+register_statement("meals_changed_since", """
+SELECT Meal_ID, Updated_At, Fresh_Ingredients, Tinned_Ingredients, Dry_Ingredients, Dairy_Ingredients
+FROM MealsTable
+WHERE Updated_At >= :since
+ORDER BY Updated_At, Meal_ID;
+""")
+
+# Saved meal plans (plan_repository.py)
+register_statement("saved_plans_list", """
+SELECT Plan_ID, Name, Created_At, Meal_Count
+FROM SavedPlans
+ORDER BY Created_At DESC, Plan_ID DESC;
+""")
+
+register_statement("saved_plan_by_id", "SELECT Plan_ID, Name, Payload FROM SavedPlans WHERE Plan_ID = :plan_id")
+
+register_statement("saved_plan_insert", """
+INSERT INTO SavedPlans (Name, Created_At, Meal_Count, Payload)
+VALUES (:name, :created_at, :meal_count, :payload)
+""")
+
+# Full-text search over saved plans: FTS5 (rowid = plan id) on SQLite, a
+# FULLTEXT index on MySQL. plan_repository picks the one for the backend.
+register_statement("saved_plans_search_sqlite", """
+SELECT p.Plan_ID, p.Name, p.Created_At, p.Meal_Count
+FROM SavedPlanSearch
+JOIN SavedPlans p ON p.Plan_ID = SavedPlanSearch.rowid
+WHERE SavedPlanSearch MATCH :query
+ORDER BY SavedPlanSearch.rank, p.Created_At DESC
+LIMIT :limit;
+""")
+
+register_statement("saved_plans_search_mysql", """
+SELECT p.Plan_ID, p.Name, p.Created_At, p.Meal_Count,
+       MATCH (s.Meals, s.Ingredients) AGAINST (:query IN BOOLEAN MODE) AS Score
+FROM SavedPlanSearch s
+JOIN SavedPlans p ON p.Plan_ID = s.Plan_ID
+WHERE MATCH (s.Meals, s.Ingredients) AGAINST (:query IN BOOLEAN MODE)
+ORDER BY Score DESC, p.Created_At DESC
+LIMIT :limit;
+""")
+
+register_statement("saved_plan_exists", "SELECT Plan_ID FROM SavedPlans WHERE Name = :name AND Created_At = :created_at")
@@ -0,0 +1,33 @@
+/*
+  Meal name typeahead: fills a <datalist> from /typeahead/meals as the user
+  types, instead of the page shipping every meal name.
+
+  Usage: <input list="meal_matches" data-typeahead="/typeahead/meals">
+         <datalist id="meal_matches"></datalist>
+*/
+document.addEventListener("DOMContentLoaded", function () {
+    var inputs = document.querySelectorAll("input[data-typeahead]");
+    Array.prototype.forEach.call(inputs, function (input) {
+        var list = document.getElementById(input.getAttribute("list"));
+        var url = input.getAttribute("data-typeahead");
+        var timer = null;
+        var latest = 0;
+        input.addEventListener("input", function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () {
+                var request = ++latest;
+                fetch(url + "?q=" + encodeURIComponent(input.value))
+                    .then(function (response) { return response.json(); })
+                    .then(function (data) {
+                        if (request !== latest) { return; }  // a newer lookup is on its way
+                        list.innerHTML = "";
+                        data.matches.forEach(function (name) {
+                            var option = document.createElement("option");
+                            option.value = name;
+                            list.appendChild(option);
+                        });
+                    });
+            }, 120);
+        });
+    });
+});
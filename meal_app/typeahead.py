@@ -0,0 +1,140 @@
+"""
+Typeahead index over meal names.
+
+MealNameIndex answers "which meals match what the user has typed so far"
+without shipping every name to the page:
+
+- a sorted list of lowercased names answers prefix matches with bisect
+- a trigram index (name padded as in pg_trgm, "  name ") answers fuzzy
+  matches, so "risoto" or "cottage pei" still find their meal; candidates
+  are scored by trigram Jaccard similarity
+
+Prefix matches rank first, then substring matches, then the best fuzzy
+matches. The index listens to the MealCatalog and is patched on add/edit.
+"""
+import bisect
+import heapq
+import threading
+from flask import current_app
+from .catalog import get_catalog
+
+# Fuzzy matches below this trigram similarity are dropped
+MIN_SIMILARITY = 0.2
+
+
+def _normalise(text):
+    return " ".join(text.lower().split())
+
+
+def trigrams(text):
+    """Returns the set of trigrams of text, padded so short words still have some."""
+    padded = f"  {_normalise(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MealNameIndex:
+    """Prefix + trigram index of meal names, maintained from the catalog."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sorted = []
+        self._postings = {}
+        self._trigrams = {}
+
+    def _add(self, name):
+        key = _normalise(name)
+        bisect.insort(self._sorted, (key, name))
+        grams = trigrams(name)
+        self._trigrams[name] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(name)
+
+    def _remove(self, name):
+        key = (_normalise(name), name)
+        position = bisect.bisect_left(self._sorted, key)
+        if position < len(self._sorted) and self._sorted[position] == key:
+            del self._sorted[position]
+        for gram in self._trigrams.pop(name, ()):
+            names = self._postings.get(gram)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._postings[gram]
+
+    def rebuild(self, records):
+        """Catalog listener: index every meal name."""
+        with self._lock:
+            self._sorted = []
+            self._postings = {}
+            self._trigrams = {}
+            for record in records:
+                self._add(record.name)
+
+    def update(self, old, new):
+        """Catalog listener: re-index one meal (handles renames)."""
+        with self._lock:
+            if old is not None:
+                self._remove(old.name)
+            if new is not None:
+                self._add(new.name)
+
+    def lookup(self, query, k=10):
+        """
+        Returns up to k meal names matching query, best first.
+
+        Parameters
+        ----------
+        query : str
+            what the user has typed
+        k : int
+            maximum number of names
+
+        Returns
+        -------
+        list of meal names
+        """
+        query = _normalise(query)
+        if not query:
+            return []
+        with self._lock:
+            # 1) prefix matches straight from the sorted list
+            matches = []
+            position = bisect.bisect_left(self._sorted, (query,))
+            while position < len(self._sorted) and len(matches) < k:
+                key, name = self._sorted[position]
+                if not key.startswith(query):
+                    break
+                matches.append(name)
+                position += 1
+            if len(matches) >= k:
+                return matches
+
+            # 2) substring and fuzzy matches scored by shared trigrams
+            query_grams = trigrams(query)
+            shared = {}
+            for gram in query_grams:
+                for name in self._postings.get(gram, ()):
+                    shared[name] = shared.get(name, 0) + 1
+            seen = set(matches)
+            scored = []
+            for name, count in shared.items():
+                if name in seen:
+                    continue
+                similarity = count / (len(query_grams) + len(self._trigrams[name]) - count)
+                if query in _normalise(name):
+                    similarity += 1
+                if similarity >= MIN_SIMILARITY:
+                    scored.append((-similarity, name))
+            best = heapq.nsmallest(k - len(matches), scored)
+            return matches + [name for _, name in best]
+
+    def best_match(self, query):
+        """The single best match for query, or None."""
+        matches = self.lookup(query, k=1)
+        return matches[0] if matches else None
+
+
+def get_meal_name_index():
+    """Returns the app's MealNameIndex, brought up to date with the catalog."""
+    get_catalog().refresh()
+    return current_app.extensions['meal_name_index']
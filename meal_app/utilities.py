@@ -1,60 +1,234 @@
 import json
+import time
+from functools import lru_cache
+from flask import g, has_request_context
 from sqlalchemy import text
 from . import db
+from .query_stats import record_query
 
+# Upper bound on distinct SQL strings kept in the compiled statement cache
+STATEMENT_CACHE_SIZE = 256
+
+# Rows pulled from the server per round trip when fetch="iter"
+ITER_BATCH_SIZE = 500
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def compile_statement(query_string, dialect_name="mysql"):
+    """
+    Returns the TextClause for query_string, building it (and parsing its
+    :named bind params) only the first time the string is seen. Reusing the
+    same TextClause object also lets SQLAlchemy's compiled cache hit.
+    On the SQLite backend MySQL-only syntax is translated first.
+    """
+    if dialect_name == "sqlite":
+        from .sqlite_backend import translate_mysql
+        query_string = translate_mysql(query_string)
+    return text(query_string)
+
+
+def statement_cache_info():
+    """Returns hits, misses, maxsize and currsize of the statement cache."""
+    return compile_statement.cache_info()
+
+
+def _request_connection():
+    """
+    Returns the connection pinned to the current request, checking one out
+    of the pool on first use. Every execute_mysql_query call made while
+    serving the request reuses it.
+    """
+    conn = g.get('_db_conn')
+    if conn is None:
+        conn = db.engine.connect()
+        g._db_conn = conn
+        g._db_tx = None
+    return conn
+
+
+def _begin_request_writes(conn):
+    """Opens the request's write transaction (once) so writes share one COMMIT."""
+    if g.get('_db_tx') is None:
+        # SA 2.0 autobegins on the first SELECT; SA 1.3 needs an explicit begin
+        if conn.in_transaction() and hasattr(conn, "get_transaction"):
+            g._db_tx = conn.get_transaction()
+        else:
+            g._db_tx = conn.begin()
+    return g._db_tx
+
+
+def _is_read_only(query_string):
+    """True for statements that only read (SELECT/SHOW/EXPLAIN)."""
+    first_word = query_string.lstrip().split(None, 1)[0].upper() if query_string.strip() else ''
+    return first_word in ("SELECT", "SHOW", "EXPLAIN", "WITH")
+
+
+def _rows_from_result(result, fetch):
+    """Converts a SQLAlchemy result into the shapes execute_mysql_query returns."""
+    # Non-SELECT (no rows) → nothing to fetch
+    try:
+        returns_rows = result.returns_rows  # SA 1.4+/2.0
+    except AttributeError:
+        # SA 1.3 doesn't expose returns_rows; infer from cursor
+        returns_rows = hasattr(result, "cursor") and getattr(result.cursor, "description", None)
+
+    if not returns_rows:
+        return None
+
+    # Try SA 1.4+/2.0 path first
+    try:
+        mappings = result.mappings()
+        if fetch == "one":
+            row = mappings.first()
+            return row if row is not None else None
+        else:
+            return list(mappings.all())
+    except AttributeError:
+        # SA 1.3 fallback: build dicts from rows + keys
+        rows = result.fetchall()
+        keys = result.keys()
+        dict_rows = [dict(zip(keys, row)) for row in rows]
+
+        if fetch == "one":
+            return dict_rows[0] if dict_rows else None
+        else:
+            return dict_rows
 
-from sqlalchemy import text
-from . import db
 
-def execute_mysql_query(query_string, params=None, fetch="all"):
+def _iter_rows(query_string, params, batch_size):
+    """
+    Yields rows as dicts from a server-side (unbuffered) cursor, pulling
+    batch_size rows at a time. Uses its own connection: an unbuffered MySQL
+    cursor blocks its connection until drained, so it can't share the
+    request's. The connection is released when the generator is exhausted
+    or closed.
+    """
+    with db.engine.connect() as conn:
+        streaming = conn.execution_options(stream_results=True)
+        started = time.perf_counter()
+        result = streaming.execute(compile_statement(query_string, conn.dialect.name), params)
+        record_query(query_string, params, started)
+        try:
+            keys = list(result.keys())
+            while True:
+                rows = result.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(keys, row))
+        finally:
+            result.close()
+
+
+def execute_mysql_query(query_string, params=None, fetch="all", batch_size=ITER_BATCH_SIZE):
     """
     Runs a SQL statement using SQLAlchemy's engine.
 
+    Inside a request every call shares one pooled connection (see
+    commit_request_work / close_request_connection). Reads run without
+    opening a write transaction; the first write opens one and all of the
+    request's writes are committed together when the response is ready.
+    Outside a request (scripts, CLI) each call runs in its own transaction.
+
     - query_string: SQL with optional :named params
     - params: dict of parameters
-    - fetch: "all" (default), "one", or "none" (for INSERT/UPDATE/DELETE)
+    - fetch: "all" (default), "one", "iter" (stream a large SELECT),
+      "none" (for INSERT/UPDATE/DELETE) or "lastrowid" (an INSERT's new id)
+    - batch_size: rows fetched per round trip for "iter"
 
     Returns:
       - list[dict] for "all"
       - dict or None for "one"
+      - generator of dicts for "iter" (nothing runs until iterated)
       - None for "none" or non-SELECT
+      - int for "lastrowid"
     """
     params = params or {}
-    if fetch not in ("all", "one", "none"):
+    if fetch not in ("all", "one", "iter", "none", "lastrowid"):
         fetch = "all"
 
-    with db.engine.begin() as conn:
-        result = conn.execute(text(query_string), params)
+    if fetch == "iter":
+        return _iter_rows(query_string, params, batch_size)
 
-        # Non-SELECT (no rows) → nothing to fetch
-        try:
-            returns_rows = result.returns_rows  # SA 1.4+/2.0
-        except AttributeError:
-            # SA 1.3 doesn't expose returns_rows; infer from cursor
-            returns_rows = hasattr(result, "cursor") and getattr(result.cursor, "description", None)
+    if not has_request_context():
+        with db.engine.begin() as conn:
+            result = conn.execute(compile_statement(query_string, conn.dialect.name), params)
+            if fetch == "lastrowid":
+                return result.lastrowid
+            return _rows_from_result(result, fetch)
 
-        if not returns_rows:
-            return None
+    conn = _request_connection()
+    if fetch in ("none", "lastrowid") or not _is_read_only(query_string):
+        _begin_request_writes(conn)
+    started = time.perf_counter()
+    result = conn.execute(compile_statement(query_string, conn.dialect.name), params)
+    rows = result.lastrowid if fetch == "lastrowid" else _rows_from_result(result, fetch)
+    record_query(query_string, params, started)
+    return rows
 
-        # Try SA 1.4+/2.0 path first
-        try:
-            mappings = result.mappings()
-            if fetch == "one":
-                row = mappings.first()
-                return row if row is not None else None
-            else:
-                return list(mappings.all())
-        except AttributeError:
-            # SA 1.3 fallback: build dicts from rows + keys
-            rows = result.fetchall()
-            keys = result.keys()
-            dict_rows = [dict(zip(keys, row)) for row in rows]
-
-            if fetch == "one":
-                return dict_rows[0] if dict_rows else None
-            else:
-                return dict_rows
 
+def execute_named_query(name, params=None, fetch="all", batch_size=ITER_BATCH_SIZE):
+    """
+    Runs a statement registered in statements.py by its key.
+
+    - name: key passed to statements.register_statement
+    - params / fetch / batch_size: as for execute_mysql_query
+    """
+    from .statements import get_statement
+    return execute_mysql_query(get_statement(name), params, fetch, batch_size)
+
+
+def call_after_commit(callback, *args):
+    """
+    Runs callback(*args) once the current request's writes are committed
+    (immediately outside a request). Used to invalidate in-process caches
+    only when the data they cache has really changed.
+    """
+    if not has_request_context():
+        callback(*args)
+        return
+    callbacks = g.get('_db_after_commit')
+    if callbacks is None:
+        callbacks = g._db_after_commit = []
+    callbacks.append((callback, args))
+
+
+def commit_request_work(response):
+    """
+    after_request hook: commits the request's writes in a single COMMIT.
+    Runs before the response is sent, so a redirect never beats its own write.
+    Error responses (abort(), handled HTTP exceptions, a 500 from the error
+    handler) roll back instead, and their after-commit callbacks are dropped.
+    """
+    tx = g.get('_db_tx')
+    callbacks = g.pop('_db_after_commit', None) or []
+    if response.status_code >= 400:
+        g._db_tx = None
+        if tx is not None and tx.is_active:
+            tx.rollback()
+        return response
+    if tx is not None:
+        g._db_tx = None
+        if tx.is_active:
+            tx.commit()
+    for callback, args in callbacks:
+        callback(*args)
+    return response
+
+
+def close_request_connection(exc=None):
+    """
+    teardown_request hook: rolls back anything left uncommitted (the view
+    raised, or commit_request_work never ran) and hands the request's
+    connection back to the pool.
+    """
+    tx = g.pop('_db_tx', None)
+    conn = g.pop('_db_conn', None)
+    g.pop('_db_after_commit', None)
+    if tx is not None and tx.is_active:
+        tx.rollback()
+    if conn is not None:
+        conn.close()
 
 
 def parse_ingredients(ingredients_dict, filter_word, remove_prefix=False):
@@ -0,0 +1,38 @@
+"""
+Fixtures shared by the tests: an app on a fresh SQLite database (the
+embedded backend, meal_app/sqlite_backend.py) loaded with the sample meals,
+and a plan store in the same temporary directory.
+"""
+import json
+import logging
+import pytest
+import config
+from meal_app import create_app, db
+from meal_app.ingredient_catalog import rebuild_ingredient_usage
+from database_setup.import_meals import import_meals
+from database_setup.import_sample_data import JSON_PATH
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(config.Config, "DATABASE_BACKEND", "sqlite")
+    monkeypatch.setattr(config.Config, "SQLITE_PATH", str(tmp_path / "meals.db"))
+    monkeypatch.setattr(config.Config, "PLAN_STORE_PATH", str(tmp_path / "plan_store.db"))
+    monkeypatch.setattr(config.Config, "N_PLUS_ONE_WARNINGS", False)
+    app = create_app()
+    app.logger.setLevel(logging.ERROR)
+    with app.app_context():
+        import_meals(db.engine, JSON_PATH, workers=0, progress=lambda message: None)
+        with db.engine.begin() as conn:
+            rebuild_ingredient_usage(conn)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def meal_names():
+    return [meal["Name"] for meal in json.loads(JSON_PATH.read_text(encoding="utf-8"))]
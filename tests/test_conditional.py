@@ -0,0 +1,40 @@
+"""catalog_conditional (meal_app/conditional.py): ETags and 304s on catalog pages."""
+import pytest
+
+CATALOG_PAGES = ["/find", "/edit", "/list_meals", "/search", "/create"]
+
+
+@pytest.mark.parametrize("url", CATALOG_PAGES)
+def test_matching_etag_answers_304_without_queries(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = client.get(url, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+    # no SQL ran, so query_stats added no Server-Timing entry
+    assert "Server-Timing" not in again.headers
+
+
+def test_stale_etag_renders_the_page(client):
+    response = client.get("/find", headers={"If-None-Match": '"not-the-current-version"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+
+
+def test_write_changes_the_etag(client):
+    etag = client.get("/find").headers["ETag"]
+    form = {"Name": "Test Meal", "Staple": "Rice", "Book": "", "Page": "", "Website": "", "Fresh Garlic": "2"}
+    assert client.post("/add", data=form).status_code == 302
+
+    response = client.get("/find", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_post_is_not_conditional(client):
+    etag = client.get("/find").headers["ETag"]
+    response = client.post("/find", data={"Meal": "Asparagus Risotto"}, headers={"If-None-Match": etag})
+    assert response.status_code == 302
@@ -0,0 +1,23 @@
+"""/edit/<meal> POST (meal_app/meals/edit.py)."""
+from meal_app.utilities import execute_named_query
+
+FORM = {"Name": "No Such Meal", "Staple": "Rice", "Book": "", "Page": "", "Website": "", "Fresh Ghostroot": "2"}
+
+
+def test_editing_an_unknown_meal_is_404_and_writes_nothing(app, client):
+    response = client.post("/edit/No Such Meal", data=FORM)
+    assert response.status_code == 404
+
+    with app.app_context():
+        usage = execute_named_query("ingredient_usage", fetch="all") or []
+    assert "Ghostroot" not in [row["Ingredient_Name"] for row in usage]
+
+
+def test_editing_a_meal_updates_its_ingredient_usage(app, client, meal_names):
+    meal = meal_names[0]
+    form = dict(FORM, Name=meal)
+    assert client.post(f"/edit/{meal}", data=form).status_code == 302
+
+    with app.app_context():
+        usage = execute_named_query("ingredient_usage", fetch="all") or []
+    assert ("Fresh_Ingredients", "Ghostroot") in [(row["Category"], row["Ingredient_Name"]) for row in usage]
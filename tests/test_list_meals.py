@@ -0,0 +1,91 @@
+"""Keyset pagination of /list_meals (meal_app/meals/list_meals.py)."""
+import pytest
+from meal_app.catalog import get_catalog
+from meal_app.meals.list_meals import fetch_page, encode_cursor, decode_cursor
+from meal_app.statements import LIST_SORTS
+from meal_app.utilities import execute_mysql_query
+
+
+@pytest.fixture
+def app_with_dates(app, meal_names):
+    # a mix of NULL and repeated Last_Made values, so the last_made sort needs its tie-breakers
+    with app.app_context():
+        for i, name in enumerate(meal_names[::2]):
+            execute_mysql_query("UPDATE MealsTable SET Last_Made = :made WHERE Name = :name",
+                                {"made": f"2024-0{1 + i % 3}-01", "name": name}, fetch="none")
+    return app
+
+
+def walk_forward(size, sort):
+    """Follows next cursors from the first page; returns the pages and the last page's prev cursor."""
+    pages, after = [], None
+    while True:
+        rows, next_cursor, prev_cursor = fetch_page(sort, size, after=after)
+        pages.append([row["Name"] for row in rows])
+        if next_cursor is None:
+            return pages, prev_cursor
+        after = next_cursor
+
+
+def walk_back(size, sort, before):
+    """Follows prev cursors back to the first page."""
+    pages = []
+    while before is not None:
+        rows, _, before = fetch_page(sort, size, before=before)
+        pages.insert(0, [row["Name"] for row in rows])
+    return pages
+
+
+@pytest.mark.parametrize("sort", sorted(LIST_SORTS))
+@pytest.mark.parametrize("size", [1, 4, 7])
+def test_pages_cover_every_meal_once_in_order(app_with_dates, meal_names, sort, size):
+    with app_with_dates.test_request_context("/list_meals"):
+        everything, next_cursor, prev_cursor = fetch_page(sort, len(meal_names) + 1)
+        assert next_cursor is None and prev_cursor is None
+        expected = [row["Name"] for row in everything]
+        assert sorted(expected) == sorted(meal_names)
+
+        pages, prev_cursor = walk_forward(size, sort)
+        assert [name for page in pages for name in page] == expected
+        assert all(len(page) == size for page in pages[:-1])
+
+        # back from the last page through the prev cursors gives the same pages
+        assert walk_back(size, sort, prev_cursor) == pages[:-1]
+
+
+def test_cursor_round_trip():
+    row = {"k0": "Bosh 1", "k1": 12, "k2": None}
+    token = encode_cursor(row, 3)
+    assert "=" not in token
+    assert decode_cursor(token, 3) == row
+
+
+@pytest.mark.parametrize("token", ["not base64!", "e30", encode_cursor({"k0": "a"}, 1), "", "%%%"])
+def test_garbage_cursor_decodes_to_none(token):
+    assert decode_cursor(token, 2) is None
+
+
+@pytest.mark.parametrize("param", ["after", "before"])
+def test_garbage_cursor_serves_the_first_page(client, param):
+    first = client.get("/list_meals?sort=name&size=5")
+    garbage = client.get(f"/list_meals?sort=name&size=5&{param}=bm90LWEtY3Vyc29y")
+    assert garbage.status_code == 200
+    assert garbage.data == first.data
+
+
+def test_next_link_moves_on(client):
+    first = client.get("/list_meals?sort=name&size=5").data.decode()
+    assert "Next &raquo;" in first and "&laquo; Previous" not in first
+    next_url = first[:first.index('">Next &raquo;')].rsplit('href="', 1)[1].replace("&amp;", "&")
+    second = client.get(next_url).data.decode()
+    assert "&laquo; Previous" in second
+    assert second != first
+
+
+def test_meal_count_without_loading_the_catalog(app, client, meal_names):
+    with app.app_context():
+        catalog = get_catalog()
+        catalog.invalidate()
+    page = client.get("/list_meals").data
+    assert f"Current meal count: {len(meal_names)}".encode() in page
+    assert catalog._records is None
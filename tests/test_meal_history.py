@@ -0,0 +1,41 @@
+"""MealHistory (meal_app/meal_history.py) and the times-made count on /find."""
+import re
+from datetime import date, timedelta
+from meal_app.meal_history import record_meals_made, times_made
+from meal_app.catalog import get_catalog
+
+MEAL = "Asparagus Risotto"
+
+
+def _made(page):
+    return int(re.search(rb"Made (\d+) time\(s\)", page).group(1))
+
+
+def test_record_meals_made_counts_each_day_once(app):
+    today = date(2024, 6, 1)
+    with app.app_context():
+        meal_id = get_catalog().get(MEAL).meal_id
+        before = times_made(meal_id, today=today)
+    for days_ago in (1, 1, 30, 89, 120):
+        with app.app_context():
+            record_meals_made([MEAL, MEAL, "No Such Meal"], made_on=today - timedelta(days=days_ago))
+    with app.app_context():
+        assert times_made(meal_id, today=today) == before + 3
+        assert times_made(meal_id, days=365, today=today) == before + 4
+        assert get_catalog().get(MEAL).last_made == today - timedelta(days=1)
+
+
+def test_warm_find_runs_no_queries(client):
+    client.get(f"/find/{MEAL}")
+    response = client.get(f"/find/{MEAL}")
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
+
+
+def test_update_dates_refreshes_the_count(client):
+    made = _made(client.get(f"/find/{MEAL}").data)
+    assert client.post("/create", data={"Meal 1": MEAL, "Quantity 1": "1"}).status_code == 302
+    assert client.post("/display", data={"submit": "Update Dates"}).status_code in (200, 302)
+    assert _made(client.get(f"/find/{MEAL}").data) == made + 1
+    # and the new count is the cached one
+    assert "Server-Timing" not in client.get(f"/find/{MEAL}").headers
@@ -0,0 +1,72 @@
+"""Schema migrations (meal_app/migrations.py)."""
+import pytest
+from sqlalchemy import text
+from meal_app import db
+from meal_app.migrations import (MIGRATIONS, LATEST_VERSION, HOT_INDEXES, TAG_INDEXES, migrate, check_query_plans,
+                                 _run_steps)
+
+
+class _Dialect:
+    name = "mysql"
+
+
+class _Result:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class RecordingMySQL:
+    """Stands in for a MySQL connection whose information_schema finds everything (or nothing)."""
+    dialect = _Dialect()
+
+    def __init__(self, present):
+        self.present = present
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        if "information_schema" in sql:
+            return _Result(1 if self.present else 0)
+        self.statements.append(" ".join(sql.split()))
+        return _Result(None)
+
+
+def _ddl(statements):
+    return [sql for sql in statements if sql.split(None, 1)[0].upper() in ("CREATE", "ALTER", "DROP")]
+
+
+@pytest.mark.parametrize("migration", MIGRATIONS[1:], ids=lambda m: str(m.version))
+def test_mysql_steps_can_run_again(migration):
+    # after a failure part way through, the steps that did run have already changed the schema
+    for step in [step for step in migration.up + migration.down if not callable(step)]:
+        conn = RecordingMySQL(present=isinstance(step, dict) and "unless_exists" in step)
+        _run_steps(conn, [step])
+        assert all("EXISTS" in sql for sql in _ddl(conn.statements)), step
+
+
+def test_sqlite_migrates_down_and_up_again(app):
+    with app.app_context():
+        assert migrate(db.engine, 1) == [(version, "down") for version in range(LATEST_VERSION, 1, -1)]
+        assert migrate(db.engine) == [(version, "up") for version in range(2, LATEST_VERSION + 1)]
+
+
+def _indexes(conn):
+    return {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+
+
+def test_only_the_hot_indexes_remain(app):
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert set(HOT_INDEXES) <= _indexes(conn)
+            assert not set(TAG_INDEXES) & _indexes(conn)
+        migrate(db.engine, 6)
+        with db.engine.connect() as conn:
+            assert set(TAG_INDEXES) <= _indexes(conn)
+
+
+def test_hot_queries_use_their_indexes(app):
+    with app.app_context():
+        assert [row["name"] for row in check_query_plans(db.engine) if not row["used"]] == []
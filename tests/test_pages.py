@@ -0,0 +1,20 @@
+"""Every page renders with the shared nav."""
+import pytest
+
+PAGES = ["/", "/add", "/edit", "/edit/Asparagus Risotto", "/list_meals", "/find", "/find/Asparagus Risotto",
+         "/search", "/inspire", "/pantry", "/create", "/load", "/delete"]
+
+
+@pytest.mark.parametrize("url", PAGES)
+def test_nav_links_every_page(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    for link in (b'href="/search"', b'href="/inspire"', b'href="/pantry"', b'href="/create"'):
+        assert link in response.data
+
+
+def test_search_forms_are_inside_the_body(client):
+    page = client.get("/search").data
+    body_end = page.index(b"</body>")
+    assert page.index(b"Combined Search") < body_end
+    assert page.rstrip().endswith(b"</html>")
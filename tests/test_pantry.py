@@ -0,0 +1,117 @@
+"""PantryMatrix.rank (meal_app/pantry_matrix.py) and the /pantry endpoint."""
+import json
+import pytest
+from meal_app.catalog import MealRecord
+from meal_app.pantry_matrix import PantryMatrix, PLENTY
+from meal_app.meals.pantry import MAX_LIMIT, parse_pantry
+
+
+def _record(meal_id, name, fresh=None, dry=None):
+    return MealRecord.from_row({"Meal_ID": meal_id, "Name": name,
+                                "Fresh_Ingredients": json.dumps(fresh or {}), "Dry_Ingredients": json.dumps(dry or {})})
+
+
+@pytest.fixture
+def matrix():
+    matrix = PantryMatrix()
+    matrix.rebuild([
+        _record(1, "A", fresh={"Garlic": "2", "Leek": "1"}),
+        _record(2, "B", fresh={"Garlic": "1"}),
+        _record(3, "C", fresh={"Garlic": "1", "Leek": "2"}, dry={"Rice": "100"}),
+        _record(4, "D", dry={"Rice": "50"}),
+    ])
+    return matrix
+
+
+def names(results):
+    return [meal["name"] for meal in results]
+
+
+def test_ranks_by_coverage_then_missing(matrix):
+    results = matrix.rank({"Garlic": 2, "Leek": None})
+    assert names(results) == ["A", "B", "C", "D"]
+    assert [meal["coverage"] for meal in results] == [1.0, 1.0, 0.667, 0.0]
+    assert [meal["missing"] for meal in results] == [0, 0, 1, 1]
+    assert results[2]["short"] == [("Rice", 100.0)]
+
+
+def test_partial_quantities_break_ties_by_shortfall(matrix):
+    results = matrix.rank({"Garlic": 1})
+    # A and D both miss one ingredient and cover none; A is also half short of garlic
+    assert names(results) == ["B", "C", "D", "A"]
+    assert results[3]["shortfall"] == 1.5
+    assert results[3]["short"] == [("Garlic", 1.0), ("Leek", 1.0)]
+
+
+def test_unknown_ingredients_are_ignored(matrix):
+    assert names(matrix.rank({"Saffron": 3})) == ["B", "D", "A", "C"]
+
+
+@pytest.mark.parametrize("limit, expected", [(2, ["A", "B"]), (10, ["A", "B", "C", "D"]), (0, []), (-1, [])])
+def test_limit(matrix, limit, expected):
+    assert names(matrix.rank({"Garlic": 2, "Leek": None}, limit=limit)) == expected
+
+
+def test_update_rewrites_one_row(matrix):
+    old = _record(2, "B", fresh={"Garlic": "1"})
+    matrix.update(old, _record(2, "B", fresh={"Garlic": "1", "Saffron": "1"}))
+    matrix.update(_record(1, "A"), None)
+    assert names(matrix.rank({"Garlic": 2, "Leek": None})) == ["C", "B", "D"]
+
+
+def test_json_limit(client):
+    response = client.post("/pantry", json={"ingredients": {"Garlic": None}, "limit": 3})
+    assert response.status_code == 200
+    assert len(response.get_json()["meals"]) == 3
+
+
+@pytest.mark.parametrize("limit, count", [(-5, 1), (0, 1), ("2", 2), (None, None), (10 ** 6, None)])
+def test_json_limit_is_clamped(client, meal_names, limit, count):
+    response = client.post("/pantry", json={"ingredients": {"Garlic": None}, "limit": limit})
+    assert response.status_code == 200
+    assert len(response.get_json()["meals"]) == (count or min(len(meal_names), MAX_LIMIT))
+
+
+@pytest.mark.parametrize("limit", ["abc", "2.5", [3], True])
+def test_bad_json_limit_is_a_400(client, limit):
+    response = client.post("/pantry", json={"ingredients": {"Garlic": None}, "limit": limit})
+    assert response.status_code == 400
+    assert "Meals to show" in response.get_json()["error"]
+
+
+def test_bad_form_limit_shows_a_message(client):
+    response = client.post("/pantry", data={"Have Garlic": "y", "Limit": "abc"})
+    assert response.status_code == 400
+    assert b"Meals to show must be a whole number" in response.data
+
+
+def test_form_limit(client):
+    response = client.post("/pantry", data={"Have Garlic": "y", "Limit": "-3"})
+    assert response.status_code == 200
+    # clamped to one meal: the header row and one result row
+    assert response.data.count(b'<tr class="item">') == 2
+
+
+@pytest.mark.parametrize("payload", [[1, 2], "Garlic", {"ingredients": ["a"]}, {"ingredients": "Garlic"},
+                                     {"ingredients": {"Garlic": "y"}}, {"ingredients": {"Garlic": True}},
+                                     {"ingredients": {"Garlic": [2]}}])
+def test_bad_json_pantry_is_a_400(client, payload):
+    response = client.post("/pantry", json=payload)
+    assert response.status_code == 400
+    assert "ingredients" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("quantity", ["NaN", "Infinity", "-Infinity"])
+def test_non_finite_json_quantity_is_a_400(client, quantity):
+    body = '{"ingredients": {"Garlic": %s}}' % quantity
+    response = client.post("/pantry", data=body, content_type="application/json")
+    assert response.status_code == 400
+
+
+def test_malformed_json_is_a_400(client):
+    response = client.post("/pantry", data="{not json", content_type="application/json")
+    assert response.status_code == 400
+
+
+def test_nan_form_quantity_means_plenty():
+    assert parse_pantry([("Garlic", "nan"), ("Leek", "2")]) == {"Garlic": PLENTY, "Leek": 2.0}
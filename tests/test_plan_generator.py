@@ -0,0 +1,140 @@
+"""PlanGenerator (meal_app/plan_generator.py): constraints, overlap and time budget; /create auto-generate."""
+import json
+import time
+from collections import Counter
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from meal_app.catalog import MealRecord
+from meal_app import plan_generator
+from meal_app.plan_generator import PlanGenerator
+from meal_app.meal_plans.create import DEFAULT_PLAN_SIZE, MAX_PLAN_SIZE
+
+TODAY = date(2024, 6, 1)
+STAPLES = ["Rice", "Pasta", "Potato"]
+
+
+def _records(count, ingredient_pool=40, seed=0):
+    rng = np.random.default_rng(seed)
+    records = []
+    for meal_id in range(1, count + 1):
+        ingredients = rng.choice(ingredient_pool, size=int(rng.integers(2, 8)), replace=False)
+        records.append(MealRecord.from_row({
+            "Meal_ID": meal_id,
+            "Name": f"Meal {meal_id:04d}",
+            "Staple": STAPLES[meal_id % len(STAPLES)],
+            "Fresh_Ingredients": json.dumps({f"Ingredient {i}": "1" for i in ingredients}),
+            "Last_Made": TODAY - timedelta(days=meal_id % 30),
+            "Quick_Easy": meal_id % 2,
+            "Special": int(meal_id % 5 == 0),
+        }))
+    return records
+
+
+@pytest.fixture
+def generator():
+    generator = PlanGenerator()
+    generator.rebuild(_records(60))
+    return generator
+
+
+def _by_name(generator):
+    return {record.name: record for record, _ in generator._meals.values()}
+
+
+def _overlap(records):
+    uses = Counter(name for record in records for name in record.fresh_ingredients)
+    return sum(count - 1 for count in uses.values())
+
+
+def test_plan_has_count_distinct_meals_and_true_overlap(generator):
+    names, overlap = generator.generate(7, today=TODAY, rng=np.random.default_rng(1))
+    assert len(names) == len(set(names)) == 7
+    records = _by_name(generator)
+    assert overlap == _overlap([records[name] for name in names])
+
+
+@pytest.mark.parametrize("cap", [1, 2, 3])
+def test_staple_cap(generator, cap):
+    names, _ = generator.generate(6, max_per_staple=cap, today=TODAY, rng=np.random.default_rng(2))
+    staples = Counter(_by_name(generator)[name].staple for name in names)
+    assert max(staples.values()) <= cap
+    assert len(names) == min(6, cap * len(STAPLES))
+
+
+def test_tags_and_recency(generator):
+    names, _ = generator.generate(10, required_tags=["Quick_Easy"], excluded_tags=["Special"],
+                                  not_made_days=7, today=TODAY, rng=np.random.default_rng(3))
+    assert names
+    for name in names:
+        record = _by_name(generator)[name]
+        assert record.tag_flags[2] == 1 and record.tag_flags[3] == 0
+        assert (TODAY - record.last_made).days >= 7
+
+
+def test_no_candidates(generator):
+    assert generator.generate(5, required_tags=["Spring_Summer"], today=TODAY) == ([], 0)
+    assert generator.generate(0, today=TODAY) == ([], 0)
+
+
+def test_local_search_never_lowers_the_greedy_overlap(generator):
+    for seed in range(10):
+        _, greedy = generator.generate(8, time_budget_ms=0, today=TODAY, rng=np.random.default_rng(seed))
+        _, searched = generator.generate(8, time_budget_ms=500, today=TODAY, rng=np.random.default_rng(seed))
+        assert searched >= greedy
+
+
+class _Clock:
+    """Stands in for the time module: 0 on the first call, then `after` seconds."""
+
+    def __init__(self, after):
+        self.after = after
+        self.calls = 0
+
+    def perf_counter(self):
+        self.calls += 1
+        return 0.0 if self.calls == 1 else self.after
+
+
+def test_time_budget_stops_the_local_search(monkeypatch):
+    generator = PlanGenerator()
+    generator.rebuild(_records(3000, ingredient_pool=400))
+    plan = lambda budget_ms: generator.generate(40, time_budget_ms=budget_ms, today=TODAY,
+                                                rng=np.random.default_rng(4))
+    greedy, searched = plan(0), plan(10_000)
+    assert searched[1] > greedy[1]
+
+    # the budget has already run out when the local search starts: greedy plan only
+    monkeypatch.setattr(plan_generator, "time", _Clock(after=1.0))
+    assert plan(30) == greedy
+    # the clock never reaches the deadline: the search runs to completion
+    monkeypatch.setattr(plan_generator, "time", _Clock(after=0.0))
+    assert plan(30) == searched
+
+
+def test_time_budget_bounds_wall_time():
+    generator = PlanGenerator()
+    generator.rebuild(_records(3000, ingredient_pool=400))
+    started = time.perf_counter()
+    generator.generate(40, time_budget_ms=30, today=TODAY, rng=np.random.default_rng(4))
+    assert time.perf_counter() - started < 1.0
+
+
+@pytest.mark.parametrize("count, expected", [("1000000", MAX_PLAN_SIZE), ("3", 3), ("0", DEFAULT_PLAN_SIZE),
+                                             ("abc", DEFAULT_PLAN_SIZE)])
+def test_auto_generate_caps_the_count(client, monkeypatch, count, expected):
+    counts = []
+    generate = PlanGenerator.generate
+
+    def spy(self, count, **kwargs):
+        counts.append(count)
+        return generate(self, count, **kwargs)
+
+    monkeypatch.setattr(PlanGenerator, "generate", spy)
+    response = client.post("/create", data={"submit": "Auto-generate", "Count": count})
+    assert response.status_code == 302
+    assert counts == [expected]
+
+
+def test_create_form_shows_the_cap(client):
+    assert f'max="{MAX_PLAN_SIZE}"'.encode() in client.get("/create").data
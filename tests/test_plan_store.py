@@ -0,0 +1,177 @@
+"""PlanStore backends (meal_app/plan_store.py): TTL expiry, compaction and stash."""
+import sqlite3
+import threading
+import time
+import pytest
+from meal_app import plan_store
+from meal_app.plan_store import (PlanStore, SQLitePlanStore, FilePlanStore, get_plan_store, stash, unstash,
+                                 take, PLAN_ID, COMPACT_EVERY)
+
+TTL = 60
+
+
+class _Clock:
+    """Stands in for the time module; advance() moves time on."""
+
+    def __init__(self):
+        self.offset = 0
+
+    def time(self):
+        return time.time() + self.offset
+
+    def advance(self, seconds):
+        self.offset += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(plan_store, "time", clock)
+    return clock
+
+
+@pytest.fixture(params=["sqlite", "file"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLitePlanStore(tmp_path / "plans.db", ttl=TTL)
+    return FilePlanStore(tmp_path / "plans", ttl=TTL)
+
+
+def test_put_get_delete(store):
+    plan_id = store.put({"Meal_List": ["A"], "Fresh_Ingredients": {"Garlic": 2}})
+    assert store.get(plan_id) == {"Meal_List": ["A"], "Fresh_Ingredients": {"Garlic": 2}}
+    assert store.put({"Meal_List": ["B"]}, plan_id) == plan_id
+    assert store.get(plan_id) == {"Meal_List": ["B"]}
+    store.delete(plan_id)
+    assert store.get(plan_id) is None
+    assert store.get(None) is None and store.get("no-such-id") is None
+
+
+def test_entries_expire_after_the_ttl(store, clock):
+    plan_id = store.put([1, 2, 3])
+    clock.advance(TTL + 1)
+    assert store.get(plan_id) is None
+
+
+def test_reading_extends_the_expiry(store, clock):
+    plan_id = store.put([1, 2, 3])
+    clock.advance(TTL - 10)
+    assert store.get(plan_id) == [1, 2, 3]
+    clock.advance(TTL - 10)
+    assert store.get(plan_id) == [1, 2, 3]
+
+
+def test_compact_removes_only_expired_entries(store, clock):
+    old = [store.put({"n": i}) for i in range(5)]
+    clock.advance(TTL - 10)
+    fresh = store.put({"n": "fresh"})
+    clock.advance(20)
+    assert store.compact() == 5
+    assert all(store.get(plan_id) is None for plan_id in old)
+    assert store.get(fresh) == {"n": "fresh"}
+    assert store.compact() == 0
+
+
+def test_put_compacts_every_compact_every_writes(store, clock):
+    expired = store.put({"n": "old"})
+    clock.advance(TTL + 1)
+    for i in range(COMPACT_EVERY - 2):
+        store.put({"n": i})
+    calls = []
+    original = store.compact
+    store.compact = lambda: calls.append(1) or original()
+    store.put({"n": "last"})
+    assert calls == [1]
+    # gone from the backend itself, not just hidden by the expiry check
+    clock.advance(-TTL - 1)
+    assert store.get(expired) is None
+
+
+def _pages(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("PRAGMA page_count").fetchone()[0], conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def test_sqlite_compaction_returns_pages_to_the_filesystem(tmp_path, clock):
+    path = tmp_path / "plans.db"
+    store = SQLitePlanStore(path, ttl=TTL)
+    for i in range(200):
+        store.put({"payload": "x" * 4000, "n": i})
+    grown, _ = _pages(path)
+    clock.advance(TTL + 1)
+    assert store.compact() == 200
+    pages, free = _pages(path)
+    assert free == 0
+    assert pages < grown / 10
+
+
+def test_sqlite_store_turns_on_incremental_vacuum_for_an_existing_file(tmp_path):
+    path = tmp_path / "plans.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE Other (x)")
+    SQLitePlanStore(path, ttl=TTL)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'Other'").fetchone()
+
+
+def test_file_store_rejects_ids_that_are_not_plan_ids(tmp_path):
+    store = FilePlanStore(tmp_path / "plans", ttl=TTL)
+    with pytest.raises(ValueError):
+        store.put({"Meal_List": ["A"]}, "../outside")
+    assert list(tmp_path.iterdir()) == [tmp_path / "plans"]
+    assert list((tmp_path / "plans").iterdir()) == []
+
+
+def test_file_store_concurrent_writes_of_one_id(tmp_path):
+    store = FilePlanStore(tmp_path / "plans", ttl=TTL)
+    plan_id = store.put({"writer": None})
+    errors = []
+
+    def write(writer):
+        try:
+            for _ in range(50):
+                store.put({"writer": writer}, plan_id)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=write, args=(writer,)) for writer in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert store.get(plan_id)["writer"] in range(8)
+    assert [path.name for path in (tmp_path / "plans").iterdir()] == [f"{plan_id}.json"]
+
+
+def test_plan_store_is_abstract():
+    with pytest.raises(TypeError):
+        PlanStore()
+
+    class Incomplete(PlanStore):
+        def _write(self, plan_id, raw, expires_at):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_stash_reuses_the_session_id(app):
+    with app.test_request_context("/"):
+        first = stash(PLAN_ID, {"Meal_List": ["A"]})
+        second = stash(PLAN_ID, {"Meal_List": ["B"]})
+        assert first == second
+        assert unstash(PLAN_ID) == {"Meal_List": ["B"]}
+        assert take(PLAN_ID) == {"Meal_List": ["B"]}
+        assert unstash(PLAN_ID) is None
+        assert get_plan_store().get(first) is None
+
+
+def test_replanning_leaves_one_stored_plan(client, app, tmp_path):
+    for meal in ("Asparagus Risotto", "Fajitas", "Asparagus Risotto"):
+        assert client.post("/create", data={"Meal 1": meal, "Quantity 1": "2"}).status_code == 302
+    with client.session_transaction() as session:
+        plan_id = session[PLAN_ID]
+    with sqlite3.connect(app.config["PLAN_STORE_PATH"]) as conn:
+        assert conn.execute("SELECT Plan_ID FROM PlanStore").fetchall() == [(plan_id,)]
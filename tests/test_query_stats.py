@@ -0,0 +1,34 @@
+"""Query instrumentation (meal_app/query_stats.py)."""
+import logging
+from flask import g
+from meal_app.query_stats import explain_statement
+from meal_app.utilities import execute_mysql_query, statement_cache_info
+
+# MySQL syntax (<=>) that the SQLite backend has to translate
+QUERY = "SELECT Name FROM MealsTable WHERE Staple <=> :staple ORDER BY Name"
+
+
+def test_explain_bypasses_the_query_log_and_statement_cache(app):
+    with app.test_request_context("/"):
+        execute_mysql_query(QUERY, {"staple": "Rice"})
+        log = list(g._query_log)
+        cache_size = statement_cache_info().currsize
+
+        plan = explain_statement(QUERY, {"staple": "Rice"})
+        assert plan and all("detail" in row for row in plan)
+        assert g._query_log == log
+        assert statement_cache_info().currsize == cache_size
+
+
+def test_only_selects_are_explained(app):
+    with app.test_request_context("/"):
+        assert explain_statement("DELETE FROM MealsTable", {}) is None
+
+
+def test_slow_queries_are_logged_with_their_plan(app, client, caplog):
+    app.config["SLOW_QUERY_MS"] = 0
+    caplog.set_level(logging.WARNING, logger=app.logger.name)
+    response = client.get("/list_meals")
+    assert response.status_code == 200
+    slow = [record.getMessage() for record in caplog.records if record.getMessage().startswith("Slow query")]
+    assert slow and all("explain=[{" in message and "error" not in message for message in slow)
@@ -0,0 +1,64 @@
+"""commit_request_work / close_request_connection (meal_app/utilities.py)."""
+import pytest
+from flask import abort
+from meal_app.utilities import execute_mysql_query, call_after_commit
+
+MEAL = "Asparagus Risotto"
+
+
+def _page(app):
+    with app.app_context():
+        return execute_mysql_query("SELECT Page FROM MealsTable WHERE Name = :name", {"name": MEAL}, fetch="one")["Page"]
+
+
+@pytest.fixture
+def committed():
+    return []
+
+
+@pytest.fixture
+def write_then(app, committed):
+    """Adds /write/<outcome>: writes Page = '999', then succeeds or fails as asked."""
+    def view(outcome):
+        execute_mysql_query("UPDATE MealsTable SET Page = '999' WHERE Name = :name", {"name": MEAL}, fetch="none")
+        call_after_commit(committed.append, outcome)
+        if outcome == "abort":
+            abort(404)
+        if outcome == "raise":
+            raise RuntimeError("view failed")
+        if outcome == "error":
+            return "bad request", 400
+        return "ok"
+    app.add_url_rule("/write/<outcome>", "write_then", view)
+    return app
+
+
+def test_successful_request_commits_and_runs_callbacks(write_then, committed):
+    original = _page(write_then)
+    assert write_then.test_client().get("/write/ok").status_code == 200
+    assert _page(write_then) == "999" != original
+    assert committed == ["ok"]
+
+
+@pytest.mark.parametrize("outcome, status", [("abort", 404), ("error", 400)])
+def test_error_response_rolls_back(write_then, committed, outcome, status):
+    original = _page(write_then)
+    assert write_then.test_client().get(f"/write/{outcome}").status_code == status
+    assert _page(write_then) == original
+    assert committed == []
+
+
+def test_unhandled_exception_rolls_back(write_then, committed):
+    original = _page(write_then)
+    write_then.config["PROPAGATE_EXCEPTIONS"] = False
+    assert write_then.test_client().get("/write/raise").status_code == 500
+    assert _page(write_then) == original
+    assert committed == []
+
+
+def test_propagated_exception_rolls_back(write_then, committed):
+    original = _page(write_then)
+    with pytest.raises(RuntimeError):
+        write_then.test_client().get("/write/raise")
+    assert _page(write_then) == original
+    assert committed == []
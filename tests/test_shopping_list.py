@@ -0,0 +1,124 @@
+"""
+ShoppingListEngine (meal_app/shopping_list.py) against the arithmetic of the
+pipeline it replaced: meals in plan order, each quantity scaled by the meal's
+count, running totals rounded to 2 dp after every addition. The engine must
+give identical output, value, type and key order included.
+"""
+import json
+import random
+import pytest
+from sqlalchemy import text
+from meal_app import db
+from meal_app.catalog import get_catalog
+from meal_app.meal_plans.create import store_meal_plan
+from meal_app.plan_store import unstash, PLAN_ID
+from meal_app.shopping_list import get_shopping_list_engine
+from meal_app.statements import INGREDIENT_COLUMNS
+
+
+def reference_collate(meal_list, quantity_list):
+    totals = {column: {} for column in INGREDIENT_COLUMNS}
+    for meal, quantity in zip(meal_list, quantity_list):
+        record = get_catalog().get(meal)
+        if record is None:
+            continue
+        for column in INGREDIENT_COLUMNS:
+            for ingredient, value in record.ingredients[column].items():
+                try:
+                    value = float(value) * float(quantity or 1)
+                except (TypeError, ValueError):
+                    continue
+                total = round(totals[column].get(ingredient, 0) + value, 2)
+                totals[column][ingredient] = int(total) if float(total).is_integer() else total
+    return totals
+
+
+POOL = [f"Ingredient {i}" for i in range(60)]
+
+
+def small_quantity(rng):
+    return rng.choice(["1", "2", "0.5", "0.25", "1.1", "0.333", "0.1", "0.2", "0.3", "abc", "", None,
+                       "100", "250", "1e2", "0.005", 3, 0.7, "0.015"])
+
+
+def two_dp_quantity(rng):
+    return f"{rng.uniform(0, 5000):.2f}"
+
+
+def catering_quantity(rng):
+    return f"{rng.uniform(1000, 20000):.3f}"
+
+
+def _add_meals(app, rng, quantity, count=300):
+    rows = []
+    for i in range(count):
+        buckets = {column: {name: quantity(rng) for name in rng.sample(POOL, rng.randint(0, 6))}
+                   for column in INGREDIENT_COLUMNS}
+        rows.append({"name": f"{quantity.__name__} {i:04d}",
+                     **{column: json.dumps(bucket) if i % 50 or column != "Dry_Ingredients" else None
+                        for column, bucket in buckets.items()}})
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO MealsTable (Name, Fresh_Ingredients, Tinned_Ingredients, Dry_Ingredients, "
+                "Dairy_Ingredients) VALUES (:name, :Fresh_Ingredients, :Tinned_Ingredients, :Dry_Ingredients, "
+                ":Dairy_Ingredients)"), rows)
+    return [row["name"] for row in rows]
+
+
+def _assert_identical(expected, actual):
+    assert json.dumps(expected) == json.dumps(actual)
+    for column in expected:
+        assert list(expected[column]) == list(actual[column])
+        for ingredient, total in expected[column].items():
+            assert type(actual[column][ingredient]) is type(total), (column, ingredient)
+
+
+@pytest.mark.parametrize("quantity, plan_quantities", [
+    (small_quantity, [0, 1, 2, 3, 4, 10, 1000]),
+    (two_dp_quantity, [1, 2, 3, 7]),
+    (catering_quantity, [1, 2, 3, 7]),
+])
+def test_engine_matches_the_reference_pipeline(app, meal_names, quantity, plan_quantities):
+    rng = random.Random(quantity.__name__)
+    names = _add_meals(app, rng, quantity) + meal_names
+    with app.test_request_context("/"):
+        engine = get_shopping_list_engine()
+        for trial in range(300):
+            meal_list = rng.sample(names, rng.choice([1, 3, 7, 20]))
+            if trial % 7 == 0:
+                meal_list.append("No Such Meal")
+            quantity_list = [rng.choice(plan_quantities) for _ in meal_list]
+            _assert_identical(reference_collate(meal_list, quantity_list), engine.collate(meal_list, quantity_list))
+
+
+def test_repeated_meals_and_empty_plans(app, meal_names):
+    with app.test_request_context("/"):
+        engine = get_shopping_list_engine()
+        meal_list = meal_names[:3] * 4
+        quantity_list = list(range(1, 13))
+        _assert_identical(reference_collate(meal_list, quantity_list), engine.collate(meal_list, quantity_list))
+        _assert_identical(reference_collate([], []), engine.collate([], []))
+        _assert_identical(reference_collate(["No Such Meal"], [2]), engine.collate(["No Such Meal"], [2]))
+
+
+def test_engine_follows_edits(client, app):
+    form = {"Name": "Test Meal", "Staple": "Rice", "Book": "", "Page": "", "Website": "", "Fresh Garlic": "2"}
+    assert client.post("/add", data=form).status_code == 302
+    form["Fresh Garlic"] = "3.125"
+    assert client.post("/edit/Test Meal", data=form).status_code == 302
+    with app.test_request_context("/"):
+        totals = get_shopping_list_engine().collate(["Test Meal"], [3])
+        assert totals["Fresh_Ingredients"] == {"Garlic": 9.38}
+        _assert_identical(reference_collate(["Test Meal"], [3]), totals)
+
+
+def test_stored_plan_keeps_the_submitted_order(app, meal_names):
+    meal_list = meal_names[:6]
+    for order in (meal_list, meal_list[::-1], meal_list[1::2] + meal_list[::2]):
+        quantity_list = list(range(1, len(order) + 1))
+        with app.test_request_context("/"):
+            store_meal_plan(order, quantity_list, [])
+            stored = unstash(PLAN_ID)
+            _assert_identical(reference_collate(order, quantity_list),
+                              {column: stored[column] for column in INGREDIENT_COLUMNS})